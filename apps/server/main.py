@@ -1,8 +1,8 @@
 from __future__ import annotations
-import sys, os, json, uuid, threading, queue, time, importlib.util
+import sys, os, json, uuid, threading, queue, time, importlib.util, shutil
 from pathlib import Path
 from typing import Dict, Any
-from fastapi import FastAPI, HTTPException, UploadFile, File, Header
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, HTMLResponse, Response
 from pydantic import BaseModel
@@ -14,15 +14,37 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 from fastapi.responses import HTMLResponse, Response, StreamingResponse
-from services.sdk_py.base import RunContext
+from services.sdk_py.base import JobCancelled, RunContext
+from services.sdk_py.loader import EXPERIMENTS
+from services.sdk_py.manifest import MANIFEST_NAME, ArtifactManifest, append_manifest, artifact_entry
+from services.flow import JOB_RUN_SUBDIR as FLOW_RUN_SUBDIR, read_flow_state
+from services.sdk_py.usage import USAGE_LOG, ThreadMeter, read_usage, summarize as summarize_usage
+from services.jobs import Batch, JobScheduler, JobStore, release_after, LogBus, ProcessPool, RunsGC, shard_dir, cacheable, code_version, fingerprint, execution_mode, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BATCH, parse_priority, ResourceClass, RESOURCE_CLASSES
 from fastapi.staticfiles import StaticFiles
 from services.lyrics_source import resolve_lyrics
+from services.metrics import REGISTRY, JOB_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE, connect_sqlite
 from apps.server.models.palette import CanvasDoc, XY, Size, Node, Group  # type: ignore
 try:
     from services.song_index import song_index as build_song_indices  # type: ignore
 except Exception:
     build_song_indices = None  # type: ignore
 
+INDEX_BUILD_SECONDS = REGISTRY.histogram(
+    "trk_index_build_seconds", "Song index (beatgrid/sections/chords) build time.", ("result",))
+
+if build_song_indices:
+    _build_song_indices = build_song_indices
+
+    def build_song_indices(song_id: str):  # type: ignore[no-redef]
+        t0 = time.perf_counter()
+        result = "error"
+        try:
+            out = _build_song_indices(song_id)
+            result = "ok"
+            return out
+        finally:
+            INDEX_BUILD_SECONDS.observe(time.perf_counter() - t0, result=result)
+
 # Helper: import an optional router module and return its `router` attr if present.
 def _optional_import_router(module_path: str, attr: str = 'router'):
     try:
@@ -51,6 +73,24 @@ SONG_ART_DIR = ART_DIR / "songs"
 
 app = FastAPI(title="TRK Host")
 
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "trk_http_request_seconds", "HTTP request latency until response start, by route template.",
+    ("method", "route", "status"))
+
+@app.middleware("http")
+async def _request_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (not raw path) to keep cardinality bounded.
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - t0, method=request.method,
+                                     route=getattr(route, "path", "<unmatched>"), status=status)
+
 # Allow local frontend dev (Next) to call the API during development.
 # In production this should be tightened or driven by configuration.
 app.add_middleware(
@@ -104,17 +144,33 @@ SIMPLE_JOBS: Dict[str, SimpleJob] = {}
 LOG_QUEUES: Dict[str, "queue.Queue[str]"] = {}
 
 def load_exp_class(exp_id: str):
-    py = EXPS / exp_id / "py" / "main.py"
-    if not py.exists():
+    # Cached per file; main.py is only re-executed when it changes on disk.
+    try:
+        return EXPERIMENTS.load(exp_id)
+    except FileNotFoundError:
         raise HTTPException(404, f"Experiment {exp_id} not found")
-    spec = importlib.util.spec_from_file_location(f"exp_{exp_id}", py)
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)  # type: ignore
-    return getattr(mod, "EXP")
+
+def load_exp_manifest(exp_id: str) -> Dict[str, Any]:
+    man = EXPS / exp_id / "manifest.json"
+    if not man.exists():
+        return {}
+    try:
+        return json.loads(man.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def exp_resources(exp_id: str) -> ResourceClass:
+    """Resource class declared by the experiment manifest (`resources`)."""
+    return ResourceClass.from_manifest(load_exp_manifest(exp_id))
 
 @app.get("/api/health")
 def health(): return {"ok": True, "version": "0.1.0"}
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/")
 def index():
     idx = WEB / "index.html"
@@ -128,6 +184,17 @@ def list_experiments():
         rows.append(data)
     return {"experiments": rows}
 
+@app.post("/api/experiments/{exp_id}/reload")
+def reload_experiment(exp_id: str):
+    """Force the next job to re-import the experiment's main.py."""
+    dropped = EXPERIMENTS.invalidate(exp_id)
+    load_exp_class(exp_id)
+    return {"ok": True, "id": exp_id, "wasCached": bool(dropped)}
+
+@app.get("/api/experiments/cache")
+def experiments_cache():
+    return EXPERIMENTS.stats()
+
 @app.get("/experiments/{exp_id}/ui/{path:path}")
 def exp_ui(exp_id:str, path:str="index.html"):
     base = EXPS / exp_id / "ui"; fp = base / (path or "index.html")
@@ -138,81 +205,581 @@ def exp_ui(exp_id:str, path:str="index.html"):
 
 ## ---------------------- Unified Job API ----------------------
 
+try:
+    JOB_LOG_TAIL = int(os.environ.get("TRK_JOB_LOG_TAIL", "2000"))
+except Exception:
+    JOB_LOG_TAIL = 2000
+
+# Job records persist across restarts; override location via TRK_JOBS_DB.
+JOB_STORE = JobStore(Path(os.environ.get("TRK_JOBS_DB") or (RUNS / "jobs.db")))
+
+# Result cache: completed jobs are reused by fingerprint until unused for the TTL
+# or pushed out by the most recently used TRK_RESULT_CACHE_MAX entries.
+try:
+    RESULT_CACHE_MAX = int(os.environ.get("TRK_RESULT_CACHE_MAX", "500"))
+    RESULT_CACHE_TTL = float(os.environ.get("TRK_RESULT_CACHE_TTL_DAYS", "30")) * 86400
+except Exception:
+    RESULT_CACHE_MAX, RESULT_CACHE_TTL = 500, 30 * 86400.0
+
 class Job:
     """Richer job model with streaming logs & status similar to earlier implementation.
     Combines earlier in-file job runner with upstream simpler model.
     """
-    def __init__(self, job_id: str, exp_id: str, inputs: Dict[str, Any]):
+    def __init__(self, job_id: str, exp_id: str, inputs: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+                 resources: ResourceClass | None = None, kind: str = "experiment", job_dir: Path | None = None):
         self.id = job_id
         self.exp_id = exp_id
+        self.kind = kind
         self.inputs = inputs
-        self.dir = RUNS / f"job_{job_id}"
-        self.dir.mkdir(parents=True, exist_ok=True)
+        self.priority = priority
+        self.resources = resources or ResourceClass()
+        self.created_at = time.time()
+        if job_dir is None:
+            # New jobs go to runs/jobs/<date>/<id[:2]>/job_<id>; existing ones keep their recorded dir.
+            self.dir = shard_dir(RUNS, job_id, self.created_at)
+            self.dir.mkdir(parents=True, exist_ok=True)
+        else:
+            self.dir = Path(job_dir)
         self.status = "pending"
-        self.logs: list[str] = []
-        self._log_q: "queue.Queue[str]" = queue.Queue()
+        # Bounded in-memory tail; the full log spills to <job dir>/job.log.
+        self.logbus = LogBus(capacity=JOB_LOG_TAIL, path=self.dir / "job.log")
+        self.artifacts = ArtifactManifest(self.dir)
         self._done = threading.Event()
+        self._cancel = threading.Event()
+        # Jobs that must finish before this one is queued, and hooks fired when this one finishes.
+        self.after: list[str] = []
+        self._callbacks: list = []
+        self._cb_lock = threading.Lock()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.error: str | None = None
+        self.fingerprint: str | None = None
+        self.cached_from: str | None = None
+        self.batch_id: str | None = None
+        # CPU/RSS/I/O totals for the run plus per-child records (see services/sdk_py/usage.py).
+        self.usage: Dict[str, Any] | None = None
+
+    @classmethod
+    def from_record(cls, row: Dict[str, Any]) -> "Job":
+        """Rebuild a job from its persisted record (e.g. after a restart)."""
+        kind = row.get("kind") or "experiment"
+        resources = exp_resources(row["exp_id"]) if kind == "experiment" else None
+        # PRIORITY_INTERACTIVE is 0, so only a missing priority falls back to normal.
+        priority = int(row["priority"]) if row.get("priority") is not None else PRIORITY_NORMAL
+        job = cls(row["id"], row["exp_id"], row.get("inputs") or {}, priority=priority,
+                  resources=resources, kind=kind, job_dir=Path(row.get("dir") or (RUNS / f"job_{row['id']}")))
+        job.status = row.get("status") or "failed"
+        job.created_at = row.get("created_at") or job.created_at
+        job.started_at = row.get("started_at")
+        job.finished_at = row.get("finished_at")
+        job.error = row.get("error")
+        job.after = list(row.get("after") or [])
+        job.fingerprint = row.get("fingerprint")
+        job.cached_from = row.get("cached_from")
+        job.batch_id = row.get("batch_id")
+        job.usage = row.get("usage")
+        if job.status not in ("pending", "queued", "running"):
+            job.mark_done()
+        return job
+
+    @property
+    def logs(self) -> list[str]:
+        """Most recent log lines (bounded); use the logs endpoint for ranges."""
+        return self.logbus.tail()
+
+    @property
+    def log_offset(self) -> int:
+        return self.logbus.next_offset
 
     def log(self, msg: str):
-        line = msg if msg.endswith("\n") else msg + "\n"
-        self.logs.append(line.rstrip())
+        self.logbus.append(msg)
+
+    def mark_done(self):
+        with self._cb_lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        self.logbus.close()
+        for cb in callbacks:
+            try:
+                cb(self)
+            except Exception as e:
+                print("job callback failed", self.id, e)
+
+    def on_done(self, cb):
+        """Call `cb(job)` once the job reaches a final state (immediately if it already has)."""
+        with self._cb_lock:
+            if not self._done.is_set():
+                self._callbacks.append(cb)
+                return
+        cb(self)
+
+    def cancelled(self) -> bool:
+        """Polled by RunContext.cancelled() (and forwarded to process-mode workers)."""
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled("job cancelled")
+
+    def record(self) -> Dict[str, Any]:
+        artifacts = [r["relpath"] for r in self.artifacts.refresh()]
+        return {
+            "id": self.id, "exp_id": self.exp_id, "kind": self.kind, "status": self.status,
+            "priority": self.priority, "inputs": self.inputs, "dir": str(self.dir),
+            "created_at": self.created_at, "started_at": self.started_at, "finished_at": self.finished_at,
+            "artifacts": artifacts, "log_offset": self.log_offset, "error": self.error,
+            "after": self.after, "fingerprint": self.fingerprint, "cached_from": self.cached_from,
+            "batch_id": self.batch_id, "usage": self.usage,
+        }
+
+    def persist(self):
         try:
-            self._log_q.put_nowait(line)
-        except Exception:
-            pass
+            JOB_STORE.save(self.record())
+        except Exception as e:
+            print("job persist failed", self.id, e)
+
+    def timings(self) -> Dict[str, Any]:
+        now = time.time()
+        wait_end = self.started_at or (self.finished_at or now)
+        out: Dict[str, Any] = {"waitSec": round(wait_end - self.created_at, 3)}
+        if self.started_at:
+            out["runSec"] = round((self.finished_at or now) - self.started_at, 3)
+        return out
 
 JOBS: Dict[str, Job] = {}
 
+# Shared worker pool for all background jobs; size via TRK_JOB_WORKERS.
+SCHEDULER = JobScheduler()
+JOB_WAIT_SECONDS = REGISTRY.histogram(
+    "trk_job_wait_seconds", "Time from job creation to start (queue + dependencies).", ("experiment",), JOB_BUCKETS)
+JOB_RUN_SECONDS = REGISTRY.histogram(
+    "trk_job_run_seconds", "Job run time by final status.", ("experiment", "status"), JOB_BUCKETS)
+REGISTRY.gauge("trk_job_queue_depth", "Jobs waiting in the scheduler queue.", ("experiment",),
+               fn=lambda: {(k,): v for k, v in SCHEDULER.depth_by_key()["queued"].items()})
+REGISTRY.gauge("trk_jobs_running", "Jobs currently running.", ("experiment",),
+               fn=lambda: {(k,): v for k, v in SCHEDULER.depth_by_key()["running"].items()})
+REGISTRY.gauge("trk_job_workers", "Scheduler worker threads.", fn=lambda: {(): SCHEDULER.workers})
+
+def _observe_job_start(job: Job):
+    job.started_at = time.time()
+    JOB_WAIT_SECONDS.observe(job.started_at - job.created_at, experiment=job.exp_id)
+
+JOB_CPU_SECONDS = REGISTRY.counter(
+    "trk_job_cpu_seconds_total", "CPU time used by jobs, including their child processes.", ("experiment", "mode"))
+
+def _observe_job_end(job: Job):
+    job.finished_at = time.time()
+    if job.started_at:
+        JOB_RUN_SECONDS.observe(job.finished_at - job.started_at, experiment=job.exp_id, status=job.status)
+
+def _record_usage(job: Job, own: Dict[str, Any]):
+    """Fold the runner thread's (or pool worker's) usage and the job's usage.jsonl into job.usage."""
+    try:
+        job.usage = summarize_usage(own, read_usage(job.dir / USAGE_LOG))
+    except Exception as e:
+        print("job usage failed", job.id, e)
+        return
+    JOB_CPU_SECONDS.inc(job.usage["cpuUserSec"], experiment=job.exp_id, mode="user")
+    JOB_CPU_SECONDS.inc(job.usage["cpuSysSec"], experiment=job.exp_id, mode="system")
+
+# Worker processes for experiments declaring "execution": "process" (TRK_JOB_PROCESSES).
+PROCESS_POOL = ProcessPool(exp_root=EXPS)
+
+# Background retention for runs/ (TRK_RUNS_BUDGET_GB, TRK_RUNS_MAX_AGE_DAYS, TRK_RUNS_GC_INTERVAL_SEC).
+RUNS_GC = RunsGC(RUNS, JOB_STORE)
+
+@app.on_event("shutdown")
+def _shutdown_process_pool():
+    PROCESS_POOL.shutdown()
+    RUNS_GC.stop()
+
 def _load_exp(exp_id: str):
     return load_exp_class(exp_id)
 
+def _get_job(job_id: str) -> Job | None:
+    """Live job if known, else rehydrate it from the persistent store."""
+    j = JOBS.get(job_id)
+    if j is None:
+        row = JOB_STORE.get(job_id)
+        if row:
+            j = JOBS.setdefault(job_id, Job.from_record(row))
+    return j
+
 def _run_job(job: Job):
+    meter = ThreadMeter().start()
+    own: Dict[str, Any] | None = None
     try:
+        job.check_cancelled()
         job.status = "running"
-        EXP = _load_exp(job.exp_id)  # type: ignore
-        ctx = RunContext(job.dir, job.inputs, logger=lambda m: job.log(f"[{job.exp_id}] {m}"))
-        exp = EXP()  # type: ignore
-        exp.validate(ctx)
-        exp.run(ctx)
+        _observe_job_start(job)
+        job.persist()
+        logger = lambda m: job.log(f"[{job.exp_id}] {m}")
+        manifest = load_exp_manifest(job.exp_id)
+        if execution_mode(manifest) == "process":
+            # A crashed worker pool is retried once, unless the experiment is not safe to re-run.
+            own = PROCESS_POOL.run(job.exp_id, job.dir, job.inputs, log=logger,
+                             on_artifact=lambda p: job.log(f"artifact: {Path(p).name}"),
+                             cancelled=job.cancelled, retry=manifest.get("idempotent", True))
+        else:
+            EXP = _load_exp(job.exp_id)  # type: ignore
+            ctx = RunContext(job.dir, job.inputs, logger=logger, cancel_fn=job.cancelled)
+            exp = EXP()  # type: ignore
+            exp.validate(ctx)
+            exp.run(ctx)
+        # An experiment that notices ctx.cancelled() may just return: its partial
+        # output must not count as completed (nor be served from the result cache).
+        job.check_cancelled()
         job.status = "completed"
         job.log("Job completed")
+        if job.fingerprint:
+            JOB_STORE.evict_cached(RESULT_CACHE_MAX, RESULT_CACHE_TTL)
+    except JobCancelled:
+        job.status = "cancelled"
+        job.log("Job cancelled")
     except Exception as e:
         job.status = "failed"
+        job.error = str(e)
         job.log(f"ERROR: {e}")
     finally:
-        job._done.set()
+        _record_usage(job, own if own is not None else meter.stop())
+        _observe_job_end(job)
+        job.persist()
+        job.mark_done()
+
+def _submit_job(job: Job, target) -> None:
+    job.status = "queued"
+    job.persist()
+    SCHEDULER.submit(job.id, lambda: target(job), job.priority, key=job.exp_id, resources=job.resources)
+
+def _fail_job(job: Job, error: str) -> None:
+    """Fail a job that never ran (e.g. a required dependency did not complete)."""
+    job.status = "failed"
+    job.error = error
+    job.log(f"ERROR: {error}")
+    job.finished_at = time.time()
+    job.persist()
+    job.mark_done()
+
+def _enqueue_job(job: Job, target, after: list[str] | None = None, require_success: bool = True) -> None:
+    """Register a job and hand it to the shared scheduler.
+
+    With `after`, the job stays `pending` (holding no worker) until every listed
+    job has finished; completion callbacks on those jobs then queue it. Unless
+    `require_success` is False, a dependency that did not complete fails it.
+    Unknown dependencies raise KeyError before the job is registered.
+    """
+    job.after = list(after or [])
+    deps = [_get_job(i) for i in job.after]
+    missing = [i for i, d in zip(job.after, deps) if d is None]
+    if missing:
+        raise KeyError(f"unknown dependency: {', '.join(missing)}")
+    JOBS[job.id] = job
+    waiting = sorted(d.id for d in deps if not d._done.is_set())
+    if waiting:
+        job.status = "pending"
+        job.persist()
+        job.log("waiting on " + ", ".join(waiting))
+    def _submit(j: Job) -> None:
+        if deps:
+            j.log("dependencies finished: " + ", ".join(f"{d.id}={d.status}" for d in deps))
+        _submit_job(j, target)
+    release_after(job, deps, _submit, _fail_job, require_success)
+
+def _parse_after(after: str | None) -> list[str]:
+    ids = [a.strip() for a in (after or "").split(",") if a.strip()]
+    unknown = [a for a in ids if _get_job(a) is None]
+    if unknown:
+        raise HTTPException(400, f"unknown job in after: {', '.join(unknown)}")
+    return ids
+
+def _link_results(src: Path, dst: Path) -> int:
+    """Hard-link (or copy) the artifacts in `src`'s manifest into `dst`."""
+    n = 0
+    for row in ArtifactManifest(src).refresh():
+        rel = row.get("relpath")
+        if not rel:
+            continue
+        target = dst / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        origin = (src / rel).resolve()
+        try:
+            os.link(origin, target)
+        except OSError:
+            shutil.copy2(origin, target)
+        n += 1
+    shutil.copy2(src / MANIFEST_NAME, dst / MANIFEST_NAME)
+    return n
+
+def _reuse_cached(exp_id: str, inputs: Dict[str, Any], fp: str, priority: int,
+                  batch_id: str | None = None) -> Job | None:
+    """Completed job for an identical fingerprint, materialized as a new finished job."""
+    row = JOB_STORE.find_cached(fp)
+    if not row:
+        return None
+    src = Path(row["dir"] or "")
+    if not (src / MANIFEST_NAME).exists():
+        # Results were cleaned up; this entry can never hit again.
+        JOB_STORE.forget_cached(row["id"])
+        return None
+    job = Job(uuid.uuid4().hex[:12], exp_id, inputs, priority=priority, resources=exp_resources(exp_id))
+    try:
+        n = _link_results(src, job.dir)
+    except Exception as e:
+        print("cached result unusable", row["id"], e)
+        shutil.rmtree(job.dir, ignore_errors=True)
+        JOB_STORE.forget_cached(row["id"])
+        return None
+    job.fingerprint, job.cached_from, job.batch_id = fp, row["id"], batch_id
+    job.status = "completed"
+    job.started_at = job.finished_at = time.time()
+    job.log(f"reused {n} artifacts from job {row['id']} (result cache)")
+    JOBS[job.id] = job
+    job.persist()
+    job.mark_done()
+    JOB_STORE.touch_cached(row["id"])
+    return job
+
+def _prepare_job(exp_id: str, inputs: Dict[str, Any], priority: int, manifest: Dict[str, Any],
+                 version: str | None, batch_id: str | None = None) -> Job:
+    """New experiment job, or an already finished one reusing cached results when `version` is set."""
+    fp = fingerprint(exp_id, version, inputs) if version else None
+    if fp:
+        hit = _reuse_cached(exp_id, inputs, fp, priority, batch_id=batch_id)
+        if hit:
+            return hit
+    job = Job(uuid.uuid4().hex[:12], exp_id, inputs, priority=priority, resources=ResourceClass.from_manifest(manifest))
+    job.fingerprint = fp
+    job.batch_id = batch_id
+    return job
 
 @app.post("/api/experiments/{exp_id}/jobs")
-def start_job(exp_id: str, body: Dict[str, Any]):
-    job_id = uuid.uuid4().hex[:12]
-    job = Job(job_id, exp_id, body or {})
-    JOBS[job_id] = job
-    th = threading.Thread(target=_run_job, args=(job,), daemon=True)
-    th.start()
-    return {"jobId": job_id, "status": job.status}
+def start_job(exp_id: str, body: Dict[str, Any], priority: str | None = None, after: str | None = None,
+              cache: bool = True):
+    """Queue an experiment run. `?after=<jobId>[,<jobId>...]` holds it until those jobs complete.
+
+    Unless `?cache=false` (or `"cache": false` in the manifest), a previous
+    completed run with the same experiment code and input contents is reused.
+    """
+    deps = _parse_after(after)
+    manifest = load_exp_manifest(exp_id)
+    # Inputs produced by dependencies may not exist yet, so chained jobs are never cached.
+    version = code_version(EXPS / exp_id, manifest) if cache and not deps and cacheable(manifest) else None
+    job = _prepare_job(exp_id, body or {}, parse_priority(priority), manifest, version)
+    if job.cached_from:
+        return {"jobId": job.id, "status": job.status, "cached": True, "cachedFrom": job.cached_from}
+    _enqueue_job(job, _run_job, after=deps)
+    return {"jobId": job.id, "status": job.status}
+
+try:
+    BATCH_MAX_ITEMS = int(os.environ.get("TRK_BATCH_MAX_ITEMS", "10000"))
+except Exception:
+    BATCH_MAX_ITEMS = 10000
+
+# Live batches only: a batch is dropped once all its jobs have finished, and
+# `_get_batch` rebuilds finished ones from the job store on demand.
+BATCHES: Dict[str, Batch] = {}
+
+def _forget_batch(b: Batch) -> None:
+    if BATCHES.get(b.id) is b:
+        BATCHES.pop(b.id, None)
+
+def _new_batch(batch_id: str, exp_id: str, jobs: list[Job], created_at: float | None = None) -> Batch:
+    b = Batch(batch_id, exp_id, [j.id for j in jobs], _get_job, created_at=created_at, on_finished=_forget_batch)
+    live = BATCHES.setdefault(batch_id, b)
+    return b.attach(jobs) if live is b else live
+
+def _get_batch(batch_id: str) -> Batch | None:
+    """Live batch if known, else rebuild it from its jobs' persisted records."""
+    b = BATCHES.get(batch_id)
+    if b is None:
+        rows = JOB_STORE.batch(batch_id)
+        if rows:
+            jobs = [j for j in (_get_job(r["id"]) for r in rows) if j]
+            b = _new_batch(batch_id, rows[0]["exp_id"], jobs, created_at=rows[0].get("created_at"))
+    return b
+
+@app.post("/api/experiments/{exp_id}/jobs:batch")
+def start_batch(exp_id: str, body: Any = Body(...), priority: str | None = None, cache: bool = True):
+    """Submit many input sets at once: `{"items": [{...}, ...]}` (or a bare list).
+
+    All jobs are validated, persisted in one transaction and pushed to the
+    scheduler under a single lock; cached results complete immediately. Jobs
+    default to `batch` priority so interactive work keeps precedence.
+    """
+    items = body.get("items") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        raise HTTPException(400, "items must be a non-empty list of input objects")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(400, f"at most {BATCH_MAX_ITEMS} items per batch")
+    bad = [i for i, it in enumerate(items) if not isinstance(it, dict)]
+    if bad:
+        raise HTTPException(400, f"items[{bad[0]}] is not an object")
+    if not (EXPS / exp_id).is_dir():
+        raise HTTPException(404, f"Experiment {exp_id} not found")
+    manifest = load_exp_manifest(exp_id)
+    version = code_version(EXPS / exp_id, manifest) if cache and cacheable(manifest) else None
+    prio = parse_priority(priority, default=PRIORITY_BATCH)
+    batch_id = uuid.uuid4().hex[:12]
+    jobs = [_prepare_job(exp_id, inputs, prio, manifest, version, batch_id=batch_id) for inputs in items]
+    fresh = [j for j in jobs if not j._done.is_set()]
+    for j in fresh:
+        j.status = "queued"
+        JOBS[j.id] = j
+    JOB_STORE.save_many([j.record() for j in fresh])
+    _new_batch(batch_id, exp_id, jobs)
+    SCHEDULER.submit_many([(j.id, (lambda j=j: _run_job(j)), j.priority, j.exp_id, j.resources) for j in fresh])
+    return {"batchId": batch_id, "total": len(jobs), "queued": len(fresh), "cached": len(jobs) - len(fresh),
+            "jobIds": [j.id for j in jobs]}
+
+@app.get("/api/batches/{batch_id}")
+def batch_status(batch_id: str, items: bool = False):
+    """Aggregate progress (counts per status); `?items=true` adds per-item status."""
+    b = _get_batch(batch_id)
+    if not b: raise HTTPException(404, "batch not found")
+    return b.summary(items=items)
+
+@app.get("/api/batches/{batch_id}/stream")
+def batch_stream(batch_id: str, request: Request, offset: int | None = None):
+    """SSE of per-item completions (`data: {index, jobId, status, finished, total}`),
+    resumable via `Last-Event-ID`; ends with the batch summary."""
+    b = _get_batch(batch_id)
+    if not b: raise HTTPException(404, "batch not found")
+    start = offset or 0
+    last_id = request.headers.get("last-event-id")
+    if last_id is not None:
+        try:
+            start = int(last_id) + 1
+        except ValueError:
+            pass
+    return StreamingResponse(b.sse(start, heartbeat=15.0), media_type="text/event-stream")
+
+@app.post("/api/batches/{batch_id}/cancel")
+def batch_cancel(batch_id: str):
+    b = _get_batch(batch_id)
+    if not b: raise HTTPException(404, "batch not found")
+    cancelled = b.cancel(lambda jid: cancel_job(jid)["cancelled"])
+    return {"batchId": b.id, "cancelled": cancelled}
 
 # Convenience: start a custom background job with a callable instead of experiment
-def start_custom_job(name: str, fn, inputs: Dict[str, Any]) -> str:
+def start_custom_job(name: str, fn, inputs: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+                     resources: ResourceClass | None = None, after: list[str] | None = None,
+                     require_success: bool = True, kind: str = "custom") -> str:
     job_id = uuid.uuid4().hex[:12]
-    job = Job(job_id, name, inputs or {})
-    JOBS[job_id] = job
-    def _wrap():
+    job = Job(job_id, name, inputs or {}, priority=priority, resources=resources, kind=kind)
+    def _wrap(job: Job):
+        meter = ThreadMeter().start()
         try:
+            job.check_cancelled()
             job.status = "running"
+            _observe_job_start(job)
+            job.persist()
             fn(job)
             if job.status not in ("failed", "cancelled"):
+                job.check_cancelled()
                 job.status = "completed"
+        except JobCancelled:
+            job.status = "cancelled"
+            job.log("Job cancelled")
         except Exception as e:
             job.status = "failed"
+            job.error = str(e)
             job.log(f"ERROR: {e}")
         finally:
-            job._done.set()
-    th = threading.Thread(target=_wrap, daemon=True)
-    th.start()
+            _record_usage(job, meter.stop())
+            _observe_job_end(job)
+            job.persist()
+            job.mark_done()
+    _enqueue_job(job, _wrap, after=after, require_success=require_success)
     return job_id
+
+# Routers under apps.server.routes reach the job system through app.state rather
+# than importing this module (which may be running as __main__).
+app.state.start_custom_job = start_custom_job
+app.state.get_job = _get_job
+
+def recover_jobs() -> Dict[str, int]:
+    """Startup pass over jobs left queued/running by a previous process.
+
+    Experiment jobs are re-queued unless their manifest sets `"idempotent": false`;
+    custom jobs (whose callable is gone) and non-idempotent ones are marked failed.
+    """
+    out = {"requeued": 0, "failed": 0}
+    # Register every interrupted job first so dependencies between them resolve to live objects.
+    rows = [r for r in JOB_STORE.active() if r["id"] not in JOBS]
+    jobs = [JOBS.setdefault(r["id"], Job.from_record(r)) for r in rows]
+    for job in sorted(jobs, key=lambda j: j.created_at):
+        if job.kind == "experiment" and load_exp_manifest(job.exp_id).get("idempotent", True):
+            job.started_at = None
+            job.log("re-queued after server restart")
+            _enqueue_job(job, _run_job, after=[a for a in job.after if _get_job(a)])
+            out["requeued"] += 1
+        else:
+            job.status = "failed"
+            job.error = "interrupted by server restart"
+            job.finished_at = time.time()
+            job.log(f"ERROR: {job.error}")
+            job.persist()
+            job.mark_done()
+            out["failed"] += 1
+    if any(out.values()):
+        print(f"job recovery: {out}")
+    return out
+
+@app.on_event("startup")
+def _recover_jobs_on_startup():
+    recover_jobs()
+    RUNS_GC.start()
+
+@app.get("/api/runs/gc")
+def runs_gc_status():
+    """Settings and the report of the last retention pass."""
+    return {"budgetBytes": int(RUNS_GC.budget_bytes), "maxAgeDays": round(RUNS_GC.max_age_sec / 86400, 3),
+            "intervalSec": RUNS_GC.interval_sec, "last": RUNS_GC.last_report}
+
+@app.post("/api/runs/gc")
+def runs_gc_collect(dryRun: bool = True):
+    """Run a retention pass now; defaults to a dry run that only reports."""
+    return RUNS_GC.collect(dry_run=dryRun)
+
+@app.post("/api/jobs/{job_id}/pin")
+def pin_job(job_id: str, pinned: bool = True):
+    """Exempt a job's directory from runs/ GC (`?pinned=false` to release)."""
+    if not JOB_STORE.set_pinned(job_id, pinned):
+        raise HTTPException(404, "job not found")
+    return {"jobId": job_id, "pinned": pinned}
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued or running job.
+
+    Queued jobs are dropped from the scheduler right away. Running jobs are
+    flagged; `RunContext.cancelled()` turns true and subprocesses started via
+    `ctx.run_process` are killed with their children, so the worker slot frees
+    up as soon as the experiment unwinds.
+    """
+    job = _get_job(job_id)
+    if not job: raise HTTPException(404, "job not found")
+    if job._done.is_set():
+        return {"jobId": job.id, "status": job.status, "cancelled": False}
+    job._cancel.set()
+    job.log("cancel requested")
+    # Jobs still waiting on dependencies hold no scheduler entry; finish them here.
+    if SCHEDULER.cancel(job.id) or job.status == "pending":
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        job.log("Job cancelled")
+        job.persist()
+        job.mark_done()
+    return {"jobId": job.id, "status": job.status, "cancelled": True}
+
+@app.get("/api/jobs/queue")
+def jobs_queue():
+    """Scheduler snapshot: worker count, queue depth and recent wait times."""
+    return SCHEDULER.stats()
+
 @app.get("/api/jobs/{job_id}/status")
 def job_status(job_id: str):
-    j = JOBS.get(job_id)
+    j = _get_job(job_id)
     if not j: raise HTTPException(404, "job not found")
     state = (
         "queued" if j.status in ("pending", "queued") else
@@ -220,12 +787,31 @@ def job_status(job_id: str):
         "done" if j.status in ("completed", "cancelled") else
         "error"
     )
-    return {"jobId": j.id, "status": j.status, "state": state}
+    payload: Dict[str, Any] = {"jobId": j.id, "status": j.status, "state": state, "priority": j.priority,
+                               "resources": j.resources.name, **j.timings()}
+    if state == "queued":
+        payload["queuePosition"] = SCHEDULER.position(j.id)
+    if j.after:
+        payload["after"] = j.after
+        waiting = [a for a in j.after if (d := _get_job(a)) and not d._done.is_set()]
+        if waiting:
+            payload["waitingOn"] = waiting
+    if j.error:
+        payload["error"] = j.error
+    if j.cached_from:
+        payload["cachedFrom"] = j.cached_from
+    if j.usage:
+        payload["usage"] = j.usage
+    if j.kind == "flow":
+        flow = read_flow_state(Path(j.inputs.get("runDir") or j.dir / FLOW_RUN_SUBDIR))
+        if flow:
+            payload["flow"] = flow
+    return payload
 
 # Frontend-simple jobs status (alias) used by /pages/record.tsx
 @app.get("/jobs/{job_id}")
 def job_status_simple(job_id: str):
-    j = JOBS.get(job_id)
+    j = _get_job(job_id)
     if not j:
         raise HTTPException(404, "job not found")
     # surface optional fields from inputs or side-effects
@@ -236,55 +822,91 @@ def job_status_simple(job_id: str):
             payload[k] = j.inputs[k]
     return payload
 
+@app.get("/api/jobs/{job_id}/logs")
+def job_logs(job_id: str, offset: int | None = None, limit: int = 500, tail: int | None = None):
+    """Range read of a job's log by line offset, or the last `tail` lines."""
+    job = _get_job(job_id)
+    if not job: raise HTTPException(404, "job not found")
+    limit = max(1, min(int(limit), 5000))
+    total = job.logbus.next_offset
+    if tail is not None:
+        n = max(0, min(int(tail), 5000))
+        start = max(0, total - n)
+        limit = n
+    else:
+        start = max(0, offset or 0)
+    rows, nxt = job.logbus.read(start, limit)
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "offset": rows[0][0] if rows else nxt,
+        "nextOffset": nxt,
+        "total": total,
+        "lines": [line for _, line in rows],
+        "done": job._done.is_set() and nxt >= total,
+    }
+
 @app.get("/api/jobs/{job_id}/logs/stream")
-def stream_logs(job_id: str):
-    job = JOBS.get(job_id)
+def stream_logs(job_id: str, request: Request, offset: int | None = None):
+    """SSE log stream. Each event carries `id: <offset>`; reconnecting clients
+    resume after the `Last-Event-ID` they last saw (or from `?offset=`)."""
+    job = _get_job(job_id)
     if not job: raise HTTPException(404, "job not found")
-    def gen():
-        # Keep streaming until done and queue drained
-        while True:
-            try:
-                line = job._log_q.get(timeout=0.25)
-                yield f"data: {line}\n\n"
-            except Exception:
-                pass
-            if job._done.is_set() and job._log_q.empty():
-                yield f"data: [job:{job.id}] status={job.status}\n\n"
-                break
-            time.sleep(0.05)
+    start = offset or 0
+    last_id = request.headers.get("last-event-id")
+    if last_id is not None:
+        try:
+            start = int(last_id) + 1
+        except ValueError:
+            pass
+    async def gen():
+        async for off, line in job.logbus.follow(start, heartbeat=15.0):
+            if line is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {off}\ndata: {line}\n\n"
+        yield f"data: [job:{job.id}] status={job.status}\n\n"
     return StreamingResponse(gen(), media_type="text/event-stream")
 
+def _artifact_item(job: Job, row: Dict[str, Any]) -> Dict[str, Any]:
+    rel = row.get("relpath") or ""
+    return {
+        "name": row.get("file") or Path(rel).name,
+        "artifact": row.get("name"),
+        "relpath": rel,
+        "relPath": rel,
+        "size": row.get("size"),
+        "sha256": row.get("sha256"),
+        "mime": row.get("mime"),
+        "uri": (job.dir / rel).resolve().as_uri(),
+    }
+
+def _backfill_manifest(job: Job) -> None:
+    """One-time manifest for finished jobs that predate artifacts.jsonl."""
+    found = [fp for fp in (job.dir / "artifacts").glob("**/*") if fp.is_file()]
+    if not found:
+        found = [fp for fp in job.dir.glob("**/*")
+                 if fp.is_file() and fp.name.lower().endswith(("segments.json", ".mid", "words.json"))]
+    for fp in found:
+        try:
+            append_manifest(job.dir, artifact_entry(job.dir, fp.stem, fp))
+        except Exception as e:
+            print("artifact backfill failed", fp, e)
+    job.artifacts.path.touch()
+
 @app.get("/api/jobs/{job_id}/artifacts")
-def list_artifacts(job_id: str):
-    job = JOBS.get(job_id)
+def list_artifacts(job_id: str, offset: int = 0, limit: int | None = None):
+    """Artifacts recorded in the job's manifest, optionally paged with `offset`/`limit`."""
+    job = _get_job(job_id)
     if not job: raise HTTPException(404, "job not found")
-    art = job.dir / "artifacts"
-    rows = []
-    if art.exists():
-        for fp in art.glob("**/*"):
-            if fp.is_file():
-                rel = fp.relative_to(job.dir)
-                item = {
-                    "name": fp.name,
-                    "relpath": str(rel),
-                    "relPath": str(rel),
-                    "size": fp.stat().st_size,
-                    "uri": fp.resolve().as_uri(),
-                }
-                rows.append(item)
-    # Fallback: if no artifacts recorded yet, scan entire job dir for known outputs
-    if not rows:
-        for fp in job.dir.glob("**/*"):
-            if fp.is_file() and fp.name.lower().endswith(("segments.json",".mid","words.json")):
-                rel = fp.relative_to(job.dir)
-                rows.append({
-                    "name": fp.name,
-                    "relpath": str(rel),
-                    "relPath": str(rel),
-                    "size": fp.stat().st_size,
-                    "uri": fp.resolve().as_uri(),
-                })
-    return {"jobId": job.id, "status": job.status, "artifacts": rows, "items": rows}
+    if job._done.is_set() and not job.artifacts.exists():
+        _backfill_manifest(job)
+    total = len(job.artifacts.refresh())
+    page = job.artifacts.page(offset, None if limit is None else max(1, min(int(limit), 1000)))
+    rows = [_artifact_item(job, r) for r in page]
+    nxt = max(0, offset) + len(rows)
+    return {"jobId": job.id, "status": job.status, "artifacts": rows, "items": rows,
+            "total": total, "offset": max(0, offset), "nextOffset": nxt if nxt < total else None}
 
 @app.post("/api/uploads")
 async def upload_file(file: UploadFile = File(...)):
@@ -321,7 +943,7 @@ for old in (OLD_DB_DATASETS, OLD_DB_APPS):
 
 
 def get_db_conn():
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = connect_sqlite(str(DB_PATH), "songs")
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -644,102 +1266,64 @@ async def recordings_upload(file: UploadFile = File(...)):
     data = await file.read()
     dest.write_bytes(data)
 
-    # Start background job to process recording: analyze with audio-engine, then create draft
+    # Analyze with audio-engine, then create the draft in a follow-on job that the
+    # scheduler releases the moment analysis finishes (no worker waits in between).
+    analysis_job = Job(uuid.uuid4().hex[:12], "audio-engine", {"audio": str(dest)}, priority=PRIORITY_INTERACTIVE,
+                       resources=exp_resources("audio-engine"))
+    _enqueue_job(analysis_job, _run_job)
+
     def _task(job: Job):
         job.log(f"processing recording: {dest}")
-        
-        # First, run audio-engine analysis on the recording
-        try:
-            job.log("running audio analysis...")
-            # Create and start audio-engine job directly (can't call route handler as function)
-            analysis_job_id = uuid.uuid4().hex[:12]
-            analysis_job = Job(analysis_job_id, "audio-engine", {"audio": str(dest)})
-            JOBS[analysis_job_id] = analysis_job
-            analysis_thread = threading.Thread(target=_run_job, args=(analysis_job,), daemon=True)
-            analysis_thread.start()
-            
-            # Wait for analysis to complete
-            import time
-            max_wait = 300  # 5 minutes timeout
-            waited = 0
-            while waited < max_wait:
-                if analysis_job.status in ("completed", "failed"):
-                    break
-                time.sleep(2)
-                waited += 2
-            
-            analysis_job = JOBS.get(analysis_job_id)
-            if analysis_job and analysis_job.status == "completed":
-                job.log("audio analysis completed")
-                # Extract results from analysis job
-                analysis_dir = analysis_job.dir
-                segments_file = analysis_dir / "segments.json"
-                lyrics_file = analysis_dir / "words.json"
-                
-                segments = []
-                lyrics = []
-                metadata = {"title": f"Recording {rec_id}", "artist": "Unknown"}
-                
-                if segments_file.exists():
-                    try:
-                        segments_data = json.loads(segments_file.read_text(encoding="utf-8"))
-                        segments = segments_data.get("segments", [])
-                        job.log(f"found {len(segments)} segments")
-                    except Exception as e:
-                        job.log(f"failed to parse segments: {e}")
-                
-                if lyrics_file.exists():
-                    try:
-                        lyrics_data = json.loads(lyrics_file.read_text(encoding="utf-8"))
-                        lyrics = lyrics_data.get("words", [])
-                        job.log(f"found {len(lyrics)} lyrics")
-                    except Exception as e:
-                        job.log(f"failed to parse lyrics: {e}")
-                
-                # Create draft with extracted data
-                meta = {
-                    "title": f"Recording {rec_id}",
-                    "artist": "Unknown",
-                    "assets": {"audio": str(dest)},
-                }
-                draft = {
-                    "id": uuid.uuid4().hex[:12],
-                    "meta": meta,
-                    "sections": segments,
-                    "lyrics": lyrics,
-                    "assets": {"audio": str(dest)},
-                }
-                draft_id = draft["id"]
-                _write_draft(draft_id, draft)
-                job.inputs["draftId"] = draft_id
-                job.log(f"draft ready with analysis: {draft_id}")
-            else:
-                job.log("audio analysis failed or timed out, creating basic draft")
-                # Fallback: create basic draft without analysis
-                meta = {
-                    "title": f"Recording {rec_id}",
-                    "artist": "Unknown",
-                    "assets": {"audio": str(dest)},
-                }
-                draft_id = uuid.uuid4().hex[:12]
-                _write_draft(draft_id, meta)
-                job.inputs["draftId"] = draft_id
-                job.log(f"basic draft ready: {draft_id}")
-                
-        except Exception as e:
-            job.log(f"analysis failed: {e}, creating basic draft")
-            # Fallback: create basic draft
-            meta = {
-                "title": f"Recording {rec_id}",
-                "artist": "Unknown",
-                "assets": {"audio": str(dest)},
-            }
+        meta = {
+            "title": f"Recording {rec_id}",
+            "artist": "Unknown",
+            "assets": {"audio": str(dest)},
+        }
+        analysis = _get_job(analysis_job.id)
+        if not analysis or analysis.status != "completed":
+            job.log("audio analysis failed or was cancelled, creating basic draft")
             draft_id = uuid.uuid4().hex[:12]
             _write_draft(draft_id, meta)
             job.inputs["draftId"] = draft_id
             job.log(f"basic draft ready: {draft_id}")
+            return
 
-    job_id = start_custom_job("recording-upload", _task, {"path": str(dest)})
+        job.log("audio analysis completed")
+        segments_file = analysis.dir / "segments.json"
+        lyrics_file = analysis.dir / "words.json"
+        segments = []
+        lyrics = []
+        if segments_file.exists():
+            try:
+                segments_data = json.loads(segments_file.read_text(encoding="utf-8"))
+                segments = segments_data.get("segments", [])
+                job.log(f"found {len(segments)} segments")
+            except Exception as e:
+                job.log(f"failed to parse segments: {e}")
+        if lyrics_file.exists():
+            try:
+                lyrics_data = json.loads(lyrics_file.read_text(encoding="utf-8"))
+                lyrics = lyrics_data.get("words", [])
+                job.log(f"found {len(lyrics)} lyrics")
+            except Exception as e:
+                job.log(f"failed to parse lyrics: {e}")
+
+        # Create draft with extracted data
+        draft = {
+            "id": uuid.uuid4().hex[:12],
+            "meta": meta,
+            "sections": segments,
+            "lyrics": lyrics,
+            "assets": {"audio": str(dest)},
+        }
+        draft_id = draft["id"]
+        _write_draft(draft_id, draft)
+        job.inputs["draftId"] = draft_id
+        job.log(f"draft ready with analysis: {draft_id}")
+
+    job_id = start_custom_job("recording-upload", _task, {"path": str(dest), "analysisJobId": analysis_job.id},
+                              priority=PRIORITY_INTERACTIVE, resources=RESOURCE_CLASSES["light"],
+                              after=[analysis_job.id], require_success=False)
     return {"jobId": job_id}
 
 @app.get("/drafts/{draft_id}/songdoc")
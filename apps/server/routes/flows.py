@@ -0,0 +1,213 @@
+"""
+Flows API: run profiles / flow documents as server jobs.
+
+A flow runs as one job (kind "flow") on the shared scheduler, so it is queued,
+prioritized, cancelled and logged like any other job. Inside the job the
+nodes run through `services.flow.FlowExecutor` (in parallel where the graph
+allows, with step memoization), in `<job dir>/flow/`. Per-node state and
+timings are included in `/api/jobs/{id}/status` under `flow`, and each node's
+log can be read or streamed on its own.
+
+The job system is reached through `request.app.state` (`start_custom_job`,
+`get_job`), which apps/server/main.py sets up.
+"""
+from __future__ import annotations
+import json, os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import yaml
+from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from services.flow import (JOB_RUN_SUBDIR, FlowError, FlowExecutor, NodeRun, StepCache, load_checkpoint,
+                           parse_flow, read_flow_state)
+from services.flow.executor import FINAL_STATES, NODE_LOG
+from services.jobs import parse_priority, tail_file
+from services.metrics import JOB_BUCKETS, REGISTRY
+from services.sdk_py.base import JobCancelled
+
+router = APIRouter(prefix="/api/flows", tags=["flows"])
+
+ROOT = Path(__file__).resolve().parents[3]
+PROFILES = ROOT / "profiles"
+RUNS = ROOT / "runs"
+PROFILE_SUFFIXES = (".yaml", ".yml", ".json")
+# Used by POST /api/flows/run with an empty body (the desktop shell's "Start Rehearsal Flow").
+DEFAULT_PROFILE = os.environ.get("TRK_FLOW_DEFAULT_PROFILE", "rehearsal")
+
+FLOW_NODE_SECONDS = REGISTRY.histogram(
+    "trk_flow_node_seconds", "Flow node run time by experiment and final state.", ("experiment", "status"), JOB_BUCKETS)
+FLOW_NODES_CACHED = REGISTRY.counter(
+    "trk_flow_nodes_cached_total", "Flow nodes restored from the step cache.", ("experiment",))
+
+
+def _profile_path(name: str) -> Path:
+    base = PROFILES.resolve()
+    for cand in [name] + [name + s for s in PROFILE_SUFFIXES]:
+        path = (PROFILES / cand).resolve()
+        if path.parent == base and path.suffix in PROFILE_SUFFIXES and path.is_file():
+            return path
+    raise HTTPException(404, f"profile {name} not found")
+
+
+def _load_doc(path: Path) -> Dict[str, Any]:
+    text = path.read_text(encoding="utf-8")
+    return json.loads(text) if path.suffix == ".json" else (yaml.safe_load(text) or {})
+
+
+def _job_hooks(request: Request):
+    state = request.app.state
+    try:
+        return state.start_custom_job, state.get_job
+    except AttributeError:
+        raise HTTPException(503, "job system not available")
+
+
+def _flow_job(request: Request, job_id: str):
+    _start, get_job = _job_hooks(request)
+    job = get_job(job_id)
+    if not job or job.kind != "flow":
+        raise HTTPException(404, "flow job not found")
+    return job
+
+
+def _run_dir(job) -> Path:
+    return Path(job.inputs.get("runDir") or job.dir / JOB_RUN_SUBDIR)
+
+
+def _on_node(job) -> Callable[[NodeRun], None]:
+    def hook(n: NodeRun) -> None:
+        job.log(f"node {n.id}: {n.status}" + (" (cached)" if n.cached else "") + (f" - {n.error}" if n.error else ""))
+        if n.status in FINAL_STATES and n.started_at and n.finished_at:
+            FLOW_NODE_SECONDS.observe(n.finished_at - n.started_at, experiment=n.ref, status=n.status)
+            if n.cached:
+                FLOW_NODES_CACHED.inc(experiment=n.ref)
+    return hook
+
+
+def _task(flow, run_dir: Optional[Path], resume: bool, cache: bool, workers: Optional[int]):
+    def run(job) -> None:
+        target = run_dir or job.dir / JOB_RUN_SUBDIR
+        opts: Dict[str, Any] = dict(log=job.log, cancelled=job.cancelled, on_event=_on_node(job), workers=workers,
+                                    cache=StepCache(RUNS / "_cache" / "flow") if cache else None)
+        ex = FlowExecutor.resume(target, flow, **opts) if resume else FlowExecutor(flow, target, **opts)
+        job.log(f"flow {flow.id}: {len(flow.nodes)} node(s), {ex.workers} worker(s), run dir {target}")
+        summary = ex.run()
+        if summary["status"] == "cancelled":
+            raise JobCancelled("flow cancelled")
+        if summary["status"] != "completed":
+            failed = [n["id"] for n in summary["nodes"] if n["status"] == "failed"]
+            raise RuntimeError(f"flow {flow.id} failed at: {', '.join(failed) or 'unknown'}")
+    return run
+
+
+@router.get("/profiles")
+def list_profiles():
+    """Profiles under profiles/ that define steps or nodes."""
+    out = []
+    for path in sorted(PROFILES.glob("*")):
+        if path.suffix not in PROFILE_SUFFIXES:
+            continue
+        try:
+            doc = _load_doc(path)
+        except Exception:
+            continue
+        nodes = (doc.get("nodes") or doc.get("steps")) if isinstance(doc, dict) else None
+        if nodes:
+            out.append({"name": path.stem, "file": path.name, "nodes": len(nodes)})
+    return {"profiles": out}
+
+
+@router.post("/run")
+def run_flow(request: Request, payload: Dict[str, Any] = Body(default={})):
+    """Start a flow job.
+
+    Body: `{"profile": "<name under profiles/>"}` or `{"flow": {...flow document}}`,
+    plus optional `priority`, `cache` (default true) and `workers`. An empty
+    body runs `TRK_FLOW_DEFAULT_PROFILE` (default: rehearsal).
+    """
+    start_custom_job, _get = _job_hooks(request)
+    payload = payload or {}
+    if isinstance(payload.get("flow"), dict):
+        doc, inputs = payload["flow"], {"flow": payload["flow"]}
+        default_id = str(doc.get("id") or "flow")
+    else:
+        name = str(payload.get("profile") or DEFAULT_PROFILE)
+        path = _profile_path(name)
+        doc, inputs, default_id = _load_doc(path), {"profile": path.stem}, path.stem
+    try:
+        flow = parse_flow(doc, default_id=default_id)
+    except FlowError as e:
+        raise HTTPException(400, f"invalid flow: {e}")
+    if not flow.nodes:
+        raise HTTPException(400, "flow has no nodes")
+    workers = payload.get("workers")
+    job_id = start_custom_job(f"flow:{flow.id}", _task(flow, None, False, bool(payload.get("cache", True)),
+                                                        int(workers) if workers else None),
+                              inputs, priority=parse_priority(payload.get("priority")), kind="flow")
+    return {"jobId": job_id, "flowId": flow.id, "nodes": flow.order}
+
+
+@router.get("/{job_id}")
+def flow_status(job_id: str, request: Request):
+    job = _flow_job(request, job_id)
+    out: Dict[str, Any] = {"jobId": job.id, "status": job.status, **job.timings()}
+    if job.error:
+        out["error"] = job.error
+    out.update(read_flow_state(_run_dir(job)) or {"nodes": []})
+    out["status"] = job.status  # the job's state wins over the checkpoint's
+    return out
+
+
+@router.post("/{job_id}/resume")
+def resume_flow(job_id: str, request: Request, payload: Dict[str, Any] = Body(default={})):
+    """Continue a failed/cancelled flow in its run directory as a new job; completed nodes are kept."""
+    start_custom_job, _get = _job_hooks(request)
+    job = _flow_job(request, job_id)
+    if job.status in ("pending", "queued", "running"):
+        raise HTTPException(409, "flow job is still active")
+    run_dir = _run_dir(job)
+    try:
+        state = load_checkpoint(run_dir)
+        flow = parse_flow(state.get("doc") or {}, default_id=str(state.get("flowId") or "flow"))
+    except (FileNotFoundError, FlowError, ValueError) as e:
+        raise HTTPException(409, f"cannot resume: {e}")
+    workers = payload.get("workers")
+    new_id = start_custom_job(f"flow:{flow.id}", _task(flow, run_dir, True, bool(payload.get("cache", True)),
+                                                        int(workers) if workers else None),
+                              {**{k: v for k, v in job.inputs.items() if k != "runDir"},
+                               "resumeOf": job.id, "runDir": str(run_dir)},
+                              priority=parse_priority(payload.get("priority"), job.priority), kind="flow")
+    return {"jobId": new_id, "resumeOf": job.id, "flowId": flow.id}
+
+
+@router.get("/{job_id}/nodes/{node_id}/logs")
+def node_logs(job_id: str, node_id: str, request: Request, tail: int = 500):
+    """Last `tail` lines of one node's log (<run dir>/<node>/node.log)."""
+    job = _flow_job(request, job_id)
+    path = _run_dir(job) / node_id / NODE_LOG
+    if not path.resolve().is_relative_to(_run_dir(job).resolve()):
+        raise HTTPException(400, "bad node id")
+    try:
+        lines = tail_file(path, max(0, min(tail, 5000)))
+    except FileNotFoundError:
+        lines = []
+    return {"jobId": job.id, "node": node_id, "lines": lines}
+
+
+@router.get("/{job_id}/nodes/{node_id}/logs/stream")
+def stream_node_logs(job_id: str, node_id: str, request: Request, offset: int = 0):
+    """SSE of one node's lines from the job log; ends when the job finishes."""
+    job = _flow_job(request, job_id)
+    prefix = f"[{node_id}] "
+
+    async def gen():
+        async for off, line in job.logbus.follow(offset, heartbeat=15.0):
+            if line is None:
+                yield ": keepalive\n\n"
+            elif line.startswith(prefix):
+                yield f"id: {off}\ndata: {line[len(prefix):]}\n\n"
+        yield f"event: done\ndata: {job.status}\n\n"
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
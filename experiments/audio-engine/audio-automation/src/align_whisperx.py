@@ -1,6 +1,21 @@
+import threading
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from .models import MODELS
+
+# Torchaudio ships wav2vec2 base aligners for these; other languages load a
+# Hugging Face wav2vec2-large model. Sizes are for the cache budget.
+_BASE_ALIGN_LANGS = {"en", "fr", "de", "es", "it"}
+_BASE_ALIGN_BYTES = 380 * 1024 * 1024
+_LARGE_ALIGN_BYTES = 1300 * 1024 * 1024
+
+# Running totals for this process, see align_stats().
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"calls": 0, "modelLoads": 0, "modelLoadSeconds": 0.0,
+                          "audioSeconds": 0.0, "alignSeconds": 0.0, "languages": {}}
+
 
 def try_imports() -> bool:
     try:
@@ -10,6 +25,45 @@ def try_imports() -> bool:
         return False
 
 
+def align_model(lang: str, device: str):
+    """((model, metadata), loaded): the aligner for a language and device, loaded once per process.
+
+    `loaded` tells whether this call had to load it.
+    """
+    import whisperx
+
+    loaded = []
+
+    def load():
+        loaded.append(True)
+        # API compatibility: use language_code for current whisperx version
+        return whisperx.load_align_model(language_code=lang, device=device)
+
+    model = MODELS.get(("whisperx-align", lang, device), load,
+                       size_bytes=_BASE_ALIGN_BYTES if lang in _BASE_ALIGN_LANGS else _LARGE_ALIGN_BYTES)
+    return model, bool(loaded)
+
+
+def _record(lang: str, timings: Dict[str, Any]) -> None:
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["audioSeconds"] += timings["audioSec"]
+        _stats["alignSeconds"] += timings["alignSec"]
+        if timings["modelLoaded"]:
+            _stats["modelLoads"] += 1
+            _stats["modelLoadSeconds"] += timings["modelSec"]
+        _stats["languages"][lang] = _stats["languages"].get(lang, 0) + 1
+
+
+def align_stats() -> Dict[str, Any]:
+    """Alignment totals for this process: model loads and their time vs. time spent aligning."""
+    with _stats_lock:
+        out = dict(_stats, languages=dict(_stats["languages"]))
+    for k in ("modelLoadSeconds", "audioSeconds", "alignSeconds"):
+        out[k] = round(out[k], 3)
+    return out
+
+
 def align_words(audio_path: Path, transcript_segments: List[Dict[str, Any]], lang: Optional[str], diarize: bool, word_conf_min: float) -> Dict[str, Any]:
     """
     Inputs:
@@ -19,17 +73,19 @@ def align_words(audio_path: Path, transcript_segments: List[Dict[str, Any]], lan
       - diarize: enable pyannote diarization
       - word_conf_min: drop words below confidence
     Returns:
-      {"words": [{"t0": float, "t1": float, "text": str, "speaker": Optional[str], "conf": float}, ...]}
+      {"words": [{"t0": float, "t1": float, "text": str, "speaker": Optional[str], "conf": float}, ...],
+       "timings": {"modelSec": float, "modelLoaded": bool, "audioSec": float, "alignSec": float}}
     """
     import whisperx
     import torch
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
 
-    # Load alignment model only (avoid loading ASR)
+    # Load alignment model only (avoid loading ASR); cached per language and device
     align_lang = (lang or "en")
-    # API compatibility: use language_code for current whisperx version
-    model_a, metadata = whisperx.load_align_model(language_code=align_lang, device=device)
+    t0 = time.perf_counter()
+    (model_a, metadata), loaded = align_model(align_lang, device)
+    t1 = time.perf_counter()
 
     # Prepare transcript for aligner (list of dicts with start/end/text)
     segs = [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]} for s in transcript_segments]
@@ -44,7 +100,11 @@ def align_words(audio_path: Path, transcript_segments: List[Dict[str, Any]], lan
         except Exception as e:
             raise RuntimeError(f"Failed to load audio for alignment: {e}")
 
+    t2 = time.perf_counter()
     aligned = whisperx.align(segs, model_a, metadata, audio, device)
+    timings = {"modelSec": round(t1 - t0, 3), "modelLoaded": loaded,
+               "audioSec": round(t2 - t1, 3), "alignSec": round(time.perf_counter() - t2, 3)}
+    _record(align_lang, timings)
 
     if diarize:
         try:
@@ -69,4 +129,4 @@ def align_words(audio_path: Path, transcript_segments: List[Dict[str, Any]], lan
             "speaker": w.get("speaker"),
             "conf": conf,
         })
-    return {"words": words}
+    return {"words": words, "timings": timings}
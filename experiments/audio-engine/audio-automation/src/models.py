@@ -0,0 +1,126 @@
+from __future__ import annotations
+import gc
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size_bytes: int
+    load_seconds: float
+    hits: int = 0
+    last_used: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, least recently used evicted first.
+
+    Models are loaded lazily on the first `get()` for their key and kept for every
+    later segment handled by this process: a pipeline worker keeps its model for
+    the whole session, and a long-lived host process keeps it across sessions.
+    When the estimated size of the loaded models exceeds `budget_bytes` (0 = no
+    limit) the least recently used ones are dropped; the model just requested is
+    always kept, even if it alone is over budget.
+    """
+
+    def __init__(self, budget_bytes: int = 0):
+        self.budget_bytes = int(budget_bytes)
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, key: Hashable, loader: Callable[[], Any], size_bytes: int = 0) -> Any:
+        """The model for `key`, calling `loader()` only if it is not loaded yet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._touch(key, entry)
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        # One load per key at a time; other keys load concurrently.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._touch(key, entry)
+            t0 = time.perf_counter()
+            model = loader()
+            seconds = time.perf_counter() - t0
+            with self._lock:
+                self._entries[key] = _Entry(model, int(size_bytes), seconds)
+                self.loads += 1
+                self.load_seconds += seconds
+                self._loading.pop(key, None)
+                evicted = self._evict(keep=key)
+        if evicted:
+            evicted.clear()
+            gc.collect()  # release the evicted models' memory before the next load
+        return model
+
+    def _touch(self, key: Hashable, entry: _Entry) -> Any:
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        entry.last_used = time.time()
+        self.hits += 1
+        return entry.model
+
+    def _evict(self, keep: Hashable) -> List[Any]:
+        evicted: List[Any] = []
+        if self.budget_bytes <= 0:
+            return evicted
+        while self.used_bytes() > self.budget_bytes:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            evicted.append(self._entries.pop(victim).model)
+            self.evictions += 1
+        return evicted
+
+    def used_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values())
+
+    def evict(self, key: Optional[Hashable] = None) -> int:
+        """Drop one model (or all); returns how many were dropped."""
+        with self._lock:
+            if key is None:
+                n = len(self._entries)
+                self._entries.clear()
+            else:
+                n = 1 if self._entries.pop(key, None) is not None else 0
+        if n:
+            gc.collect()
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": [{"key": list(k) if isinstance(k, tuple) else k, "sizeBytes": e.size_bytes,
+                            "loadSeconds": round(e.load_seconds, 3), "hits": e.hits}
+                           for k, e in self._entries.items()],
+                "usedBytes": self.used_bytes(),
+                "budgetBytes": self.budget_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "loadSeconds": round(self.load_seconds, 3),
+            }
+
+
+# Shared by speech_to_text (Whisper) and align_whisperx (alignment models), so one
+# memory budget covers both.
+MODELS = ModelRegistry()
+
+
+def configure(cfg: Dict[str, Any]) -> ModelRegistry:
+    """Apply `models.cache_mb` from the pipeline config to the shared registry."""
+    mb = (cfg.get("models") or {}).get("cache_mb")
+    if mb is not None:
+        MODELS.budget_bytes = int(float(mb) * 1024 * 1024)
+    return MODELS
@@ -1,12 +1,208 @@
 from __future__ import annotations
 import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Optional
 
 from tqdm import tqdm
 
 from . import record_stream, split_silence, stems as stems_mod, midi_convert, transpose_chords, identify_track, post_process
-from . import speech_to_text, lyrics_utils
-from .utils import ensure_dir, load_config, setup_logging, timestamp
+from . import speech_to_text, lyrics_utils, align_whisperx
+from .pipeline import Stage, WorkerPool
+from .utils import ensure_dir, limit_threads, load_config, setup_logging, timestamp
+
+
+# Stages that run in their own worker processes, each with its own thread budget.
+STAGES = ("stems", "midi", "asr")
+# What post-processing waits for from the MIDI, ASR and identification branches.
+PARTS = ("midi_dir", "lyrics", "info")
+
+
+def parallel_settings(config: dict) -> tuple[dict, dict, int]:
+    """Per-stage worker processes and thread budgets, and the queue size between stages.
+
+    `parallel.workers` is a count for every stage or a per-stage mapping; 0 = one
+    worker per stage for each 12 cores. A stage's threads 0 = the cores divided
+    evenly between all workers.
+    """
+    par = config.get("parallel", {}) or {}
+    cores = os.cpu_count() or 1
+    raw = par.get("workers", 0)
+    counts = raw if isinstance(raw, dict) else {stage: raw for stage in STAGES}
+    auto = max(1, cores // (4 * len(STAGES)))
+    workers = {stage: int(counts.get(stage, 0) or 0) or auto for stage in STAGES}
+    budget = par.get("threads", {}) or {}
+    share = max(1, cores // sum(workers.values()))
+    threads = {stage: int(budget.get(stage, 0) or 0) or share for stage in STAGES}
+    return workers, threads, max(1, int(par.get("queue_size", 2) or 2))
+
+
+def _init_worker(log_file: Path, threads: int) -> None:
+    setup_logging(log_file)
+    limit_threads(threads)
+
+
+def _stems_task(seg_path: Path, stems_root: Path, model: str, threads: int) -> Optional[Path]:
+    log = logging.getLogger("audio_automation")
+    try:
+        return stems_mod.run(seg_path, stems_root, model, log, threads=threads)
+    except Exception as e:
+        log.warning("Stems failed for %s: %s", seg_path.name, e)
+        return None
+
+
+def _midi_task(seg_path: Path, stems_dir: Optional[Path], seg_midi_dir: Path, targets: list) -> Optional[Path]:
+    log = logging.getLogger("audio_automation")
+    try:
+        wavs = []
+        if stems_dir and stems_dir.exists():
+            for t in targets:
+                p = stems_dir / f"{t}.wav"
+                if p.exists():
+                    wavs.append(p)
+        if "mix" in targets or not wavs:
+            wavs.append(seg_path)
+        midi_convert.run(wavs, seg_midi_dir, log)
+        return seg_midi_dir
+    except Exception as e:
+        log.warning("MIDI failed for %s: %s", seg_path.name, e)
+        return None
+
+
+def _asr_task(seg_path: Path, stems_dir: Path, seg_work_dir: Path, config: dict) -> Optional[Path]:
+    log = logging.getLogger("audio_automation")
+    try:
+        asr_res = speech_to_text.transcribe_to_vtt(segment_wav=seg_path, stems_dir=stems_dir, cfg=config)
+        timings = asr_res.get("align_timings")
+        if timings:
+            totals = align_whisperx.align_stats()
+            log.info("Alignment %s: model %.2fs%s, audio %.2fs, align %.2fs (worker: %d model load(s) %.1fs, "
+                     "%d alignment(s) %.1fs)", seg_path.name, timings["modelSec"],
+                     " (loaded)" if timings["modelLoaded"] else " (cached)", timings["audioSec"],
+                     timings["alignSec"], totals["modelLoads"], totals["modelLoadSeconds"], totals["calls"],
+                     totals["alignSeconds"])
+        return lyrics_utils.write_vtt_and_merge_json(seg_work_dir, asr_res, config)
+    except Exception as e:
+        log.warning("Lyrics/ASR failed for %s: %s", seg_path.name, e)
+        return None
+
+
+def build_pipeline(work_root: Path, stems_root: Path, midi_root: Path, config: dict, pools: dict,
+                   workers: dict, threads: dict, queue_size: int, log, on_done) -> tuple[list, list]:
+    """Stages split -> {stems -> {MIDI, ASR}, identify} -> post-process.
+
+    Items are per-segment dicts; each stage adds its result. Returns (entry stages
+    to feed with segments, all stages). `on_done(idx, dest)` is called from the
+    post-process stage as each segment completes.
+    """
+    stems_cfg = config.get("stems", {})
+    midi_cfg = config.get("midi", {})
+    id_cfg = config.get("identify", {})
+    chords_cfg = config.get("chords", {})
+    asr_cfg = {**config, "asr": {"cpu_threads": threads["asr"], **(config.get("asr") or {})}}
+    out_root = ensure_dir(Path(config.get("output_root", "output")))
+    # One transposition stage for the session: each jcrd is transposed once, whatever passes over it.
+    transposer = None
+    if chords_cfg.get("enabled", True):
+        transposer = transpose_chords.Transposer(work_root, int(chords_cfg.get("transpose_semitones", 0)),
+                                                 chords_cfg.get("glob", "**/*.jcrd.json"), log)
+
+    # Each branch reports a part for every segment, even when it fails (with None
+    # in place of its result), so post-processing never waits for a lost part.
+    def stems(item: dict) -> dict:
+        stems_dir = None
+        if stems_cfg.get("enabled", True):
+            try:
+                stems_dir = pools["stems"].run(_stems_task, item["seg_path"], stems_root,
+                                               stems_cfg.get("model", "htdemucs"), threads["stems"])
+            except Exception as e:
+                log.warning("Stems failed for segment %d: %s", item["idx"], e)
+        return {**item, "stems_dir": stems_dir}
+
+    def midi(item: dict) -> dict:
+        midi_dir = None
+        if midi_cfg.get("enabled", True):
+            try:
+                midi_dir = pools["midi"].run(_midi_task, item["seg_path"], item["stems_dir"],
+                                             midi_root / f"SEG{item['idx']:02d}",
+                                             midi_cfg.get("targets", ["vocals", "other", "mix"]))
+            except Exception as e:
+                log.warning("MIDI failed for segment %d: %s", item["idx"], e)
+        return {"idx": item["idx"], "seg_path": item["seg_path"], "stems_dir": item["stems_dir"],
+                "midi_dir": midi_dir}
+
+    def asr(item: dict) -> dict:
+        stems_dir = item["stems_dir"] or stems_root / f"SEG{item['idx']:02d}"
+        vtt = None
+        try:
+            vtt = pools["asr"].run(_asr_task, item["seg_path"], stems_dir, item["seg_work_dir"], asr_cfg)
+        except Exception as e:
+            log.warning("ASR failed for segment %d: %s", item["idx"], e)
+        return {"idx": item["idx"], "seg_path": item["seg_path"], "lyrics": vtt}
+
+    def identify(item: dict) -> dict:
+        info = identify_track.best_guess(item["idx"])
+        if id_cfg.get("enabled", True):
+            try:
+                id_res = identify_track.fingerprint(item["seg_path"], log)
+                if id_res:
+                    info.update(id_res)
+            except Exception as e:
+                log.warning("Identification failed for %s: %s", item["seg_path"].name, e)
+        return {**item, "info": info}
+
+    pending: dict = {}
+
+    def finish(seg: dict) -> None:
+        idx = seg["idx"]
+        # Chords transpose (in place) for this segment's files, now that lyrics wrote its jcrd
+        if transposer is not None:
+            try:
+                transposer.run(work_root / f"SEG{idx:02d}")
+            except Exception as e:
+                log.warning("Chord transpose failed: %s", e)
+        dest = post_process.run(
+            segment_wav=seg["seg_path"],
+            seg_idx=idx,
+            stems_dir=seg.get("stems_dir"),
+            midi_dir=seg.get("midi_dir"),
+            chords_root=work_root,
+            out_root=out_root,
+            organize_cfg=config.get("organize", {}),
+            info=seg.get("info") or identify_track.best_guess(idx),
+            logger=log,
+        )
+        on_done(idx, dest)
+
+    def post(part: dict) -> None:
+        seg = pending.setdefault(part["idx"], {})
+        seg.update(part)
+        if not all(k in seg for k in PARTS):
+            return
+        del pending[part["idx"]]
+        finish(seg)
+
+    def flush() -> None:
+        # Runs once every branch has ended: a segment still missing a part lost it
+        # to an unexpected error, so post-process it with what did arrive.
+        for idx in sorted(pending):
+            seg = pending.pop(idx)
+            log.warning("Segment %d is missing %s; post-processing it without", idx,
+                        ", ".join(k for k in PARTS if k not in seg))
+            try:
+                finish(seg)
+            except Exception as e:
+                log.warning("Post-processing failed for segment %d: %s", idx, e)
+
+    post_stage = Stage("post", post, 1, queue_size, producers=3, logger=log, on_end=flush)
+    midi_stage = Stage("midi", midi, workers["midi"], queue_size, logger=log).to(post_stage)
+    asr_stage = Stage("asr", asr, workers["asr"], queue_size, logger=log).to(post_stage)
+    stems_stage = Stage("stems", stems, workers["stems"], queue_size, logger=log).to(midi_stage, asr_stage)
+    id_stage = Stage("identify", identify, 1, queue_size, logger=log).to(post_stage)
+    return [stems_stage, id_stage], [stems_stage, id_stage, midi_stage, asr_stage, post_stage]
 
 
 def main():
@@ -42,41 +238,33 @@ def main():
         log.warning("No mix file created; aborting.")
         return 1
 
-    # 2) Split by silence
+    # 2) Split by silence, feeding each segment into the per-segment pipeline as soon as it is cut
     split_cfg = config.get("splitting", {})
-    segs: list[split_silence.Segment] = []
     seg_dir = ensure_dir(work_root / "segments")
-    if split_cfg.get("enabled", True):
-        segs, seg_json = split_silence.detect_and_split(
-            mix_path,
-            seg_dir,
-            int(split_cfg.get("silence_threshold_db", -35)),
-            float(split_cfg.get("min_silence_dur_sec", 1.5)),
-            float(split_cfg.get("min_track_len_sec", 30)),
-            log,
-        )
-    else:
-        segs = [split_silence.Segment(0.0, 0.0)]
-        (seg_dir / "seg_00.wav").write_bytes(mix_path.read_bytes())
-
-    if not segs:
-        log.warning("No segments found; treating entire mix as one segment.")
-        segs = [split_silence.Segment(0.0, 0.0)]
-        (seg_dir / "seg_00.wav").write_bytes(mix_path.read_bytes())
-
     stems_root = ensure_dir(work_root / "stems")
     midi_root = ensure_dir(work_root / "midi")
 
-    # 3) Per-segment processing
-    id_cfg = config.get("identify", {})
-    stems_cfg = config.get("stems", {})
-    midi_cfg = config.get("midi", {})
-    chords_cfg = config.get("chords", {})
+    workers, threads, queue_size = parallel_settings(config)
+    log.info("Pipeline workers per stage: %s, threads per stage: %s", workers, threads)
+    # A pool whose worker dies (e.g. OOM-killed) is replaced and its tasks resubmitted.
+    pools = {stage: WorkerPool(partial(ProcessPoolExecutor, max_workers=workers[stage], initializer=_init_worker,
+                                       initargs=(work_root / "session.log", threads[stage])),
+                               stage, logger=log)
+             for stage in STAGES}
+    results: dict = {}
+    progress = tqdm(desc="Segments", unit="seg")
+
+    def on_done(idx: int, dest: Path) -> None:
+        results[idx] = dest
+        progress.update(1)
 
-    results = []
+    entry, stages = build_pipeline(work_root, stems_root, midi_root, config, pools, workers, threads, queue_size,
+                                   log, on_done)
+    for stage in stages:
+        stage.start()
+    fed: list = []
 
-    for idx, seg in enumerate(tqdm(segs, desc="Segments")):
-        seg_path = seg_dir / f"seg_{idx:02d}.wav"
+    def feed(idx: int, _seg, seg_path: Path) -> None:
         # Create a per-segment work dir (SEGXX) to store lyrics and JSON
         seg_work_dir = ensure_dir(work_root / f"SEG{idx:02d}")
         # ensure seg wav present under seg_work_dir for co-located artifacts
@@ -84,82 +272,38 @@ def main():
             (seg_work_dir / seg_path.name).write_bytes(seg_path.read_bytes())
         except Exception:
             pass
-        seg_info = identify_track.best_guess(idx)
-
-        # Stems
-        seg_stems_dir = None
-        if stems_cfg.get("enabled", True):
-            try:
-                seg_stems_dir = stems_mod.run(seg_path, stems_root, stems_cfg.get("model", "htdemucs"), log)
-            except Exception as e:
-                log.warning("Stems failed for %s: %s", seg_path.name, e)
-                seg_stems_dir = None
-
-        # MIDI
-        seg_midi_dir = None
-        if midi_cfg.get("enabled", True):
-            try:
-                targets = midi_cfg.get("targets", ["vocals", "other", "mix"])
-                wavs = []
-                if seg_stems_dir and seg_stems_dir.exists():
-                    for t in targets:
-                        p = seg_stems_dir / f"{t}.wav"
-                        if p.exists():
-                            wavs.append(p)
-                if "mix" in targets or not wavs:
-                    wavs.append(seg_path)
-                seg_midi_dir = midi_root / f"SEG{idx:02d}"
-                midi_convert.run(wavs, seg_midi_dir, log)
-            except Exception as e:
-                log.warning("MIDI failed for %s: %s", seg_path.name, e)
-                seg_midi_dir = None
-
-        # Chords transpose (in place) within work_root
-        if chords_cfg.get("enabled", True):
-            try:
-                transpose_chords.run(
-                    chords_cfg.get("glob", "**/*.jcrd.json"),
-                    work_root,
-                    int(chords_cfg.get("transpose_semitones", 0)),
-                    log,
-                )
-            except Exception as e:
-                log.warning("Chord transpose failed: %s", e)
-
-        # Identification
-        if id_cfg.get("enabled", True):
-            try:
-                id_res = identify_track.fingerprint(seg_path, log)
-                if id_res:
-                    seg_info.update(id_res)
-            except Exception as e:
-                log.warning("Identification failed for %s: %s", seg_path.name, e)
+        fed.append(idx)
+        item = {"idx": idx, "seg_path": seg_path, "seg_work_dir": seg_work_dir}
+        for stage in entry:
+            stage.put(item)
 
-        # Lyrics / ASR
-        try:
-            asr_res = speech_to_text.transcribe_to_vtt(
-                segment_wav=seg_path,
-                stems_dir=seg_stems_dir or stems_root / f"SEG{idx:02d}",
-                cfg=config,
+    try:
+        if split_cfg.get("enabled", True):
+            split_silence.detect_and_split(
+                mix_path,
+                seg_dir,
+                int(split_cfg.get("silence_threshold_db", -35)),
+                float(split_cfg.get("min_silence_dur_sec", 1.5)),
+                float(split_cfg.get("min_track_len_sec", 30)),
+                log,
+                on_segment=feed,
             )
-            lyrics_utils.write_vtt_and_merge_json(seg_work_dir, asr_res, config)
-        except Exception as e:
-            log.warning("Lyrics/ASR failed for %s: %s", seg_path.name, e)
-
-        # Post process
-        out_root = ensure_dir(Path(config.get("output_root", "output")))
-        dest = post_process.run(
-            segment_wav=seg_path,
-            seg_idx=idx,
-            stems_dir=seg_stems_dir,
-            midi_dir=seg_midi_dir,
-            chords_root=work_root,
-            out_root=out_root,
-            organize_cfg=config.get("organize", {}),
-            info=seg_info,
-            logger=log,
-        )
-        results.append(dest)
+        if not fed:
+            if split_cfg.get("enabled", True):
+                log.warning("No segments found; treating entire mix as one segment.")
+            (seg_dir / "seg_00.wav").write_bytes(mix_path.read_bytes())
+            feed(0, split_silence.Segment(0.0, 0.0), seg_dir / "seg_00.wav")
+    finally:
+        for stage in entry:
+            stage.end()
+        for stage in stages:
+            stage.join()
+        for pool in pools.values():
+            pool.shutdown()
+        progress.close()
+    for stage in stages:
+        log.info("Stage %-8s %3d item(s), %.1fs busy", stage.name, stage.items, stage.busy_seconds)
+    results = [results[idx] for idx in sorted(results)]
 
     log.info("Completed: %d tracks processed. Output at %s", len(results), config.get("output_root", "output"))
     return 0
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional
+
+# Queue markers: one producer has finished / a worker thread should exit.
+_END = object()
+_QUIT = object()
+
+
+class WorkerPool:
+    """A process pool that replaces itself when a worker process dies.
+
+    A worker killed mid-task (e.g. by the OOM killer) breaks a ProcessPoolExecutor
+    for good: the task it ran, every other task in flight and every later submit
+    fail with BrokenProcessPool. `run()` then starts a fresh pool from `factory`
+    and resubmits its task (up to `retries` times), so the other segments in
+    flight carry on; only a task that keeps breaking the pool fails.
+    """
+
+    def __init__(self, factory: Callable[[], Executor], name: str = "pool", retries: int = 1, logger=None):
+        self.name = name
+        self.retries = max(0, int(retries))
+        self.logger = logger
+        self.restarts = 0
+        self._factory = factory
+        self._executor = factory()
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """`fn(*args)` in a worker process; blocks for the result."""
+        attempt = 0
+        while True:
+            with self._lock:
+                executor = self._executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                self._replace(executor)
+
+    def _replace(self, broken: Executor) -> None:
+        # Every task that was in flight lands here; only the first one swaps the pool.
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._factory()
+            self.restarts += 1
+        if self.logger:
+            self.logger.warning("Worker process of the %s pool died; restarted the pool", self.name)
+        broken.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+        executor.shutdown()
+
+
+class Stage:
+    """One pipeline stage: `workers` threads applying `fn` to items from a bounded inbox.
+
+    Every result that is not None is put into each downstream stage (fan-out),
+    blocking while their inboxes are full, so a slow stage holds back the ones
+    feeding it instead of letting work pile up. A stage fed by several stages
+    (fan-in) is created with `producers=<count>`; it finishes after all of them
+    have ended and `on_end()` (if given) has run, then ends its own downstream
+    stages.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, maxsize: int = 2,
+                 producers: int = 1, logger=None, on_end: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.fn = fn
+        self.on_end = on_end
+        self.workers = max(1, int(workers))
+        self.inbox: queue.Queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self.downstream: List[Stage] = []
+        self.logger = logger
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._producers = max(1, int(producers))
+        self._ended = 0
+        self._alive = 0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def to(self, *stages: "Stage") -> "Stage":
+        self.downstream.extend(stages)
+        return self
+
+    def put(self, item: Any) -> None:
+        self.inbox.put(item)
+
+    def end(self) -> None:
+        """Called once by each producer when it has put its last item."""
+        self.inbox.put(_END)
+
+    def start(self) -> "Stage":
+        self._alive = self.workers
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"stage-{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for t in self._threads:
+            t.join(timeout)
+
+    def _loop(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _QUIT:
+                break
+            if item is _END:
+                with self._lock:
+                    self._ended += 1
+                    last = self._ended == self._producers
+                if last:
+                    for _ in range(self.workers):
+                        self.inbox.put(_QUIT)
+                continue
+            t0 = time.perf_counter()
+            try:
+                out = self.fn(item)
+            except Exception as e:  # stage functions handle their own errors; this keeps the stage alive
+                if self.logger:
+                    self.logger.warning("Stage %s failed: %s", self.name, e)
+                out = None
+            with self._lock:
+                self.items += 1
+                self.busy_seconds += time.perf_counter() - t0
+            if out is not None:
+                for stage in self.downstream:
+                    stage.put(out)
+        with self._lock:
+            self._alive -= 1
+            last_worker = self._alive == 0
+        if last_worker:
+            if self.on_end is not None:
+                try:
+                    self.on_end()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning("Stage %s failed to finish: %s", self.name, e)
+            for stage in self.downstream:
+                stage.end()
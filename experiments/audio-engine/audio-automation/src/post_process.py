@@ -40,7 +40,8 @@ def run(segment_wav: Path, seg_idx: int, stems_dir: Optional[Path], midi_dir: Op
             relp = p.relative_to(midi_dir)
             safe_copy(p, dest_dir / "midi" / relp, logger=logger)
     if organize_cfg.get("copy_chords", True):
-        for p in chords_root.rglob("*.jcrd.json"):
+        # Only this segment's chord files (SEGXX under chords_root)
+        for p in (chords_root / f"SEG{seg_idx:02d}").rglob("*.jcrd.json"):
             safe_copy(p, dest_dir / "chords" / p.name, logger=logger)
 
     # Lyrics (VTT/SRT) copied from the segment work dir using paths embedded in the SEGXX jcrd JSON
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Dict, Any, List
 
 from .align_whisperx import try_imports as _whisperx_avail, align_words
+from .models import MODELS, configure as configure_models
 
 try:
     from faster_whisper import WhisperModel
@@ -10,9 +11,36 @@ except Exception:  # pragma: no cover
     WhisperModel = None  # type: ignore
 
 
+# Approximate parameter counts (first match wins), to estimate a model's memory for the cache budget.
+_WHISPER_PARAMS = [("distil", 756e6), ("turbo", 809e6), ("large", 1550e6), ("medium", 769e6),
+                   ("small", 244e6), ("base", 74e6), ("tiny", 39e6)]
+_BYTES_PER_PARAM = {"int8": 1, "int8_float16": 1, "int8_bfloat16": 1, "int8_float32": 1,
+                    "float16": 2, "bfloat16": 2, "float32": 4}
+
+
+def estimate_model_bytes(model_size: str, compute_type: str) -> int:
+    name = str(model_size).lower()
+    params = next((p for prefix, p in _WHISPER_PARAMS if prefix in name), 1550e6)
+    return int(params * _BYTES_PER_PARAM.get(compute_type, 2))
+
+
+def whisper_model(cfg: Dict[str, Any]):
+    """The WhisperModel for this ASR config, loaded once per process and shared by all segments."""
+    asr = cfg.get("asr", {})
+    model_size = asr.get("model_size", "large-v3")
+    compute_type = asr.get("compute_type", "int8")
+    device = asr.get("device", "auto")
+    # 0 lets CTranslate2 pick; the orchestrator sets the ASR stage's thread budget here.
+    cpu_threads = int(asr.get("cpu_threads", 0) or 0)
+    configure_models(cfg)
+    return MODELS.get(
+        ("faster-whisper", model_size, device, compute_type, cpu_threads),
+        lambda: WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads),
+        size_bytes=estimate_model_bytes(model_size, compute_type),
+    )
+
+
 def _do_faster_whisper(audio_path: Path, cfg: Dict[str, Any]) -> Dict[str, Any]:
-    model_size = cfg.get("asr", {}).get("model_size", "large-v3")
-    compute_type = cfg.get("asr", {}).get("compute_type", "int8")
     language = cfg.get("asr", {}).get("language") or None
     if WhisperModel is None:
         # Fallback: dummy segments
@@ -20,7 +48,7 @@ def _do_faster_whisper(audio_path: Path, cfg: Dict[str, Any]) -> Dict[str, Any]:
             "language": language or "en",
             "segments": [{"start": 0.0, "end": 2.0, "text": "la la la"}],
         }
-    model = WhisperModel(model_size, device="auto", compute_type=compute_type)
+    model = whisper_model(cfg)
     segments, info = model.transcribe(str(audio_path), language=language)
     segs = [{"start": float(s.start), "end": float(s.end), "text": s.text.strip()} for s in segments]
     return {"language": info.language or language or "en", "segments": segs}
@@ -41,6 +69,7 @@ def transcribe_to_vtt(segment_wav: Path, stems_dir: Path, cfg: Dict[str, Any]) -
             word_conf_min=float(cfg.get("lyrics", {}).get("word_conf_min", 0.0)),
         )
         res["words"] = aligned.get("words", [])
+        res["align_timings"] = aligned.get("timings")
     else:
         res["words"] = []
     return res
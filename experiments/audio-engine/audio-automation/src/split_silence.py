@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 import json
 
 from .utils import ensure_dir, run_cmd, write_json
@@ -39,9 +39,13 @@ def parse_silencedetect(stderr_text: str) -> List[Tuple[str, float]]:
 
 
 def detect_and_split(mix_path: Path, out_dir: Path, threshold_db: int, min_silence: float,
-                     min_track_len: float, logger) -> tuple[list[Segment], Path]:
+                     min_track_len: float, logger,
+                     on_segment: Optional[Callable[[int, Segment, Path], None]] = None
+                     ) -> tuple[list[Segment], Path]:
     """Detect silences and cut segments into out_dir. Returns (segments, segments_json_path).
     If no silences, return single segment spanning whole file.
+    `on_segment(idx, segment, wav_path)` is called as soon as each segment is cut,
+    so later stages can start before the whole mix is split.
     """
     ensure_dir(out_dir)
     cmd = [
@@ -107,6 +111,8 @@ def detect_and_split(mix_path: Path, out_dir: Path, threshold_db: int, min_silen
         ]
         run_cmd(cmd, logger=logger)
         realized.append(s)
+        if on_segment:
+            on_segment(idx, s, out_path)
 
     seg_json = out_dir / "segments.json"
     write_json(seg_json, {
@@ -1,21 +1,23 @@
 from pathlib import Path
 import sys
-from .utils import ensure_dir, run_cmd
+from .utils import ensure_dir, run_cmd, thread_env
 
 
-def run(segment_wav: Path, stems_root: Path, model: str, logger) -> Path:
+def run(segment_wav: Path, stems_root: Path, model: str, logger, threads: int = 0) -> Path:
     """Run demucs to separate stems for given segment.
     Returns the directory containing stems for this segment.
+    `threads` caps demucs' CPU threads (0 = library default).
     """
     seg_id = segment_wav.stem
     out_dir = ensure_dir(stems_root / seg_id)
     # Prefer running demucs via Python module to avoid PATH issues on Windows
     cmd = [sys.executable, "-m", "demucs.separate", "-n", model, "-o", str(out_dir), str(segment_wav)]
-    res = run_cmd(cmd, logger=logger)
+    env = thread_env(threads)
+    res = run_cmd(cmd, env=env, logger=logger)
     if res.returncode != 0:
         # Fallback to CLI if available
         cmd_cli = ["demucs", "-n", model, "-o", str(out_dir), str(segment_wav)]
-        run_cmd(cmd_cli, logger=logger)
+        run_cmd(cmd_cli, env=env, logger=logger)
 
     # Try common demucs output structures
     # demucs writes: out_dir / model / <filename without ext> / {vocals.wav, other.wav, ...}
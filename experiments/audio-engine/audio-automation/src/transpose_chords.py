@@ -1,7 +1,11 @@
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
+import hashlib
 import json
-from typing import Any
+import os
+import threading
+from typing import Any, List, Optional
 
 from .utils import ensure_dir
 
@@ -16,6 +20,9 @@ except Exception:  # pragma: no cover
 SEMITONES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 
 
+# Memoized: a session repeats the same few dozen symbols thousands of times, and
+# every string in a jcrd file passes through here (pychord parsing is the cost).
+@lru_cache(maxsize=4096)
 def transpose_symbol(sym: str, semitones: int) -> str:
     if not sym or Chord is None:
         return sym
@@ -57,14 +64,66 @@ def _walk_and_transpose(data: Any, semitones: int) -> Any:
         return data
 
 
-def run(glob_pattern: str, root: Path, semitones: int, logger) -> None:
-    for path in root.rglob("*.jcrd.json"):
-        if not path.match(glob_pattern):
-            continue
+class Transposer:
+    """Transposes jcrd files under `root` in place, each file content once.
+
+    Every file written is recorded with the sha256 of its new content in
+    `<root>/.transposed.json`. A file whose content still matches is skipped, so
+    passes over the same tree (one per segment, or a re-run of a session) only
+    touch new or changed files instead of transposing everything again.
+    """
+
+    LEDGER = ".transposed.json"
+
+    def __init__(self, root: Path, semitones: int, glob_pattern: str = "**/*.jcrd.json", logger=None):
+        self.root = Path(root)
+        self.semitones = int(semitones)
+        self.glob_pattern = glob_pattern
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._ledger = self._load()
+
+    def _load(self) -> dict:
         try:
-            content = json.loads(path.read_text(encoding="utf-8"))
-            new_content = _walk_and_transpose(content, semitones)
-            path.write_text(json.dumps(new_content, indent=2, ensure_ascii=False), encoding="utf-8")
-            logger.info("Transposed chords: %s by %+d semitones", path.name, semitones)
-        except Exception as e:
-            logger.warning("Chord transpose failed for %s: %s", path.name, e)
+            data = json.loads((self.root / self.LEDGER).read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        path = self.root / self.LEDGER
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self._ledger, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def run(self, under: Optional[Path] = None) -> List[Path]:
+        """Transpose matching files below `under` (default: root); returns the files written."""
+        if self.semitones % 12 == 0:
+            return []
+        done: List[Path] = []
+        with self._lock:
+            for path in sorted(Path(under or self.root).rglob("*.jcrd.json")):
+                if not path.match(self.glob_pattern):
+                    continue
+                key = path.resolve().relative_to(self.root.resolve()).as_posix()
+                try:
+                    raw = path.read_bytes()
+                    if self._ledger.get(key) == hashlib.sha256(raw).hexdigest():
+                        continue
+                    new_content = _walk_and_transpose(json.loads(raw.decode("utf-8")), self.semitones)
+                    out = json.dumps(new_content, indent=2, ensure_ascii=False).encode("utf-8")
+                    path.write_bytes(out)
+                    self._ledger[key] = hashlib.sha256(out).hexdigest()
+                    done.append(path)
+                    if self.logger:
+                        self.logger.info("Transposed chords: %s by %+d semitones", path.name, self.semitones)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning("Chord transpose failed for %s: %s", path.name, e)
+            if done:
+                self._save()
+        return done
+
+
+def run(glob_pattern: str, root: Path, semitones: int, logger) -> List[Path]:
+    return Transposer(root, semitones, glob_pattern, logger).run()
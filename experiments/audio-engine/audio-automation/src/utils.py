@@ -1,3 +1,4 @@
+import importlib.util
 import json
 import os
 import re
@@ -5,7 +6,7 @@ import shutil
 import subprocess
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, List, Optional, Tuple
 
@@ -22,6 +23,86 @@ class RunResult:
     returncode: int
     stdout: str
     stderr: str
+    # CPU user/sys seconds, peak RSS and bytes read/written by the child (POSIX only).
+    usage: dict = field(default_factory=dict)
+
+
+# Set by the server's RunContext.run_process: child usage is appended there so it
+# shows up in the job's resource accounting.
+USAGE_LOG_ENV = "TRK_USAGE_LOG"
+
+
+def _load_sdk_usage():
+    """The server SDK's usage module (services/sdk_py/usage.py), which reaps children
+    with wait4() where the platform has it. It only needs the standard library, so
+    it is loaded from the enclosing checkout when `services` is not importable."""
+    try:
+        from services.sdk_py import usage
+        return usage
+    except ImportError:
+        pass
+    for parent in Path(__file__).resolve().parents:
+        path = parent / "services" / "sdk_py" / "usage.py"
+        if path.is_file():
+            spec = importlib.util.spec_from_file_location("_trk_sdk_usage", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    return None
+
+
+_usage = _load_sdk_usage()
+
+
+def _communicate_with_usage(proc: subprocess.Popen) -> Tuple[str, str, dict]:
+    """Like proc.communicate(), but also returns the child's resource usage."""
+    if _usage is None:  # audio-automation used outside the monorepo
+        t0 = time.perf_counter()
+        out, err = proc.communicate()
+        return out, err, {"wallSec": round(time.perf_counter() - t0, 3)}
+    join = _usage.start_readers(proc)
+    usage = _usage.wait_process(proc)
+    out, err = join()
+    return out or "", err or "", usage
+
+
+def _report_usage(cmd: List[str], pid: int, returncode: int, usage: dict) -> None:
+    path = os.environ.get(USAGE_LOG_ENV)
+    if not path:
+        return
+    line = " ".join(cmd)
+    record = {"cmd": line if len(line) <= 300 else line[:300] + "...", "pid": pid, "returncode": returncode,
+              "nested": True, **usage}
+    try:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+# Thread pools of the numeric libraries the stages use (torch/OpenMP, MKL, OpenBLAS, TensorFlow).
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                   "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")
+
+
+def thread_env(threads: Optional[int]) -> dict:
+    """Environment limiting a child process' numeric libraries to `threads` threads."""
+    if not threads or threads <= 0:
+        return {}
+    return {var: str(threads) for var in THREAD_ENV_VARS}
+
+
+def limit_threads(threads: Optional[int]) -> None:
+    """Apply a thread budget to this process (env for libraries not yet initialized, torch if loaded)."""
+    if not threads or threads <= 0:
+        return
+    os.environ.update(thread_env(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            torch.set_num_threads(threads)
+        except Exception:
+            pass
 
 
 def setup_logging(log_file: Path) -> logging.Logger:
@@ -62,15 +143,20 @@ def run_cmd(cmd: List[str], cwd: Optional[Path] = None, env: Optional[dict] = No
         stderr=subprocess.PIPE,
         text=True,
     )
-    out, err = proc.communicate()
+    out, err, usage = _communicate_with_usage(proc)
+    _report_usage(cmd, proc.pid, proc.returncode, usage)
     if logger:
         if out:
             logger.info(out.strip())
         if err:
             logger.warning(err.strip())
+        if "cpuUserSec" in usage:
+            logger.info("  usage: %.2fs user, %.2fs sys, %.1f MB peak RSS, %d B read, %d B written",
+                        usage["cpuUserSec"], usage["cpuSysSec"], usage["maxRssBytes"] / 1e6,
+                        usage["readBytes"], usage["writeBytes"])
     if check and proc.returncode != 0:
         raise RuntimeError(f"Command failed: {' '.join(cmd)}\n{err}")
-    return RunResult(proc.returncode, out, err)
+    return RunResult(proc.returncode, out, err, usage)
 
 
 def load_config(path: Path) -> dict:
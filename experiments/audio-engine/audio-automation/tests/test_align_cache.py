@@ -0,0 +1,44 @@
+import sys
+import types
+from pathlib import Path
+
+import src.align_whisperx as aw
+from src.models import MODELS
+
+
+def _fake_whisperx(loads):
+    wx = types.ModuleType("whisperx")
+
+    def load_align_model(language_code, device):
+        loads.append((language_code, device))
+        return f"model-{language_code}", {"language": language_code}
+
+    wx.load_align_model = load_align_model
+    wx.load_audio = lambda path: [0.0] * 16000
+    wx.align = lambda segs, model, meta, audio, device: {
+        "word_segments": [{"word": "hi", "start": 0.0, "end": 0.5, "score": 0.9}]}
+    return wx
+
+
+def test_align_model_cached_per_language_and_device(monkeypatch, tmp_path: Path):
+    loads = []
+    monkeypatch.setitem(sys.modules, "whisperx", _fake_whisperx(loads))
+    torch = types.ModuleType("torch")
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    MODELS.evict()
+    before = aw.align_stats()
+
+    segs = [{"start": 0.0, "end": 1.0, "text": "hi"}]
+    first = aw.align_words(tmp_path / "a.wav", segs, "en", False, 0.0)
+    second = aw.align_words(tmp_path / "b.wav", segs, "en", False, 0.0)
+    aw.align_words(tmp_path / "c.wav", segs, "de", False, 0.0)
+
+    assert loads == [("en", "cpu"), ("de", "cpu")]
+    assert first["words"][0]["text"] == "hi"
+    assert first["timings"]["modelLoaded"] and not second["timings"]["modelLoaded"]
+    after = aw.align_stats()
+    assert after["calls"] - before["calls"] == 3
+    assert after["modelLoads"] - before["modelLoads"] == 2
+    assert after["languages"]["en"] - before["languages"].get("en", 0) == 2
+    MODELS.evict()
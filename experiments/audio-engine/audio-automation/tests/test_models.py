@@ -0,0 +1,45 @@
+import threading
+import time
+
+from src.models import ModelRegistry
+
+
+def test_loads_lazily_once_per_key():
+    reg = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(reg.get(("m", "int8"), loader))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(m is got[0] for m in got)
+    assert reg.stats()["loads"] == 1 and reg.stats()["hits"] == 3
+
+
+def test_least_recently_used_evicted_under_budget():
+    reg = ModelRegistry(budget_bytes=250)
+    a = reg.get("a", lambda: "A", size_bytes=100)
+    reg.get("b", lambda: "B", size_bytes=100)
+    assert reg.get("a", lambda: "A2") is a  # 'a' is now the most recently used
+    reg.get("c", lambda: "C", size_bytes=100)
+    assert [m["key"] for m in reg.stats()["models"]] == ["a", "c"]
+    assert reg.evictions == 1
+    # A model larger than the budget is still kept (alone).
+    reg.get("big", lambda: "BIG", size_bytes=1000)
+    assert [m["key"] for m in reg.stats()["models"]] == ["big"]
+
+
+def test_no_budget_keeps_everything():
+    reg = ModelRegistry()
+    for k in range(5):
+        reg.get(k, lambda k=k: k, size_bytes=10 ** 9)
+    assert len(reg.stats()["models"]) == 5
+    assert reg.evict() == 5
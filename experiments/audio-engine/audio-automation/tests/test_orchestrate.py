@@ -0,0 +1,105 @@
+import logging
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+pytest.importorskip("tqdm")
+pytest.importorskip("webvtt")
+pytest.importorskip("pysrt")
+
+from src import orchestrate
+from src.utils import thread_env
+
+
+def test_parallel_settings_defaults(monkeypatch):
+    monkeypatch.setattr(orchestrate.os, "cpu_count", lambda: 32)
+    workers, threads, queue_size = orchestrate.parallel_settings({})
+    assert workers == {"stems": 2, "midi": 2, "asr": 2}
+    assert threads == {"stems": 5, "midi": 5, "asr": 5}
+    assert queue_size == 2
+
+
+def test_parallel_settings_explicit(monkeypatch):
+    monkeypatch.setattr(orchestrate.os, "cpu_count", lambda: 32)
+    cfg = {"parallel": {"workers": {"stems": 3, "asr": 1}, "threads": {"stems": 6}, "queue_size": 4}}
+    workers, threads, queue_size = orchestrate.parallel_settings(cfg)
+    assert workers == {"stems": 3, "midi": 2, "asr": 1}
+    assert threads["stems"] == 6 and threads["asr"] == 32 // 6
+    assert queue_size == 4
+    # A single count applies to every stage.
+    workers, _threads, _q = orchestrate.parallel_settings({"parallel": {"workers": 1}})
+    assert set(workers.values()) == {1}
+
+
+def test_thread_env():
+    assert thread_env(0) == {}
+    assert thread_env(2)["OMP_NUM_THREADS"] == "2"
+
+
+class _Pool:
+    """Stands in for a WorkerPool; fails the segments in `fail` like a pool that broke for good."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+
+    def run(self, fn, seg_path, *args):
+        if seg_path.stem in self.fail:
+            raise BrokenProcessPool("worker died")
+        return seg_path.parent / f"{fn.__name__}-{seg_path.stem}"
+
+
+def _run_pipeline(tmp_path, monkeypatch, pools):
+    done, posted = {}, {}
+
+    def fake_post(**kw):
+        posted[kw["seg_idx"]] = kw
+        return tmp_path / "out" / str(kw["seg_idx"])
+
+    monkeypatch.setattr(orchestrate.post_process, "run", fake_post)
+    config = {"output_root": str(tmp_path / "out"), "chords": {"enabled": False},
+              "identify": {"enabled": False}}
+    workers = {stage: 2 for stage in orchestrate.STAGES}
+    threads = {stage: 1 for stage in orchestrate.STAGES}
+    entry, stages = orchestrate.build_pipeline(tmp_path, tmp_path / "stems", tmp_path / "midi", config, pools,
+                                               workers, threads, 2, logging.getLogger("test"),
+                                               lambda idx, dest: done.__setitem__(idx, dest))
+    for stage in stages:
+        stage.start()
+    for idx in range(3):
+        item = {"idx": idx, "seg_path": tmp_path / f"seg_{idx:02d}.wav", "seg_work_dir": tmp_path / f"SEG{idx:02d}"}
+        for stage in entry:
+            stage.put(item)
+    for stage in entry:
+        stage.end()
+    for stage in stages:
+        stage.join(10)
+    assert not any(t.is_alive() for stage in stages for t in stage._threads)
+    return done, posted
+
+
+def test_segment_survives_a_failing_stage(tmp_path, monkeypatch):
+    pools = {"stems": _Pool(), "midi": _Pool(fail={"seg_01"}), "asr": _Pool()}
+    done, posted = _run_pipeline(tmp_path, monkeypatch, pools)
+    assert sorted(done) == [0, 1, 2]
+    assert posted[1]["midi_dir"] is None
+    assert posted[1]["stems_dir"] == tmp_path / "_stems_task-seg_01"
+    assert posted[0]["midi_dir"] == tmp_path / "_midi_task-seg_00"
+
+
+def test_segment_with_a_lost_part_is_still_post_processed(tmp_path, monkeypatch):
+    # Identification raising outside its own error handling drops that part; the
+    # segment is post-processed once every branch has ended instead of waiting forever.
+    calls = []
+    real = orchestrate.identify_track.best_guess
+
+    def flaky_guess(idx):
+        calls.append(idx)
+        if idx == 2 and calls.count(2) == 1:
+            raise RuntimeError("boom")
+        return real(idx)
+
+    monkeypatch.setattr(orchestrate.identify_track, "best_guess", flaky_guess)
+    pools = {stage: _Pool() for stage in orchestrate.STAGES}
+    done, posted = _run_pipeline(tmp_path, monkeypatch, pools)
+    assert sorted(done) == [0, 1, 2]
+    assert posted[2]["info"]["tracknum"] == 3
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import pytest
+
+from src.pipeline import Stage, WorkerPool
+
+
+def test_stages_fan_out_and_in():
+    seen = []
+    sink = Stage("sink", lambda item: seen.append(item), producers=2)
+    double = Stage("double", lambda x: ("double", x * 2)).to(sink)
+    square = Stage("square", lambda x: ("square", x * x)).to(sink)
+    src = Stage("src", lambda x: x, workers=2).to(double, square)
+    stages = [src, double, square, sink]
+    for s in stages:
+        s.start()
+    for i in range(5):
+        src.put(i)
+    src.end()
+    for s in stages:
+        s.join(5)
+    assert not any(t.is_alive() for s in stages for t in s._threads)
+    assert sorted(seen) == sorted([("double", i * 2) for i in range(5)] + [("square", i * i) for i in range(5)])
+    assert sink.items == 10
+
+
+def test_segments_overlap_across_stages():
+    """With one worker per stage, total time approaches the slowest stage, not the sum."""
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work(seconds):
+        def fn(x):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(seconds)
+            with lock:
+                active[0] -= 1
+            return x
+        return fn
+
+    last = Stage("c", work(0.1))
+    mid = Stage("b", work(0.1)).to(last)
+    first = Stage("a", work(0.1), maxsize=1).to(mid)
+    t0 = time.perf_counter()
+    for s in (first, mid, last):
+        s.start()
+    for i in range(6):
+        first.put(i)
+    first.end()
+    for s in (first, mid, last):
+        s.join(10)
+    elapsed = time.perf_counter() - t0
+    assert last.items == 6
+    assert peak[0] >= 2
+    assert elapsed < 6 * 0.3 * 0.8  # serial would take 1.8s; pipelined ~0.8s
+
+
+def test_failed_item_is_dropped_and_stage_keeps_running():
+    out = []
+    sink = Stage("sink", out.append)
+    flaky = Stage("flaky", lambda x: 1 / x).to(sink)
+    for s in (flaky, sink):
+        s.start()
+    for x in (1, 0, 2):
+        flaky.put(x)
+    flaky.end()
+    for s in (flaky, sink):
+        s.join(5)
+    assert sorted(out) == [0.5, 1.0]
+
+
+def _crash_once(marker: str, x: int) -> int:
+    # The first call dies like an OOM-killed worker; later calls succeed.
+    if x == 0 and not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    time.sleep(0.2)
+    return x * 10
+
+
+def _always_crash(_x: int) -> int:
+    os._exit(1)
+
+
+def test_worker_pool_survives_a_dead_worker(tmp_path):
+    pool = WorkerPool(partial(ProcessPoolExecutor, max_workers=2), "test")
+    marker = str(tmp_path / "crashed")
+    out = {}
+    threads = [threading.Thread(target=lambda x=x: out.__setitem__(x, pool.run(_crash_once, marker, x)))
+               for x in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    # Tasks in flight when the worker died are resubmitted to the new pool, not lost.
+    assert out == {0: 0, 1: 10, 2: 20}
+    assert pool.restarts == 1
+    pool.shutdown()
+
+
+def test_worker_pool_gives_up_on_a_task_that_keeps_crashing():
+    pool = WorkerPool(partial(ProcessPoolExecutor, max_workers=1), "test", retries=1)
+    with pytest.raises(BrokenProcessPool):
+        pool.run(_always_crash, 1)
+    assert pool.restarts == 1
+    # The pool is usable again for the next task.
+    assert pool.run(abs, -3) == 3
+    pool.shutdown()
+
+
+def test_on_end_runs_once_after_the_last_item():
+    seen, ended = [], []
+    src = Stage("src", seen.append, workers=2)
+    src.on_end = lambda: ended.append(len(seen))
+    sink_ended = []
+    sink = Stage("sink", lambda x: x, on_end=lambda: sink_ended.append(ended[:]))
+    src.to(sink)
+    for s in (src, sink):
+        s.start()
+    for x in range(3):
+        src.put(x)
+    src.end()
+    for s in (src, sink):
+        s.join(5)
+    assert ended == [3]
+    # Downstream stages only end after on_end has run.
+    assert sink_ended == [[3]]
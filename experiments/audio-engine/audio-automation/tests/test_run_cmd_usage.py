@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+import pytest
+
+from src import utils
+from src.utils import run_cmd, USAGE_LOG_ENV
+
+
+def test_run_cmd_captures_output_and_returncode():
+    res = run_cmd([sys.executable, "-c", "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"])
+    assert res.returncode == 3
+    assert res.stdout.strip() == "out"
+    assert res.stderr.strip() == "err"
+
+
+# Usage comes from the server SDK (services/sdk_py/usage.py), which needs wait4 (waitid is optional).
+@pytest.mark.skipif(not hasattr(os, "wait4") or utils._usage is None, reason="rusage needs wait4 and the SDK")
+def test_run_cmd_reports_usage(tmp_path, monkeypatch):
+    log = tmp_path / "usage.jsonl"
+    monkeypatch.setenv(USAGE_LOG_ENV, str(log))
+    res = run_cmd([sys.executable, "-c", "x = bytearray(64 * 1024 * 1024); sum(range(200000))"])
+    assert res.returncode == 0
+    assert res.usage["cpuUserSec"] + res.usage["cpuSysSec"] > 0
+    assert res.usage["maxRssBytes"] >= 64 * 1024 * 1024
+    rec = json.loads(log.read_text(encoding="utf-8").splitlines()[0])
+    assert rec["nested"] is True
+    assert rec["returncode"] == 0
+    assert rec["maxRssBytes"] == res.usage["maxRssBytes"]
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import src.speech_to_text as stt
+from src.models import MODELS
+
+
+class _FakeWhisper:
+    loaded = 0
+
+    def __init__(self, size, device, compute_type, cpu_threads):
+        _FakeWhisper.loaded += 1
+        self.size = size
+
+    def transcribe(self, path, language=None):
+        seg = type("Seg", (), {"start": 0.0, "end": 1.0, "text": " hi "})()
+        return [seg], type("Info", (), {"language": "en"})()
+
+
+def test_whisper_model_is_reused_across_segments(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(stt, "WhisperModel", _FakeWhisper)
+    MODELS.evict()
+    cfg = {"asr": {"model_size": "small", "compute_type": "int8"}}
+    for i in range(3):
+        res = stt._do_faster_whisper(tmp_path / f"seg_{i:02d}.wav", cfg)
+        assert res["segments"][0]["text"] == "hi"
+    assert _FakeWhisper.loaded == 1
+    # A different model is a different cache entry.
+    stt._do_faster_whisper(tmp_path / "seg.wav", {"asr": {"model_size": "medium"}})
+    assert _FakeWhisper.loaded == 2
+    MODELS.evict()
+
+
+def test_estimate_model_bytes():
+    assert stt.estimate_model_bytes("large-v3", "int8") == int(1550e6)
+    assert stt.estimate_model_bytes("large-v3-turbo", "float16") == int(809e6 * 2)
+    assert stt.estimate_model_bytes("distil-large-v3", "float32") == int(756e6 * 4)
@@ -14,3 +14,24 @@ def test_transpose_nested(tmp_path: Path):
     out = _walk_and_transpose(data, 2)
     # simple smoke: C->D, G->A
     assert out["sections"][0]["chords"][0] in ("D", "Dmaj", "Dmajor")
+
+
+def test_transposer_rewrites_each_file_once(tmp_path: Path, monkeypatch):
+    import src.transpose_chords as tc
+
+    monkeypatch.setattr(tc, "transpose_symbol", lambda sym, n: f"{sym}+{n}")
+    seg = tmp_path / "SEG00"
+    seg.mkdir()
+    jcrd = seg / "SEG00.jcrd.json"
+    jcrd.write_text(json.dumps({"chords": ["C", "G"]}), encoding="utf-8")
+
+    assert tc.Transposer(tmp_path, 2).run(seg) == [jcrd]
+    # Passes over the same tree (another segment, a re-run) leave it alone.
+    assert tc.Transposer(tmp_path, 2).run() == []
+    assert tc.run("**/*.jcrd.json", tmp_path, 2, None) == []
+    assert json.loads(jcrd.read_text(encoding="utf-8"))["chords"] == ["C+2", "G+2"]
+
+    # New content is picked up.
+    jcrd.write_text(json.dumps({"chords": ["A"]}), encoding="utf-8")
+    assert tc.Transposer(tmp_path, 2).run() == [jcrd]
+    assert json.loads(jcrd.read_text(encoding="utf-8"))["chords"] == ["A+2"]
@@ -2,7 +2,7 @@ from __future__ import annotations
 from services.sdk_py.base import BaseExperiment, RunContext
 from services.io.adapters import resolve_uri
 from pathlib import Path
-import subprocess, sys, shlex, json
+import sys, shlex, json
 
 class EXP(BaseExperiment):
     def run(self, ctx: RunContext):
@@ -27,7 +27,8 @@ class EXP(BaseExperiment):
             arg = str(playlist or audio or "")
             cmd = [sys.executable, str(orch), "--playlist", arg]
             ctx.log("Running: " + " ".join(shlex.quote(c) for c in cmd))
-            proc = subprocess.run(cmd, cwd=str(engine_root), capture_output=True, text=True)
+            # Killed (with ffmpeg/demucs children) if the job is cancelled mid-run.
+            proc = ctx.run_process(cmd, cwd=str(engine_root))
             ctx.log(proc.stdout)
             if proc.returncode != 0:
                 ctx.log(proc.stderr)
@@ -36,6 +37,7 @@ class EXP(BaseExperiment):
             ctx.log("No orchestrate.py found; emitting dummy segments.json")
             (job/"segments.json").write_text(json.dumps({"segments":[]}, indent=2), encoding="utf-8")
 
+        ctx.check_cancelled()
         seg = next(job.glob("**/segments.json"), None)
         if seg: ctx.emit_json("segments", json.loads(seg.read_text(encoding="utf-8")))
         mid = next(job.glob("**/*.mid"), None)
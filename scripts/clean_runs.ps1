@@ -1,59 +1,38 @@
 <#
 .SYNOPSIS
-    Clean up old run directories based on age
+    Apply retention to the runs/ directory
 .DESCRIPTION
-    Removes run directories older than specified number of days
+    Thin wrapper around the server's run GC (services/jobs/runs.py, `python -m services.jobs gc`). Removes job
+    directories, uploads and cache entries unused for the given number of days,
+    then evicts least recently used entries if a size budget is given. Active
+    and pinned jobs are never removed. The server runs the same pass in the
+    background (TRK_RUNS_MAX_AGE_DAYS, TRK_RUNS_BUDGET_GB).
 .PARAMETER Days
     Number of days to keep (default: 30)
+.PARAMETER BudgetGB
+    Optional disk budget for runs/ in GB (default: no budget)
 .PARAMETER WhatIf
     Show what would be deleted without actually deleting
 .EXAMPLE
     .\clean_runs.ps1 -Days 7
-    .\clean_runs.ps1 -WhatIf
+    .\clean_runs.ps1 -BudgetGB 20 -WhatIf
 #>
 param(
     [int]$Days = 30,
+    [double]$BudgetGB = 0,
     [switch]$WhatIf
 )
 
-$RunsPath = Join-Path $PSScriptRoot "runs"
-$CutoffDate = (Get-Date).AddDays(-$Days)
+$RepoRoot = Split-Path $PSScriptRoot -Parent
+$PyArgs = @("-m", "services.jobs", "gc", "--root", (Join-Path $RepoRoot "runs"), "--days", $Days)
+if ($BudgetGB -gt 0) { $PyArgs += @("--budget-gb", $BudgetGB) }
+if ($WhatIf) { $PyArgs += "--dry-run" }
 
-Write-Host "Cleaning runs older than $Days days ($CutoffDate)..." -ForegroundColor Yellow
-Write-Host "Runs directory: $RunsPath" -ForegroundColor Gray
-
-if (-not (Test-Path $RunsPath)) {
-    Write-Host "Runs directory not found: $RunsPath" -ForegroundColor Red
-    exit 1
-}
-
-$OldRuns = Get-ChildItem -Path $RunsPath -Directory |
-    Where-Object { $_.LastWriteTime -lt $CutoffDate }
-
-if ($OldRuns.Count -eq 0) {
-    Write-Host "No old runs to clean up." -ForegroundColor Green
-    exit 0
-}
-
-Write-Host "Found $($OldRuns.Count) old run(s) to clean up:" -ForegroundColor Yellow
-$OldRuns | ForEach-Object {
-    Write-Host "  - $($_.Name) ($($_.LastWriteTime))" -ForegroundColor Gray
+Push-Location $RepoRoot
+try {
+    python @PyArgs
+    exit $LASTEXITCODE
 }
-
-if ($WhatIf) {
-    Write-Host "`nWhatIf mode - no changes made." -ForegroundColor Cyan
-    exit 0
+finally {
+    Pop-Location
 }
-
-$OldRuns | ForEach-Object {
-    Write-Host "Removing $($_.Name)..." -ForegroundColor Yellow
-    try {
-        Remove-Item $_.FullName -Recurse -Force
-        Write-Host "  ✓ Removed $($_.Name)" -ForegroundColor Green
-    }
-    catch {
-        Write-Host "  ✗ Failed to remove $($_.Name): $($_.Exception.Message)" -ForegroundColor Red
-    }
-}
-
-Write-Host "`nCleanup complete!" -ForegroundColor Green
\ No newline at end of file
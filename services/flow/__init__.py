@@ -1 +1,17 @@
+from .graph import Flow, FlowError, Node, parse_flow
+from .memo import StepCache
+from .executor import JOB_RUN_SUBDIR, FlowExecutor, NodeRun, default_flow_workers, load_checkpoint, read_flow_state
 
+__all__ = [
+    "Flow",
+    "FlowError",
+    "Node",
+    "parse_flow",
+    "StepCache",
+    "FlowExecutor",
+    "NodeRun",
+    "default_flow_workers",
+    "load_checkpoint",
+    "read_flow_state",
+    "JOB_RUN_SUBDIR",
+]
@@ -0,0 +1,367 @@
+"""
+Parallel executor for flow graphs (see graph.py).
+
+Nodes run on a bounded thread pool (`TRK_FLOW_WORKERS`, default half the
+cores) as soon as everything they depend on has completed, so independent
+branches overlap and a flow takes roughly its critical-path time. When more
+nodes are ready than there are workers, the ones heading the longest
+remaining chain start first. A failed node skips its downstream nodes, while
+unrelated branches keep running. Each node runs in `<run dir>/<node id>`.
+
+With a `StepCache` (memo.py), nodes whose key is already cached are restored
+instead of run, and completed nodes are added to the cache.
+
+Values a node publishes with `ctx.emit_value()` are handed to downstream
+inputs in memory (see services/sdk_py/handoff.py) and dropped once every
+dependent has finished. They exist only in this process, so such a node is
+never cached or kept on resume, and its digest is unique to the run, which
+makes its consumers re-run too.
+
+`<run dir>/flow.json` is rewritten after node transitions with the flow
+document, node states, outputs and output digests. `resume()` loads it back so
+a failed or interrupted run continues in the same directory: completed nodes
+whose definition is unchanged (and whose upstream is kept too) are not run
+again; everything else is. Checkpoints are written by a background thread
+that coalesces bursts of transitions, so a slow rename never delays starting
+the next node; the final state is written before `run()` returns.
+"""
+from __future__ import annotations
+import json, os, shutil, threading, time, uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.sdk_py.base import JobCancelled, RunContext
+from services.sdk_py.handoff import describe
+from services.sdk_py.loader import EXPERIMENTS
+
+from .graph import Flow, Node, node_outputs, node_spec, parse_flow, resolve_inputs
+from .memo import StepCache, outputs_digest
+
+FINAL_STATES = ("completed", "failed", "skipped", "cancelled")
+STATE_FILE = "flow.json"
+NODE_LOG = "node.log"
+# Run directory of a flow executed as a server job, inside the job's directory.
+JOB_RUN_SUBDIR = "flow"
+
+# run_node(node, inputs, node_dir, log, cancelled) executes one node; it may return
+# a dict of in-memory values for downstream nodes.
+RunNode = Callable[[Node, Dict[str, Any], Path, Callable[[str], Any], Callable[[], bool]], Any]
+
+
+def default_flow_workers() -> int:
+    try:
+        n = int(os.environ.get("TRK_FLOW_WORKERS", "0"))
+    except Exception:
+        n = 0
+    return n if n > 0 else max(1, (os.cpu_count() or 2) // 2)
+
+
+def run_experiment(node: Node, inputs: Dict[str, Any], node_dir: Path,
+                   log: Callable[[str], Any], cancelled: Callable[[], bool]) -> Dict[str, Any]:
+    EXP = EXPERIMENTS.load(node.ref)
+    ctx = RunContext(node_dir, inputs, logger=log, cancel_fn=cancelled)
+    exp = EXP()
+    exp.validate(ctx)
+    exp.run(ctx)
+    return ctx.values
+
+
+class NodeRun:
+    __slots__ = ("id", "ref", "status", "started_at", "finished_at", "error", "outputs", "digest", "cached",
+                 "values", "handoff")
+
+    def __init__(self, node: Node):
+        self.id = node.id
+        self.ref = node.ref
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.outputs: Dict[str, Any] = {}
+        self.digest: Optional[str] = None  # content digest of outputs, feeds downstream cache keys
+        self.cached = False
+        self.values: Dict[str, Any] = {}  # in-memory outputs, released once all dependents finished
+        self.handoff: Dict[str, str] = {}  # name -> description of every value handed over
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "ref": self.ref, "status": self.status,
+                               "startedAt": self.started_at, "finishedAt": self.finished_at}
+        if self.started_at:
+            out["runSec"] = round((self.finished_at or time.time()) - self.started_at, 3)
+        if self.error:
+            out["error"] = self.error
+        if self.cached:
+            out["cached"] = True
+        if self.outputs:
+            out["outputs"] = self.outputs
+        if self.handoff:
+            out["values"] = self.handoff
+        return out
+
+
+class FlowExecutor:
+    def __init__(self, flow: Flow, run_dir: Path, run_node: RunNode = run_experiment,
+                 workers: Optional[int] = None, log: Callable[[str], Any] = print,
+                 on_event: Optional[Callable[[NodeRun], Any]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None, cache: Optional[StepCache] = None):
+        self.flow = flow
+        self.run_dir = Path(run_dir).resolve()
+        self.run_node = run_node
+        self.workers = max(1, min(int(workers or default_flow_workers()), len(flow.nodes) or 1))
+        self.log = log
+        self.on_event = on_event
+        self.cache = cache
+        self._cancelled = cancelled or (lambda: False)
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.nodes: Dict[str, NodeRun] = {nid: NodeRun(flow.nodes[nid]) for nid in flow.order}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.resumed: List[str] = []
+        self._dirty = threading.Event()
+        self._done = threading.Event()
+
+    @classmethod
+    def resume(cls, run_dir: Path, flow: Optional[Flow] = None, **kwargs: Any) -> "FlowExecutor":
+        """Executor continuing the run checkpointed in `run_dir` (optionally with an edited flow)."""
+        state = load_checkpoint(run_dir)
+        if flow is None:
+            flow = parse_flow(state.get("doc") or {}, default_id=str(state.get("flowId") or "flow"))
+        ex = cls(flow, run_dir, **kwargs)
+        ex.restore(state)
+        return ex
+
+    def restore(self, state: Dict[str, Any]) -> List[str]:
+        """Mark checkpointed nodes completed where still valid; returns their ids."""
+        saved = {n.get("id"): n for n in state.get("nodes") or []}
+        kept: List[str] = []
+        for nid in self.flow.order:
+            node, prev = self.flow.nodes[nid], saved.get(nid) or {}
+            if (prev.get("status") == "completed" and prev.get("spec") == node_spec(node) and not prev.get("values")
+                    and prev.get("digest") and self.node_dir(nid).is_dir()
+                    and all(d in kept for d in node.deps)):
+                run = self.nodes[nid]
+                run.status = "completed"
+                run.outputs = dict(prev.get("outputs") or {})
+                run.digest = prev["digest"]
+                run.cached = bool(prev.get("cached"))
+                run.started_at, run.finished_at = prev.get("startedAt"), prev.get("finishedAt")
+                kept.append(nid)
+        self.resumed = kept
+        return kept
+
+    def node_dir(self, node_id: str) -> Path:
+        return self.run_dir / node_id
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set() or bool(self._cancelled())
+
+    @property
+    def status(self) -> str:
+        states = [n.status for n in self.nodes.values()]
+        if any(s not in FINAL_STATES for s in states):
+            return "running" if self.started_at else "pending"
+        if all(s == "completed" for s in states):
+            return "completed"
+        return "cancelled" if "cancelled" in states and "failed" not in states else "failed"
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            nodes = [n.to_dict() for n in self.nodes.values()]
+        out = {"flowId": self.flow.id, "runDir": str(self.run_dir), "status": self.status,
+               "startedAt": self.started_at, "finishedAt": self.finished_at, "nodes": nodes}
+        if self.resumed:
+            out["resumed"] = list(self.resumed)
+        return out
+
+    def checkpoint(self) -> None:
+        """Write flow.json atomically: summary plus what resume() needs."""
+        state = self.summary()
+        with self._lock:
+            for n in state["nodes"]:
+                n["spec"] = node_spec(self.flow.nodes[n["id"]])
+                n["digest"] = self.nodes[n["id"]].digest
+        state["doc"] = self.flow.doc
+        path = self.run_dir / STATE_FILE
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(state, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _set(self, run: NodeRun, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            run.status = status
+            if status == "running":
+                run.started_at = time.time()
+            elif status in FINAL_STATES and run.started_at:
+                run.finished_at = time.time()
+            if error:
+                run.error = error
+            elif status in ("pending", "running"):
+                run.error = None
+        self._dirty.set()
+        if self.on_event:
+            try:
+                self.on_event(run)
+            except Exception as e:
+                self.log(f"flow event hook failed: {e}")
+
+    def _execute(self, node: Node) -> Tuple[Dict[str, Any], str, bool, Dict[str, Any]]:
+        """Run (or restore) one node; returns its outputs, their digest, whether it was cached and its values."""
+        with self._lock:
+            upstream = {d: {**self.nodes[d].outputs, **self.nodes[d].values} for d in node.deps}
+            digests = {d: self.nodes[d].digest or "" for d in node.deps}
+        node_dir = self.node_dir(node.id)
+        # A node's directory only ever holds one run's results; cached files are hard links.
+        shutil.rmtree(node_dir, ignore_errors=True)
+        node_dir.mkdir(parents=True, exist_ok=True)
+        # A result computed from an in-memory value can never be looked up again
+        # (the producer's digest is unique to its run), so it is not cached.
+        volatile = any(d.startswith("volatile:") for d in digests.values())
+        key = self.cache.key(node, digests) if self.cache and not volatile else None
+        cached = bool(key and self.cache.restore(key, node_dir))
+        values: Dict[str, Any] = {}
+        if cached:
+            self.log(f"[{node.id}] reused cached result {key[:12]}")
+        else:
+            dirs = {nid: self.node_dir(nid) for nid in self.flow.nodes}
+            inputs = resolve_inputs(node.inputs, upstream, dirs)
+            result = self.run_node(node, inputs, node_dir, self._node_logger(node.id, node_dir), self.cancelled)
+            values = dict(result) if isinstance(result, dict) else {}
+            if key and not values:
+                self.cache.store(key, node_dir)
+        outputs = node_outputs(node, node_dir)
+        # In-memory values cannot be hashed cheaply or restored later: give this run its own digest.
+        digest = f"volatile:{uuid.uuid4().hex}" if values else outputs_digest(node_dir, outputs)
+        return outputs, digest, cached, values
+
+    def _checkpoint_loop(self) -> None:
+        while not self._done.is_set():
+            if self._dirty.wait(0.5):
+                self._dirty.clear()
+                try:
+                    self.checkpoint()
+                except OSError as e:
+                    self.log(f"flow checkpoint failed: {e}")
+
+    def _node_logger(self, node_id: str, node_dir: Path) -> Callable[[str], Any]:
+        """Log to the flow log and to <node dir>/node.log."""
+        path = node_dir / NODE_LOG
+
+        def log(msg: Any) -> None:
+            # Prefix every line so multi-line output (tool stdout) stays attributable.
+            for line in str(msg).splitlines() or [""]:
+                self.log(f"[{node_id}] {line}")
+            try:
+                with path.open("a", encoding="utf-8") as fh:
+                    fh.write(f"{msg}\n")
+            except OSError:
+                pass
+
+        return log
+
+    def _finish(self, node_id: str, fut: "Future[Tuple[Dict[str, Any], str, bool, Dict[str, Any]]]") -> None:
+        run = self.nodes[node_id]
+        try:
+            outputs, digest, cached, values = fut.result()
+        except JobCancelled:
+            self._set(run, "cancelled")
+            return
+        except Exception as e:
+            self._set(run, "failed", str(e) or type(e).__name__)
+            self.log(f"[{node_id}] FAILED: {run.error}")
+            for nid in self.flow.downstream(node_id):
+                if self.nodes[nid].status == "pending":
+                    self._set(self.nodes[nid], "skipped", f"upstream '{node_id}' failed")
+            return
+        with self._lock:
+            run.outputs, run.digest, run.cached = outputs, digest, cached
+            run.values, run.handoff = values, {name: describe(v) for name, v in values.items()}
+        if values:
+            self.log(f"[{node_id}] handed over in memory: " + ", ".join(f"{k} ({v})" for k, v in run.handoff.items()))
+        self._set(run, "completed")
+
+    def _release(self, node_id: str) -> None:
+        """Drop in-memory values nobody can consume any more (the node and its upstream)."""
+        for nid in [node_id, *self.flow.nodes[node_id].deps]:
+            run = self.nodes[nid]
+            if run.values and all(self.nodes[d].status in FINAL_STATES for d in self.flow.dependents[nid]):
+                with self._lock:
+                    run.values = {}
+
+    def run(self) -> Dict[str, Any]:
+        """Run the flow to completion; returns `summary()` (also written to <run dir>/flow.json)."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.started_at = time.time()
+        rank = self.flow.rank()
+        position = {nid: i for i, nid in enumerate(self.flow.order)}
+        todo = [nid for nid in self.flow.order if self.nodes[nid].status != "completed"]
+        waiting = {nid: sum(1 for d in self.flow.nodes[nid].deps if self.nodes[d].status != "completed")
+                   for nid in todo}
+        ready: List[str] = [nid for nid in todo if waiting[nid] == 0]
+        if self.resumed:
+            self.log(f"resuming: {len(self.resumed)} node(s) already complete, {len(todo)} to run")
+        self._done.clear()
+        writer = threading.Thread(target=self._checkpoint_loop, name=f"flow-{self.flow.id}-checkpoint", daemon=True)
+        writer.start()
+        try:
+            running: Dict[Future, str] = {}
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"flow-{self.flow.id}") as pool:
+                while ready or running:
+                    if self.cancelled():
+                        for nid in ready:
+                            self._set(self.nodes[nid], "cancelled")
+                        ready = []
+                    ready.sort(key=lambda nid: (-rank[nid], position[nid]))
+                    while ready and len(running) < self.workers:
+                        nid = ready.pop(0)
+                        self._set(self.nodes[nid], "running")
+                        running[pool.submit(self._execute, self.flow.nodes[nid])] = nid
+                    if not running:
+                        break
+                    done, _ = wait(list(running), timeout=0.5, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        nid = running.pop(fut)
+                        self._finish(nid, fut)
+                        self._release(nid)
+                        if self.nodes[nid].status != "completed":
+                            continue
+                        for child in self.flow.dependents[nid]:
+                            waiting[child] -= 1
+                            if waiting[child] == 0 and self.nodes[child].status == "pending":
+                                ready.append(child)
+            for run in self.nodes.values():
+                if run.status == "pending":  # downstream of a cancelled node
+                    self._set(run, "cancelled")
+        finally:
+            for run in self.nodes.values():
+                run.values = {}
+            self._done.set()
+            writer.join()
+        self.finished_at = time.time()
+        self.checkpoint()
+        return self.summary()
+
+
+def read_flow_state(run_dir: Path) -> Optional[Dict[str, Any]]:
+    """Checkpointed summary for status endpoints (without the resume bookkeeping)."""
+    try:
+        state = load_checkpoint(run_dir)
+    except (FileNotFoundError, ValueError):
+        return None
+    state.pop("doc", None)
+    for n in state.get("nodes") or []:
+        n.pop("spec", None)
+        n.pop("digest", None)
+    return state
+
+
+def load_checkpoint(run_dir: Path) -> Dict[str, Any]:
+    path = Path(run_dir) / STATE_FILE
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"no flow checkpoint in {run_dir}")
@@ -0,0 +1,182 @@
+"""
+Flow documents and their dependency graph.
+
+Two document shapes are accepted and normalized to the same nodes:
+
+    # schemas/flow.schema.json
+    {"id": "research", "nodes": [{"id": "audio", "ref": "audio-engine", "in": {...}, "out": {...}}]}
+
+    # profiles/*.yaml
+    version: 1
+    steps:
+      - {id: audio, op: audio-engine, in: {...}, out: {}}
+
+Edges come from the data: an input value containing `${<node>.<output>}`
+depends on that node, and resolves to the output once it has run (a value that
+is exactly one reference is replaced by the output itself, otherwise the
+reference is interpolated as text). `${<node>}` alone refers to the node's
+run directory. `after: [<node>, ...]` adds ordering-only edges.
+
+A node's outputs are the artifacts it emitted (by name, as absolute paths),
+overlaid with its `out` mapping: each entry names an artifact or a path
+relative to the node's directory.
+"""
+from __future__ import annotations
+import hashlib, json, re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from services.sdk_py.manifest import ArtifactManifest
+
+REF_RE = re.compile(r"\$\{([A-Za-z0-9_\-]+)(?:\.([A-Za-z0-9_\-./]+))?\}")
+
+
+class FlowError(ValueError):
+    """Malformed flow document (unknown reference, duplicate id, cycle)."""
+
+
+@dataclass
+class Node:
+    id: str
+    ref: str
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    out: Dict[str, Any] = field(default_factory=dict)
+    after: List[str] = field(default_factory=list)
+    cache: bool = True
+    deps: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class Flow:
+    id: str
+    nodes: Dict[str, Node]
+    order: List[str]  # topological, stable with respect to document order
+    dependents: Dict[str, List[str]]
+    doc: Dict[str, Any] = field(default_factory=dict)  # source document, kept for checkpoints
+
+    def rank(self) -> Dict[str, int]:
+        """Length of the longest chain from each node to a sink; higher runs first."""
+        rank: Dict[str, int] = {}
+        for nid in reversed(self.order):
+            rank[nid] = 1 + max((rank[d] for d in self.dependents[nid]), default=0)
+        return rank
+
+    def downstream(self, node_id: str) -> List[str]:
+        seen: List[str] = []
+        stack = list(self.dependents[node_id])
+        while stack:
+            nid = stack.pop()
+            if nid not in seen:
+                seen.append(nid)
+                stack.extend(self.dependents[nid])
+        return seen
+
+
+def references(value: Any) -> Set[str]:
+    """Node ids referenced anywhere inside an input value."""
+    if isinstance(value, str):
+        return {m.group(1) for m in REF_RE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(references(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(references(v) for v in value)) if value else set()
+    return set()
+
+
+def parse_flow(doc: Dict[str, Any], default_id: str = "flow") -> Flow:
+    if not isinstance(doc, dict):
+        raise FlowError("flow document must be a mapping")
+    raw = doc.get("nodes")
+    key = "ref"
+    if raw is None:
+        raw, key = doc.get("steps") or [], "op"
+    if not isinstance(raw, list):
+        raise FlowError("'nodes' must be a list")
+    nodes: Dict[str, Node] = {}
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise FlowError(f"node #{i} must be a mapping")
+        ref = item.get(key) or item.get("ref") or item.get("op")
+        nid = str(item.get("id") or ref or f"node{i}")
+        if not ref:
+            raise FlowError(f"node '{nid}' has no '{key}'")
+        if nid in nodes:
+            raise FlowError(f"duplicate node id '{nid}'")
+        after = item.get("after") or []
+        nodes[nid] = Node(nid, str(ref), dict(item.get("in") or {}), dict(item.get("out") or {}),
+                          [after] if isinstance(after, str) else [str(a) for a in after],
+                          bool(item.get("cache", True)))
+    for node in nodes.values():
+        node.deps = references(node.inputs) | set(node.after)
+        unknown = sorted(d for d in node.deps if d not in nodes)
+        if unknown:
+            raise FlowError(f"node '{node.id}' references unknown node(s): {', '.join(unknown)}")
+        if node.id in node.deps:
+            raise FlowError(f"node '{node.id}' depends on itself")
+    dependents: Dict[str, List[str]] = {nid: [] for nid in nodes}
+    for node in nodes.values():
+        for d in node.deps:
+            dependents[d].append(node.id)
+    return Flow(str(doc.get("id") or default_id), nodes, _toposort(nodes), dependents, doc)
+
+
+def node_spec(node: Node) -> str:
+    """Hash of a node's definition; a checkpointed result is only kept while it matches."""
+    payload = json.dumps({"ref": node.ref, "in": node.inputs, "out": node.out, "after": sorted(node.after)},
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _toposort(nodes: Dict[str, Node]) -> List[str]:
+    indeg = {nid: len(n.deps) for nid, n in nodes.items()}
+    order: List[str] = []
+    ready = [nid for nid in nodes if indeg[nid] == 0]
+    while ready:
+        nid = ready.pop(0)
+        order.append(nid)
+        for other in nodes.values():
+            if nid in other.deps:
+                indeg[other.id] -= 1
+                if indeg[other.id] == 0:
+                    ready.append(other.id)
+    if len(order) != len(nodes):
+        stuck = sorted(nid for nid in nodes if nid not in order)
+        raise FlowError(f"dependency cycle between nodes: {', '.join(stuck)}")
+    return order
+
+
+def node_outputs(node: Node, node_dir: Path) -> Dict[str, Any]:
+    outputs: Dict[str, Any] = {}
+    for row in ArtifactManifest(node_dir).refresh():
+        outputs[row["name"]] = str(node_dir / row["relpath"])
+    for name, spec in node.out.items():
+        if isinstance(spec, str):
+            outputs[name] = outputs.get(spec) or str(node_dir / spec)
+        elif spec not in (None, {}):
+            outputs[name] = spec
+    return outputs
+
+
+def resolve_inputs(value: Any, outputs: Dict[str, Dict[str, Any]], dirs: Dict[str, Path]) -> Any:
+    """Substitute `${node.output}` references with upstream outputs."""
+    if isinstance(value, dict):
+        return {k: resolve_inputs(v, outputs, dirs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_inputs(v, outputs, dirs) for v in value]
+    if not isinstance(value, str) or "${" not in value:
+        return value
+
+    def lookup(m: "re.Match[str]") -> Any:
+        nid, name = m.group(1), m.group(2)
+        if not name:
+            return str(dirs[nid])
+        produced = outputs.get(nid) or {}
+        if name not in produced:
+            raise FlowError(f"node '{nid}' produced no output '{name}' (has: {', '.join(sorted(produced)) or 'none'})")
+        return produced[name]
+
+    whole = REF_RE.fullmatch(value)
+    if whole:
+        return lookup(whole)
+    return REF_RE.sub(lambda m: str(lookup(m)), value)
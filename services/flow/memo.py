@@ -0,0 +1,119 @@
+"""
+Step-level memoization for flows.
+
+A node's cache key hashes its experiment id, the experiment's code version
+(manifest version plus `py/` sources, as for server jobs), its inputs as
+written in the flow (local files by content) and the output digests of the
+nodes it depends on. Because upstream nodes are keyed by what they actually
+produced, editing one node re-runs it and whatever is downstream of it while
+everything upstream is restored from the cache, like a build system.
+
+Entries live in `runs/_cache/flow/<key>/` as a hard-linked copy of the node's
+run directory, so `RunsGC` ages and budgets them with the rest of `_cache`.
+Experiments opt out with `"cache": false` in their manifest, single nodes with
+`cache: false` in the flow.
+"""
+from __future__ import annotations
+import hashlib, json, os, shutil, threading, uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from services.jobs.cache import cacheable, code_version, file_digest, fingerprint
+from services.sdk_py.loader import EXPERIMENTS
+from services.sdk_py.manifest import ArtifactManifest
+
+from .graph import Node
+
+
+def link_tree(src: Path, dst: Path) -> int:
+    """Hard-link (or copy) every file under `src` into `dst`, following symlinks."""
+    n = 0
+    for base, _dirs, files in os.walk(src):
+        rel = Path(base).relative_to(src)
+        for name in files:
+            origin = (Path(base) / name).resolve()
+            if not origin.is_file():
+                continue
+            target = dst / rel / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(origin, target)
+            except OSError:
+                shutil.copy2(origin, target)
+            n += 1
+    return n
+
+
+def outputs_digest(node_dir: Path, outputs: Dict[str, Any]) -> str:
+    """Content digest of a node's outputs (artifact hashes come from its manifest)."""
+    known = {str(node_dir / r["relpath"]): r.get("sha256") for r in ArtifactManifest(node_dir).refresh()}
+    parts: Dict[str, Any] = {}
+    for name, value in sorted(outputs.items()):
+        if isinstance(value, str) and value in known and known[value]:
+            parts[name] = known[value]
+        elif isinstance(value, str) and os.path.isfile(value):
+            parts[name] = file_digest(Path(value))
+        else:
+            parts[name] = value
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StepCache:
+    def __init__(self, root: Path, exp_root: Optional[Path] = None):
+        self.root = Path(root)
+        self.exp_root = Path(exp_root) if exp_root else EXPERIMENTS.root
+        self._versions: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, ref: str) -> Optional[str]:
+        """Code version per experiment, computed once per cache; None if the experiment opts out."""
+        with self._lock:
+            if ref in self._versions:
+                return self._versions[ref]
+        exp_dir = self.exp_root / ref
+        try:
+            manifest = json.loads((exp_dir / "manifest.json").read_text(encoding="utf-8"))
+        except Exception:
+            manifest = {}
+        version = code_version(exp_dir, manifest) if cacheable(manifest) else None
+        with self._lock:
+            self._versions[ref] = version
+        return version
+
+    def key(self, node: Node, upstream: Dict[str, str]) -> Optional[str]:
+        if not node.cache:
+            return None
+        version = self._version(node.ref)
+        if version is None:
+            return None
+        return fingerprint(node.ref, version, {"in": node.inputs, "out": node.out,
+                                               "upstream": {d: upstream.get(d) for d in sorted(node.deps)}})
+
+    def restore(self, key: str, node_dir: Path) -> bool:
+        entry = self.root / key
+        if not entry.is_dir():
+            self.misses += 1
+            return False
+        link_tree(entry, node_dir)
+        try:
+            os.utime(entry)  # mark as recently used for RunsGC
+        except OSError:
+            pass
+        self.hits += 1
+        return True
+
+    def store(self, key: str, node_dir: Path) -> None:
+        entry = self.root / key
+        if entry.exists():
+            return
+        tmp = self.root / f".{key}.{uuid.uuid4().hex[:8]}"
+        tmp.mkdir(parents=True)
+        link_tree(node_dir, tmp)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another run stored the same step first.
+            shutil.rmtree(tmp, ignore_errors=True)
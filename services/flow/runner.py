@@ -1,32 +1,55 @@
 from __future__ import annotations
-import sys, yaml, uuid, importlib.util
+import argparse, json, sys, uuid
 from pathlib import Path
-from services.sdk_py.base import RunContext
+import yaml
+from services.flow.executor import FlowExecutor
+from services.flow.graph import FlowError, parse_flow
+from services.flow.memo import StepCache
 
 RUNS = Path("runs")
 
 
-def load_exp(exp_id:str):
-    py = Path(f"experiments/{exp_id}/py/main.py")
-    spec = importlib.util.spec_from_file_location(f"exp_{exp_id}", py)
-    mod = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(mod)  # type: ignore
-    return getattr(mod, "EXP")
+def load_flow_doc(path: Path) -> dict:
+    text = path.read_text(encoding="utf-8")
+    return json.loads(text) if path.suffix == ".json" else (yaml.safe_load(text) or {})
 
 
-def main(profile_path:str):
-    prof = yaml.safe_load(Path(profile_path).read_text(encoding="utf-8"))
-    job = RUNS / (Path(profile_path).stem + "_" + uuid.uuid4().hex[:8])
-    job.mkdir(parents=True, exist_ok=True)
-    for step in prof.get("steps", []):
-        EXP = load_exp(step["op"])  # type: ignore
-        ctx = RunContext(job, step.get("in", {}), logger=lambda m: print(f"[{step['op']}] {m}"))
-        exp = EXP()  # type: ignore
-        exp.validate(ctx)
-        exp.run(ctx)
-    print("DONE:", job)
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run a flow document or profile; independent nodes run in parallel.")
+    ap.add_argument("profile", nargs="?", help="profile .yml/.yaml (steps) or flow .json (nodes)")
+    ap.add_argument("--resume", metavar="RUN_DIR", help="continue a failed/interrupted run in RUN_DIR; "
+                    "with a profile, steps edited since are re-run")
+    ap.add_argument("--no-cache", action="store_true", help="run every node instead of reusing cached step results")
+    ap.add_argument("--workers", type=int, default=None, help="parallel nodes (default TRK_FLOW_WORKERS or half the cores)")
+    args = ap.parse_args(argv)
+    if not args.profile and not args.resume:
+        ap.error("a profile or --resume RUN_DIR is required")
+    flow = None
+    try:
+        if args.profile:
+            path = Path(args.profile)
+            flow = parse_flow(load_flow_doc(path), default_id=path.stem)
+    except FlowError as e:
+        print(f"invalid flow: {e}", file=sys.stderr)
+        return 2
+    cache = None if args.no_cache else StepCache(RUNS / "_cache" / "flow")
+    opts = dict(workers=args.workers, cache=cache,
+                on_event=lambda n: print(f"[{n.id}] {n.status}" + (" (cached)" if n.cached else "")
+                                         + (f": {n.error}" if n.error else "")))
+    if args.resume:
+        run_dir = Path(args.resume)
+        try:
+            ex = FlowExecutor.resume(run_dir, flow, **opts)
+        except (FileNotFoundError, FlowError) as e:
+            print(f"cannot resume: {e}", file=sys.stderr)
+            return 2
+    else:
+        run_dir = RUNS / (path.stem + "_" + uuid.uuid4().hex[:8])
+        ex = FlowExecutor(flow, run_dir, **opts)
+    summary = ex.run()
+    print(("DONE:" if summary["status"] == "completed" else summary["status"].upper() + ":"), run_dir)
+    return 0 if summary["status"] == "completed" else 1
 
 
 if __name__ == "__main__":
-    main(sys.argv[1])
+    sys.exit(main())
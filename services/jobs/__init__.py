@@ -0,0 +1,42 @@
+from .scheduler import (
+    JobScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    PRIORITY_BATCH,
+    parse_priority,
+    default_workers,
+)
+from .store import JobStore
+from .logbus import LogBus, tail_file
+from .cache import cacheable, code_version, fingerprint
+from .runs import RunsGC, shard_dir
+from .procpool import ProcessPool, execution_mode
+from .batch import Batch
+from .deps import dependency_error, release_after
+from .resources import ResourceClass, ResourceBudget, RESOURCE_CLASSES, DEFAULT_RESOURCES
+
+__all__ = [
+    "JobScheduler",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_NORMAL",
+    "PRIORITY_BATCH",
+    "parse_priority",
+    "default_workers",
+    "JobStore",
+    "LogBus",
+    "tail_file",
+    "cacheable",
+    "code_version",
+    "fingerprint",
+    "RunsGC",
+    "shard_dir",
+    "ProcessPool",
+    "execution_mode",
+    "ResourceClass",
+    "ResourceBudget",
+    "RESOURCE_CLASSES",
+    "DEFAULT_RESOURCES",
+    "Batch",
+    "dependency_error",
+    "release_after",
+]
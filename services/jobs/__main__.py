@@ -0,0 +1,40 @@
+"""Command line entry points: `python -m services.jobs gc [--days N] [--budget-gb G] [--dry-run]`."""
+from __future__ import annotations
+import argparse, os, sys
+from pathlib import Path
+from typing import List, Optional
+
+from .runs import RunsGC
+from .store import JobStore
+
+
+def _gc(args: argparse.Namespace) -> int:
+    root = Path(args.root)
+    db = Path(os.environ.get("TRK_JOBS_DB") or (root / "jobs.db"))
+    store = JobStore(db) if db.exists() else None
+    gc = RunsGC(root, store,
+                budget_bytes=None if args.budget_gb is None else args.budget_gb * (1 << 30),
+                max_age_sec=None if args.days is None else args.days * 86400)
+    rep = gc.collect(dry_run=args.dry_run)
+    for rel in rep["removed"]:
+        print(("would remove " if args.dry_run else "removed ") + rel)
+    print(f"{len(rep['removed'])} entries, {rep['freedBytes'] / (1 << 20):.1f} MiB freed; "
+          f"{rep['totalBytes'] / (1 << 20):.1f} MiB remain")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m services.jobs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    gc = sub.add_parser("gc", help="apply retention to the runs/ directory")
+    gc.add_argument("--root", default=str(Path(__file__).resolve().parents[2] / "runs"))
+    gc.add_argument("--days", type=float, default=None, help="remove entries unused for this many days")
+    gc.add_argument("--budget-gb", type=float, default=None, help="then evict least recently used down to this size")
+    gc.add_argument("--dry-run", action="store_true")
+    gc.set_defaults(func=_gc)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
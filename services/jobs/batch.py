@@ -0,0 +1,82 @@
+"""
+Batches: one experiment fanned out over many input sets.
+
+A `Batch` aggregates the progress of its jobs (counts per status) and keeps a
+`LogBus` with one JSON line per finished item, in completion order, that the
+stream endpoint follows. It only needs a `get_job(id)` lookup returning job
+objects with `id`, `status`, `error` and `on_done(cb)` (None for unknown ids).
+"""
+from __future__ import annotations
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .logbus import LogBus
+
+FINAL_STATES = ("completed", "failed", "cancelled")
+
+
+class Batch:
+    def __init__(self, batch_id: str, exp_id: str, job_ids: List[str], get_job: Callable[[str], Any],
+                 created_at: Optional[float] = None, on_finished: Optional[Callable[["Batch"], Any]] = None):
+        self.id = batch_id
+        self.exp_id = exp_id
+        self.job_ids = list(job_ids)
+        self.created_at = created_at or time.time()
+        self.events = LogBus(capacity=len(self.job_ids) + 1)
+        self._get_job = get_job
+        self._on_finished = on_finished
+        self._finished = 0
+        self._lock = threading.Lock()
+
+    def attach(self, jobs: List[Any]) -> "Batch":
+        """Follow the batch's jobs (in `job_ids` order); finished ones report at once."""
+        for index, job in enumerate(jobs):
+            job.on_done(lambda j, index=index: self._item_done(index, j))
+        return self
+
+    def _item_done(self, index: int, job: Any) -> None:
+        with self._lock:
+            self._finished += 1
+            event: Dict[str, Any] = {"index": index, "jobId": job.id, "status": job.status,
+                                     "finished": self._finished, "total": len(self.job_ids)}
+            if job.error:
+                event["error"] = job.error
+            self.events.append(json.dumps(event))
+            last = self._finished >= len(self.job_ids)
+            if last:
+                self.events.close()
+        if last and self._on_finished:
+            self._on_finished(self)
+
+    def summary(self, items: bool = False) -> Dict[str, Any]:
+        jobs = [self._get_job(i) for i in self.job_ids]
+        counts: Dict[str, int] = {}
+        for j in jobs:
+            st = j.status if j else "unknown"
+            counts[st] = counts.get(st, 0) + 1
+        total = len(self.job_ids)
+        finished = sum(counts.get(st, 0) for st in FINAL_STATES)
+        out: Dict[str, Any] = {
+            "batchId": self.id, "expId": self.exp_id, "total": total, "counts": counts,
+            "finished": finished, "progress": round(finished / total, 4) if total else 1.0,
+            "done": finished >= total, "createdAt": self.created_at,
+        }
+        if items:
+            out["items"] = [{"index": i, "jobId": jid, "status": j.status if j else "unknown"}
+                            for i, (jid, j) in enumerate(zip(self.job_ids, jobs))]
+        return out
+
+    async def sse(self, offset: int = 0, heartbeat: Optional[float] = 15.0) -> AsyncIterator[str]:
+        """Server-sent events: one `data:` per finished item from `offset`, then the summary."""
+        async for off, line in self.events.follow(offset, heartbeat=heartbeat):
+            if line is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {off}\ndata: {line}\n\n"
+        yield f"event: done\ndata: {json.dumps(self.summary())}\n\n"
+
+    def cancel(self, cancel_job: Callable[[str], bool]) -> int:
+        """Cancel every job of the batch that is not finished; returns how many were."""
+        return sum(1 for jid in self.job_ids if cancel_job(jid))
@@ -0,0 +1,114 @@
+"""
+Content-addressed fingerprints for experiment results.
+
+A job's fingerprint hashes the experiment id, its code version (manifest
+version plus the experiment's sources) and its inputs, with every input
+that names a local file (plain path or file:// URI) replaced by a digest of the
+file's contents. Two submissions with the same fingerprint produce the same
+artifacts, so the server can hand back a completed job's results instead of
+re-running the pipeline. File digests are memoized by (path, size, mtime) so a
+multi-gigabyte recording is only read once per process; the memo keeps the
+DIGEST_MEMO_MAX most recently used files.
+
+An experiment's sources default to `py/**/*.py`. Experiments whose work happens
+elsewhere in their directory (e.g. audio-engine shelling out to
+audio-automation) list glob patterns relative to it in the manifest's
+`"sources"`, so edits there change the fingerprint too.
+"""
+from __future__ import annotations
+import hashlib, json, os, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+DEFAULT_SOURCES = ("py/**/*.py",)
+DIGEST_MEMO_MAX = 4096
+
+_DIGESTS: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_DIGEST_LOCK = threading.Lock()
+
+
+def file_digest(path: Path, chunk: int = 1 << 20) -> str:
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    with _DIGEST_LOCK:
+        hit = _DIGESTS.get(key)
+        if hit:
+            _DIGESTS.move_to_end(key)
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _DIGEST_LOCK:
+        _DIGESTS[key] = digest
+        while len(_DIGESTS) > DIGEST_MEMO_MAX:
+            _DIGESTS.popitem(last=False)
+    return digest
+
+
+def _local_path(value: str) -> Optional[Path]:
+    if value.startswith("file:"):
+        path = unquote(urlparse(value).path)
+        if os.name == "nt" and path.startswith("/") and len(path) > 2 and path[2] == ":":
+            path = path[1:]
+        p = Path(path)
+    elif len(value) < 1024 and ("/" in value or "\\" in value):
+        p = Path(value)
+    else:
+        return None
+    try:
+        return p if p.is_file() else None
+    except OSError:
+        return None
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, str):
+        p = _local_path(value)
+        if p is not None:
+            return {"$file": file_digest(p)}
+    return value
+
+
+def source_files(exp_dir: Path, manifest: Optional[Dict[str, Any]] = None) -> List[Path]:
+    """Files matching the manifest's `sources` globs (default `py/**/*.py`) inside `exp_dir`."""
+    root = Path(exp_dir)
+    patterns = (manifest or {}).get("sources") or DEFAULT_SOURCES
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    base = root.resolve()
+    files = set()
+    for pattern in patterns:
+        for p in root.glob(str(pattern)):
+            if p.is_file() and "__pycache__" not in p.parts and p.resolve().is_relative_to(base):
+                files.add(p)
+    return sorted(files)
+
+
+def code_version(exp_dir: Path, manifest: Optional[Dict[str, Any]] = None) -> str:
+    """Manifest version plus a hash of the experiment's sources (see `source_files`)."""
+    h = hashlib.sha256(str((manifest or {}).get("version") or "").encode("utf-8"))
+    root = Path(exp_dir)
+    for src in source_files(root, manifest):
+        h.update(src.relative_to(root).as_posix().encode("utf-8"))
+        h.update(src.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def fingerprint(exp_id: str, version: str, inputs: Dict[str, Any]) -> str:
+    payload = json.dumps({"exp": exp_id, "code": version, "inputs": _canonical(inputs or {})},
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cacheable(manifest: Optional[Dict[str, Any]]) -> bool:
+    """Experiments opt out with `"cache": false` (e.g. non-deterministic or side-effecting ones)."""
+    return bool((manifest or {}).get("cache", True))
@@ -0,0 +1,53 @@
+"""
+Job dependencies (`?after=`): hold a job until the jobs it depends on have finished.
+
+Works on any job object with `id`, `status`, `cancelled()` and `on_done(cb)`,
+where `on_done` calls `cb(job)` once the job reaches a final state, right away
+if it already has.
+"""
+from __future__ import annotations
+import threading
+from typing import Any, Callable, List, Optional
+
+
+def dependency_error(deps: List[Any], require_success: bool = True) -> Optional[str]:
+    """Why a job cannot run after `deps` (None if it can)."""
+    if not require_success:
+        return None
+    bad = [d for d in deps if d.status != "completed"]
+    return f"dependency {bad[0].id} {bad[0].status}" if bad else None
+
+
+def release_after(job: Any, deps: List[Any], submit: Callable[[Any], Any],
+                  fail: Callable[[Any, str], Any], require_success: bool = True) -> None:
+    """Call `submit(job)` once every job in `deps` has finished.
+
+    If `require_success` and a dependency did not complete, `fail(job, error)`
+    is called instead. A job cancelled while waiting is left alone. Without
+    dependencies (or when all have finished already) this happens right away,
+    on the calling thread; otherwise on the thread finishing the last one.
+    """
+    def release() -> None:
+        if job.cancelled():
+            return
+        error = dependency_error(deps, require_success)
+        if error:
+            fail(job, error)
+        else:
+            submit(job)
+
+    if not deps:
+        release()
+        return
+    remaining = [len(deps)]
+    lock = threading.Lock()
+
+    def dep_done(_dep: Any) -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        release()
+
+    for d in deps:
+        d.on_done(dep_done)
@@ -0,0 +1,204 @@
+"""
+Per-job broadcast log: a bounded in-memory tail backed by an append-only file.
+
+Writers (job worker threads) append lines; every line gets an absolute offset
+and is spilled to disk, while only the newest `capacity` lines stay in memory.
+Readers page through the log by offset (older lines are served from the file
+via a sparse offset→byte index, never by loading the whole file) or `follow()`
+it asynchronously. Followers are woken by the writer rather than polling, so an
+idle stream costs nothing, and because lines are never consumed every
+subscriber sees every line.
+
+`tail_file` reads the last lines of a plain log file (e.g. a flow node's
+node.log) by seeking backwards from its end.
+"""
+from __future__ import annotations
+import asyncio, os, threading
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional, Set, Tuple
+
+# Byte position of every INDEX_STRIDE-th line is kept to seek into the spill file.
+INDEX_STRIDE = 1024
+FOLLOW_PAGE = 1000
+TAIL_BLOCK = 64 * 1024
+
+
+def tail_file(path: Path, n: int, block: int = TAIL_BLOCK) -> List[str]:
+    """Last `n` lines of a text file, reading `block`-sized chunks backwards from EOF."""
+    if n <= 0:
+        return []
+    chunks: List[bytes] = []
+    newlines = 0
+    with Path(path).open("rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        # n + 1 newlines guarantee the first of the last n lines is complete.
+        while pos > 0 and newlines <= n:
+            step = min(block, pos)
+            pos -= step
+            fh.seek(pos)
+            chunk = fh.read(step)
+            newlines += chunk.count(b"\n")
+            chunks.append(chunk)
+    data = b"".join(reversed(chunks))
+    return data.decode("utf-8", errors="replace").splitlines()[-n:]
+
+
+class LogBus:
+    def __init__(self, capacity: int = 5000, path: Optional[Path] = None):
+        self._lines: "deque[str]" = deque(maxlen=max(1, capacity))
+        self._base = 0  # absolute offset of the oldest line kept in memory
+        self._next = 0  # absolute offset the next appended line will get
+        self._closed = False
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self.path = Path(path) if path else None
+        self._fh: Optional[BinaryIO] = None
+        self._bytes = 0
+        self._index: List[int] = []
+        if self.path and self.path.exists():
+            self._scan_existing()
+
+    def _scan_existing(self):
+        # Stream the file once to rebuild the index and the in-memory tail.
+        assert self.path
+        pos = 0
+        with self.path.open("rb") as fh:
+            for raw in fh:
+                if self._next % INDEX_STRIDE == 0:
+                    self._index.append(pos)
+                pos += len(raw)
+                if len(self._lines) == self._lines.maxlen:
+                    self._base += 1
+                self._lines.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+                self._next += 1
+        self._bytes = pos
+
+    @property
+    def next_offset(self) -> int:
+        return self._next
+
+    @property
+    def first_offset(self) -> int:
+        """Oldest offset readable: 0 when spilled to disk, else the in-memory base."""
+        return 0 if self.path else self._base
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def tail(self, n: Optional[int] = None) -> List[str]:
+        with self._lock:
+            lines = list(self._lines)
+        return lines if n is None else lines[-n:]
+
+    def _wake(self):
+        for loop, ev in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(ev.set)
+            except RuntimeError:
+                # Loop already closed; the subscriber is gone.
+                self._waiters.discard((loop, ev))
+
+    def _spill(self, line: str):
+        if self.path is None:
+            return
+        try:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = self.path.open("ab")
+            data = (line + "\n").encode("utf-8", errors="replace")
+            if self._next % INDEX_STRIDE == 0:
+                self._index.append(self._bytes)
+            self._fh.write(data)
+            self._bytes += len(data)
+        except Exception as e:
+            print("log spill failed", self.path, e)
+            self.path = None
+
+    def append(self, text: str) -> int:
+        """Append one message (split into lines); returns the offset of its first line."""
+        with self._lock:
+            first = self._next
+            for line in text.splitlines():
+                self._spill(line)
+                if len(self._lines) == self._lines.maxlen:
+                    self._base += 1
+                self._lines.append(line)
+                self._next += 1
+            if self._next != first:
+                self._wake()
+        return first
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except Exception:
+                    pass
+                self._fh = None
+            self._wake()
+
+    def _read_disk(self, start: int, end: int) -> List[Tuple[int, str]]:
+        assert self.path
+        if self._fh is not None:
+            self._fh.flush()
+        k = min(start // INDEX_STRIDE, len(self._index) - 1)
+        i = k * INDEX_STRIDE
+        rows: List[Tuple[int, str]] = []
+        with self.path.open("rb") as fh:
+            fh.seek(self._index[k])
+            for raw in fh:
+                if i >= end:
+                    break
+                if i >= start:
+                    rows.append((i, raw.decode("utf-8", errors="replace").rstrip("\r\n")))
+                i += 1
+        return rows
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Tuple[int, str]], int]:
+        """Lines from `offset` (clamped to `first_offset`) and the next offset to read."""
+        with self._lock:
+            start = max(offset, 0 if self.path else self._base)
+            end = self._next if limit is None else min(self._next, start + max(0, limit))
+            end = max(start, end)  # a reader ahead of the writer keeps its position
+            rows: List[Tuple[int, str]] = []
+            i = start
+            if i < self._base and self._index:
+                disk_end = min(end, self._base)
+                rows.extend(self._read_disk(i, disk_end))
+                i = disk_end
+            i = max(i, self._base)
+            rows.extend((j, self._lines[j - self._base]) for j in range(i, end))
+        return rows, end
+
+    async def follow(self, offset: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """Yield (offset, line) from `offset` until the log is closed and drained.
+
+        With `heartbeat`, yields (offset, None) after that many idle seconds so
+        callers can keep proxies from timing out the connection.
+        """
+        loop = asyncio.get_running_loop()
+        ev = asyncio.Event()
+        key = (loop, ev)
+        with self._lock:
+            self._waiters.add(key)
+        try:
+            while True:
+                ev.clear()
+                rows, offset = self.read(offset, FOLLOW_PAGE)
+                for row in rows:
+                    yield row
+                if rows:
+                    continue
+                if self._closed and offset >= self._next:
+                    return
+                try:
+                    await asyncio.wait_for(ev.wait(), heartbeat) if heartbeat else await ev.wait()
+                except asyncio.TimeoutError:
+                    yield (offset, None)
+        finally:
+            with self._lock:
+                self._waiters.discard(key)
@@ -0,0 +1,161 @@
+"""
+Process-pool execution for experiments that declare `"execution": "process"`.
+
+CPU-bound experiments run in a managed pool of spawned worker processes so
+they do not contend with the API for the GIL. The caller's thread stays in
+charge of the job: it forwards log lines and artifact events from the child,
+and propagates cancellation to the child's `RunContext.cancelled()`.
+
+A worker that dies (segfault, OOM kill) breaks the whole ProcessPoolExecutor,
+so every job in flight on it fails with BrokenProcessPool, not just the one
+that crashed. The pool is replaced and those jobs are run once more in the new
+one (unless `retry=False`); a job that crashes that one too fails.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import os, queue, threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from services.sdk_py.base import RunContext
+from services.sdk_py.loader import ExperimentLoader
+from services.sdk_py.usage import ThreadMeter
+
+EXECUTION_MODES = ("thread", "process")
+
+
+def default_processes() -> int:
+    """Pool size from TRK_JOB_PROCESSES, else half the cores (at least 1)."""
+    try:
+        n = int(os.environ.get("TRK_JOB_PROCESSES", "0"))
+    except Exception:
+        n = 0
+    return n if n > 0 else max(1, (os.cpu_count() or 2) // 2)
+
+
+def execution_mode(manifest: Optional[Dict[str, Any]]) -> str:
+    mode = str((manifest or {}).get("execution") or "thread").lower()
+    return mode if mode in EXECUTION_MODES else "thread"
+
+
+# Per worker process: repeat jobs reuse the already imported experiment module.
+_LOADERS: Dict[str, ExperimentLoader] = {}
+
+
+def _child_run(exp_root: str, exp_id: str, job_dir: str, inputs: Dict[str, Any], events, cancel_ev) -> Dict[str, Any]:
+    """Entry point inside the worker process; returns the resource usage of the run."""
+    meter = ThreadMeter().start()
+    loader = _LOADERS.get(exp_root)
+    if loader is None:
+        loader = _LOADERS[exp_root] = ExperimentLoader(Path(exp_root))
+    EXP = loader.load(exp_id)
+    ctx = RunContext(Path(job_dir), inputs, logger=lambda m: events.put(("log", str(m))),
+                     cancel_fn=cancel_ev.is_set)
+    emit_artifact, emit_json = ctx.emit_artifact, ctx.emit_json
+
+    def _artifact(name, path):
+        dst = emit_artifact(name, path)
+        events.put(("artifact", str(dst)))
+        return dst
+
+    def _json(name, data):
+        dst = emit_json(name, data)
+        events.put(("artifact", str(dst)))
+        return dst
+
+    ctx.emit_artifact, ctx.emit_json = _artifact, _json  # type: ignore[method-assign]
+    exp = EXP()
+    exp.validate(ctx)
+    exp.run(ctx)
+    return meter.stop()
+
+
+class ProcessPool:
+    """Lazily started process pool plus a manager for cross-process queues/events."""
+
+    def __init__(self, processes: Optional[int] = None, exp_root: Optional[Path] = None):
+        self.processes = max(1, int(processes or default_processes()))
+        self.exp_root = Path(exp_root) if exp_root else Path(__file__).resolve().parents[2] / "experiments"
+        self._ctx = mp.get_context("spawn")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._ctx.Manager()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=self._ctx)
+            return self._executor, self._manager
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Every job in flight sees the same crash; only the first one drops the
+        # pool, so later ones do not tear down the fresh pool it started.
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, exp_id: str, job_dir: Path, inputs: Dict[str, Any],
+            log: Callable[[str], Any] = print,
+            on_artifact: Optional[Callable[[str], Any]] = None,
+            cancelled: Optional[Callable[[], bool]] = None,
+            retry: bool = True) -> Any:
+        """Run an experiment in the pool, blocking the calling thread until it finishes.
+
+        Returns the worker's CPU/I/O usage for the run (see `ThreadMeter`). If
+        the pool breaks while the job runs, it is run again in a fresh pool
+        once when `retry` (pass False for experiments that are not idempotent).
+        """
+        attempts = 0
+        while True:
+            executor, manager = self._ensure()
+            events = manager.Queue()
+            cancel_ev = manager.Event()
+            try:
+                fut = executor.submit(_child_run, str(self.exp_root), exp_id, str(job_dir), inputs,
+                                      events, cancel_ev)
+            except BrokenProcessPool:
+                # Broken by another job before this one got in; it never ran.
+                self._replace_executor(executor)
+                continue
+            attempts += 1
+            try:
+                return self._wait(fut, events, cancel_ev, log, on_artifact, cancelled)
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                if not retry or attempts > 1 or (cancelled and cancelled()):
+                    raise RuntimeError("experiment worker process crashed")
+                log("experiment worker process crashed; running again in a fresh pool")
+
+    @staticmethod
+    def _wait(fut, events, cancel_ev, log, on_artifact, cancelled) -> Any:
+        def _drain(timeout: float) -> None:
+            try:
+                kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if kind == "log":
+                log(payload)
+            elif kind == "artifact" and on_artifact:
+                on_artifact(payload)
+
+        while not fut.done():
+            if cancelled and cancelled() and not cancel_ev.is_set():
+                cancel_ev.set()
+            _drain(0.25)
+        while not events.empty():
+            _drain(0)
+        return fut.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
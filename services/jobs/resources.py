@@ -0,0 +1,133 @@
+"""
+Resource classes and host budget used by the job scheduler for admission.
+
+Experiments declare a resource class in their manifest, either by name or as an
+object overriding a named preset:
+
+    "resources": "light"
+    "resources": {"class": "heavy", "maxConcurrent": 1, "cores": 4, "memoryMB": 6144}
+
+A queued job is only started when its experiment is below `maxConcurrent` and
+the host budget (cores / memory) has room for it.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ResourceClass:
+    name: str = "standard"
+    max_concurrent: int = 0  # per experiment; 0 = unlimited
+    cores: float = 1.0
+    memory_mb: int = 512
+
+    @classmethod
+    def from_manifest(cls, manifest: Optional[Dict[str, Any]]) -> "ResourceClass":
+        spec = (manifest or {}).get("resources")
+        if isinstance(spec, str):
+            return RESOURCE_CLASSES.get(spec, DEFAULT_RESOURCES)
+        if not isinstance(spec, dict):
+            return DEFAULT_RESOURCES
+        base = RESOURCE_CLASSES.get(str(spec.get("class") or ""), DEFAULT_RESOURCES)
+        try:
+            return replace(
+                base,
+                max_concurrent=int(spec.get("maxConcurrent", base.max_concurrent)),
+                cores=float(spec.get("cores", base.cores)),
+                memory_mb=int(spec.get("memoryMB", base.memory_mb)),
+            )
+        except Exception:
+            return base
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"class": self.name, "maxConcurrent": self.max_concurrent, "cores": self.cores, "memoryMB": self.memory_mb}
+
+
+RESOURCE_CLASSES: Dict[str, ResourceClass] = {
+    "light": ResourceClass("light", 0, 0.25, 64),
+    "standard": ResourceClass("standard", 0, 1.0, 512),
+    "heavy": ResourceClass("heavy", 1, 4.0, 6144),
+}
+DEFAULT_RESOURCES = RESOURCE_CLASSES["standard"]
+
+
+def _env_number(name: str) -> float:
+    try:
+        return float(os.environ.get(name, "0"))
+    except Exception:
+        return 0.0
+
+
+def default_cores() -> float:
+    """Core budget from TRK_JOB_CORES, else the machine's CPU count."""
+    return _env_number("TRK_JOB_CORES") or float(os.cpu_count() or 1)
+
+
+def default_memory_mb() -> int:
+    """Memory budget from TRK_JOB_MEMORY_MB, else 80% of physical RAM (0 = unlimited)."""
+    env = int(_env_number("TRK_JOB_MEMORY_MB"))
+    if env > 0:
+        return env
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        return int(total * 0.8 / (1024 * 1024))
+    except Exception:
+        return 0
+
+
+class ResourceBudget:
+    """Tracks cores/memory in use and running instances per key (experiment id).
+
+    Not thread-safe on its own; the scheduler calls it under its lock.
+    """
+
+    def __init__(self, cores: Optional[float] = None, memory_mb: Optional[int] = None):
+        self.cores = float(cores if cores is not None else default_cores())
+        self.memory_mb = int(memory_mb if memory_mb is not None else default_memory_mb())
+        self._cores_used = 0.0
+        self._memory_used = 0
+        self._active = 0
+        self._by_key: Dict[str, int] = {}
+
+    def at_limit(self, key: str, rc: ResourceClass) -> bool:
+        """True when `key` already runs its `maxConcurrent` instances."""
+        return bool(rc.max_concurrent) and self._by_key.get(key, 0) >= rc.max_concurrent
+
+    def fits(self, key: str, rc: ResourceClass) -> bool:
+        if self.at_limit(key, rc):
+            return False
+        # A job larger than the whole budget may still run alone rather than starve.
+        if self._active == 0:
+            return True
+        if self.cores and self._cores_used + rc.cores > self.cores:
+            return False
+        if self.memory_mb and self._memory_used + rc.memory_mb > self.memory_mb:
+            return False
+        return True
+
+    def acquire(self, key: str, rc: ResourceClass) -> None:
+        self._cores_used += rc.cores
+        self._memory_used += rc.memory_mb
+        self._active += 1
+        self._by_key[key] = self._by_key.get(key, 0) + 1
+
+    def release(self, key: str, rc: ResourceClass) -> None:
+        self._cores_used = max(0.0, self._cores_used - rc.cores)
+        self._memory_used = max(0, self._memory_used - rc.memory_mb)
+        self._active = max(0, self._active - 1)
+        n = self._by_key.get(key, 0) - 1
+        if n > 0:
+            self._by_key[key] = n
+        else:
+            self._by_key.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "cores": self.cores,
+            "coresUsed": round(self._cores_used, 2),
+            "memoryMB": self.memory_mb,
+            "memoryUsedMB": self._memory_used,
+            "running": dict(self._by_key),
+        }
@@ -0,0 +1,250 @@
+"""
+Run directory layout and garbage collection for `runs/`.
+
+Job directories are sharded as `runs/jobs/<YYYY-MM-DD>/<id[:2]>/job_<id>` so no
+single directory grows to tens of thousands of entries. `RunsGC` enforces
+retention over job directories (sharded, legacy flat `runs/job_*` and other
+run folders such as flow runs) and over the scratch areas `_uploads` and
+`_cache`:
+
+1. anything unused for longer than `max_age_sec` is removed;
+2. if the total still exceeds `budget_bytes`, the least recently used entries
+   are removed until it fits.
+
+Active (pending/queued/running) and pinned jobs are never removed. Recordings
+under `_recordings` back drafts and songs, so they only expire by age and only
+when `recordings_max_age_sec` is set.
+
+Run as a one-off sweep with `python -m services.jobs gc --dry-run`.
+"""
+from __future__ import annotations
+import os, shutil, threading, time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .store import ACTIVE_STATES, JobStore
+
+JOBS_SUBDIR = "jobs"
+# Scratch areas and the depth at which their entries live (_cache/<kind>/<item>).
+SCRATCH_DIRS = {"_uploads": 1, "_cache": 2}
+RECORDINGS_DIR = "_recordings"
+
+
+def shard_dir(root: Path, job_id: str, created: Optional[float] = None) -> Path:
+    day = datetime.fromtimestamp(created or time.time()).strftime("%Y-%m-%d")
+    return Path(root) / JOBS_SUBDIR / day / job_id[:2] / f"job_{job_id}"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for base, _dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(base, f)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class _Entry:
+    __slots__ = ("path", "kind", "job_id", "size", "last_used", "keep", "budgeted")
+
+    def __init__(self, path: Path, kind: str, job_id: Optional[str], size: int, last_used: float,
+                 keep: bool = False, budgeted: bool = True):
+        self.path = path
+        self.kind = kind
+        self.job_id = job_id
+        self.size = size
+        self.last_used = last_used
+        self.keep = keep  # active or pinned: counted, never removed
+        self.budgeted = budgeted  # False: only age-based retention applies
+
+
+class RunsGC:
+    def __init__(self, root: Path, store: Optional[JobStore] = None,
+                 budget_bytes: Optional[float] = None, max_age_sec: Optional[float] = None,
+                 recordings_max_age_sec: Optional[float] = None, interval_sec: Optional[float] = None,
+                 log: Callable[[str], Any] = print):
+        self.root = Path(root)
+        self.store = store
+        self.budget_bytes = (budget_bytes if budget_bytes is not None
+                             else _env_float("TRK_RUNS_BUDGET_GB", 0) * (1 << 30))
+        self.max_age_sec = (max_age_sec if max_age_sec is not None
+                            else _env_float("TRK_RUNS_MAX_AGE_DAYS", 30) * 86400)
+        self.recordings_max_age_sec = (recordings_max_age_sec if recordings_max_age_sec is not None
+                                       else _env_float("TRK_RUNS_RECORDINGS_MAX_AGE_DAYS", 0) * 86400)
+        self.interval_sec = interval_sec if interval_sec is not None else _env_float("TRK_RUNS_GC_INTERVAL_SEC", 600)
+        self.log = log
+        # Finished job directories do not change, so their sizes are computed once.
+        self._sizes: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_report: Dict[str, Any] = {}
+
+    # ---- discovery -------------------------------------------------------
+
+    def _job_dirs(self) -> List[Path]:
+        out: List[Path] = []
+        jobs = self.root / JOBS_SUBDIR
+        if jobs.is_dir():
+            for day in jobs.iterdir():
+                if day.is_dir():
+                    for shard in day.iterdir():
+                        if shard.is_dir():
+                            out.extend(p for p in shard.iterdir() if p.is_dir())
+        if self.root.is_dir():
+            out.extend(p for p in self.root.iterdir()
+                       if p.is_dir() and not p.name.startswith(("_", ".")) and p.name != JOBS_SUBDIR)
+        return out
+
+    def _scratch(self, name: str, depth: int) -> List[Path]:
+        level = [self.root / name]
+        for _ in range(depth):
+            level = [c for p in level if p.is_dir() for c in p.iterdir()]
+        return level
+
+    def _size(self, path: Path, stable: bool) -> int:
+        if stable and path in self._sizes:
+            return self._sizes[path]
+        size = _tree_size(path)
+        if stable:
+            self._sizes[path] = size
+        return size
+
+    def scan(self) -> List[_Entry]:
+        index = self.store.gc_index() if self.store else {}
+        entries: List[_Entry] = []
+        for path in self._job_dirs():
+            job_id = path.name[4:] if path.name.startswith("job_") else None
+            row = index.get(job_id) if job_id else None
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            active = bool(row and row["status"] in ACTIVE_STATES)
+            pinned = bool(row and row["pinned"])
+            last_used = max(mtime, (row or {}).get("last_used") or 0)
+            entries.append(_Entry(path, "job", job_id, self._size(path, stable=bool(row) and not active),
+                                  last_used, keep=active or pinned))
+        for name, depth in SCRATCH_DIRS.items():
+            for path in self._scratch(name, depth):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append(_Entry(path, name, None, self._size(path, stable=False), max(st.st_mtime, st.st_atime)))
+        for path in self._scratch(RECORDINGS_DIR, 1):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append(_Entry(path, RECORDINGS_DIR, None, st.st_size if path.is_file() else self._size(path, False),
+                                  st.st_mtime, keep=not self.recordings_max_age_sec, budgeted=False))
+        return entries
+
+    # ---- collection ------------------------------------------------------
+
+    def _remove(self, e: _Entry, dry_run: bool) -> bool:
+        if dry_run:
+            return True
+        try:
+            if e.path.is_dir():
+                shutil.rmtree(e.path)
+            else:
+                e.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.log(f"runs gc: failed to remove {e.path}: {exc}")
+            return False
+        self._sizes.pop(e.path, None)
+        if e.job_id and self.store:
+            self.store.mark_evicted(e.job_id)
+        return True
+
+    def _prune_empty_shards(self):
+        jobs = self.root / JOBS_SUBDIR
+        if not jobs.is_dir():
+            return
+        for day in jobs.iterdir():
+            if not day.is_dir():
+                continue
+            try:
+                for shard in day.iterdir():
+                    if shard.is_dir() and not any(shard.iterdir()):
+                        shard.rmdir()
+                if not any(day.iterdir()):
+                    day.rmdir()
+            except OSError:
+                # A new job landed in the shard meanwhile; leave it for the next pass.
+                pass
+
+    def collect(self, dry_run: bool = False) -> Dict[str, Any]:
+        """One retention pass; returns a report of what was (or would be) removed."""
+        with self._lock:
+            t0 = time.perf_counter()
+            now = time.time()
+            entries = self.scan()
+            removed: List[_Entry] = []
+            kept: List[_Entry] = []
+            for e in entries:
+                limit = self.recordings_max_age_sec if e.kind == RECORDINGS_DIR else self.max_age_sec
+                if not e.keep and limit and now - e.last_used > limit and self._remove(e, dry_run):
+                    removed.append(e)
+                else:
+                    kept.append(e)
+            total = sum(e.size for e in kept)
+            if self.budget_bytes and total > self.budget_bytes:
+                for e in sorted((e for e in kept if not e.keep and e.budgeted), key=lambda e: e.last_used):
+                    if total <= self.budget_bytes:
+                        break
+                    if self._remove(e, dry_run):
+                        removed.append(e)
+                        total -= e.size
+            if not dry_run:
+                self._prune_empty_shards()
+            self.last_report = {
+                "at": now,
+                "dryRun": dry_run,
+                "scanned": len(entries),
+                "removed": [str(e.path.relative_to(self.root)) for e in removed],
+                "freedBytes": sum(e.size for e in removed),
+                "totalBytes": total,
+                "budgetBytes": int(self.budget_bytes),
+                "maxAgeDays": round(self.max_age_sec / 86400, 3),
+                "elapsedSec": round(time.perf_counter() - t0, 3),
+            }
+            return self.last_report
+
+    # ---- background loop -------------------------------------------------
+
+    def start(self):
+        if self._thread or self.interval_sec <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="trk-runs-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_sec):
+            try:
+                rep = self.collect()
+                if rep["removed"]:
+                    self.log(f"runs gc: removed {len(rep['removed'])} entries, freed {rep['freedBytes']} bytes")
+            except Exception as e:
+                self.log(f"runs gc failed: {e}")
@@ -0,0 +1,224 @@
+"""
+Bounded worker pool with a priority queue for background jobs.
+
+Jobs are submitted as plain callables and drained by a fixed number of worker
+threads, so a burst of submissions queues up instead of spawning a thread per
+job. Lower priority values run first; ties run in submission order. A job
+whose resource class does not fit the current budget (see resources.py) is
+skipped over so lighter jobs behind it keep flowing. Once such a job has waited
+longer than `reserve_after` seconds for host cores/memory, the capacity is
+reserved for it: nothing behind it starts until running jobs have freed enough
+for it to fit, so a steady stream of light jobs cannot starve a heavy one.
+"""
+from __future__ import annotations
+import heapq, itertools, os, threading, time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from .resources import DEFAULT_RESOURCES, ResourceBudget, ResourceClass
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+PRIORITIES = {
+    "interactive": PRIORITY_INTERACTIVE,
+    "normal": PRIORITY_NORMAL,
+    "batch": PRIORITY_BATCH,
+}
+
+
+def parse_priority(value: Any, default: int = PRIORITY_NORMAL) -> int:
+    """Accept a priority name ('interactive'|'normal'|'batch') or an int."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str) and value.lower() in PRIORITIES:
+        return PRIORITIES[value.lower()]
+    try:
+        return int(value)
+    except Exception:
+        return default
+
+
+def default_workers() -> int:
+    """Worker count from TRK_JOB_WORKERS, else half the cores (at least 1)."""
+    try:
+        n = int(os.environ.get("TRK_JOB_WORKERS", "0"))
+    except Exception:
+        n = 0
+    if n > 0:
+        return n
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def default_reserve_after() -> float:
+    """Seconds a blocked job waits before capacity is reserved for it (TRK_JOB_RESERVE_AFTER,
+    default 120; 0 disables reservation)."""
+    try:
+        return max(0.0, float(os.environ.get("TRK_JOB_RESERVE_AFTER", "120")))
+    except Exception:
+        return 120.0
+
+
+class _Entry:
+    __slots__ = ("job_id", "fn", "priority", "key", "resources", "enqueued_at")
+
+    def __init__(self, job_id: str, fn: Callable[[], Any], priority: int, key: str, resources: ResourceClass):
+        self.job_id = job_id
+        self.fn = fn
+        self.priority = priority
+        self.key = key
+        self.resources = resources
+        self.enqueued_at = time.time()
+
+
+class JobScheduler:
+    """Fixed-size pool of daemon workers draining a priority queue."""
+
+    def __init__(self, workers: Optional[int] = None, name: str = "trk-job", history: int = 256,
+                 budget: Optional[ResourceBudget] = None, reserve_after: Optional[float] = None):
+        self.workers = max(1, int(workers or default_workers()))
+        self.name = name
+        self.budget = budget or ResourceBudget()
+        self.reserve_after = default_reserve_after() if reserve_after is None else max(0.0, float(reserve_after))
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[str, float] = {}
+        self._waits: "deque[float]" = deque(maxlen=history)
+        self._submitted = 0
+        self._finished = 0
+        self._stopping = False
+
+    def _ensure_started(self):
+        # Workers are spawned lazily so importing the server does not start threads.
+        if self._threads:
+            return
+        for i in range(self.workers):
+            th = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def submit(self, job_id: str, fn: Callable[[], Any], priority: int = PRIORITY_NORMAL,
+               key: Optional[str] = None, resources: Optional[ResourceClass] = None) -> None:
+        self.submit_many([(job_id, fn, priority, key, resources)])
+
+    def submit_many(self, items: List[tuple]) -> None:
+        """Enqueue (job_id, fn, priority, key, resources) tuples under one lock, so
+        workers never observe a partially submitted batch."""
+        with self._cv:
+            if self._stopping:
+                raise RuntimeError("scheduler is shut down")
+            self._ensure_started()
+            for job_id, fn, priority, key, resources in items:
+                entry = _Entry(job_id, fn, int(priority), key or job_id, resources or DEFAULT_RESOURCES)
+                heapq.heappush(self._heap, (entry.priority, next(self._seq), entry))
+                self._submitted += 1
+            if len(items) == 1:
+                self._cv.notify()
+            else:
+                self._cv.notify_all()
+
+    def _take_admissible(self) -> Optional[_Entry]:
+        # Highest-priority entry whose resource class fits the budget right now. Entries
+        # skipped on the way are pushed back; an entry that has waited past reserve_after
+        # for host capacity (not its own maxConcurrent) stops the scan, holding the
+        # capacity for it.
+        now = time.time()
+        skipped: List[tuple] = []
+        taken: Optional[_Entry] = None
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            entry = item[2]
+            if self.budget.fits(entry.key, entry.resources):
+                taken = entry
+                break
+            skipped.append(item)
+            if (self.reserve_after and now - entry.enqueued_at >= self.reserve_after
+                    and not self.budget.at_limit(entry.key, entry.resources)):
+                break
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+        if taken is not None:
+            self.budget.acquire(taken.key, taken.resources)
+        return taken
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                entry = None
+                while not self._stopping:
+                    entry = self._take_admissible()
+                    if entry is not None:
+                        break
+                    self._cv.wait()
+                if entry is None:
+                    return
+                now = time.time()
+                self._waits.append(now - entry.enqueued_at)
+                self._running[entry.job_id] = now
+            try:
+                entry.fn()
+            except Exception as e:
+                # The callable owns its own error reporting; never let a worker die.
+                print(f"job {entry.job_id} raised in scheduler: {e}")
+            finally:
+                with self._cv:
+                    self._running.pop(entry.job_id, None)
+                    self._finished += 1
+                    self.budget.release(entry.key, entry.resources)
+                    # Freed budget may admit entries other idle workers skipped over.
+                    self._cv.notify_all()
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a job that has not started yet; False if it is running or unknown."""
+        with self._cv:
+            for item in self._heap:
+                if item[2].job_id == job_id:
+                    self._heap.remove(item)
+                    heapq.heapify(self._heap)
+                    return True
+        return False
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position in the queue, or None if the job is not queued."""
+        with self._cv:
+            order = sorted(self._heap)
+            for i, (_, _, entry) in enumerate(order):
+                if entry.job_id == job_id:
+                    return i + 1
+        return None
+
+    def depth_by_key(self) -> Dict[str, Dict[str, int]]:
+        """Queued and running job counts per key (experiment id)."""
+        with self._cv:
+            queued: Dict[str, int] = {}
+            for _, _, e in self._heap:
+                queued[e.key] = queued.get(e.key, 0) + 1
+            return {"queued": queued, "running": dict(self.budget.snapshot()["running"])}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            waits = list(self._waits)
+            now = time.time()
+            oldest = min((e.enqueued_at for _, _, e in self._heap), default=None)
+            return {
+                "workers": self.workers,
+                "queued": len(self._heap),
+                "running": len(self._running),
+                "submitted": self._submitted,
+                "finished": self._finished,
+                "oldestQueuedSec": round(now - oldest, 3) if oldest else 0.0,
+                "waitAvgSec": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "waitMaxSec": round(max(waits), 3) if waits else 0.0,
+                "budget": self.budget.snapshot(),
+            }
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        with self._cv:
+            self._stopping = True
+            self._cv.notify_all()
+        if wait:
+            for th in self._threads:
+                th.join(timeout)
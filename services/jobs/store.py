@@ -0,0 +1,221 @@
+"""
+SQLite persistence for job records so status survives server restarts.
+
+The store keeps one row per job (state, inputs, dependencies, timestamps,
+artifact manifest, log offset, result-cache fingerprint and resource usage).
+The in-memory Job objects remain the live source of truth while the process
+runs; the server writes through on every state transition and rehydrates
+rows on lookup after a restart.
+"""
+from __future__ import annotations
+import json, sqlite3, threading, time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.metrics import connect_sqlite
+
+ACTIVE_STATES = ("pending", "queued", "running")
+
+_COLUMNS = (
+    "id", "exp_id", "kind", "status", "priority", "inputs_json", "dir",
+    "created_at", "started_at", "finished_at", "artifacts_json", "log_offset",
+    "error", "updated_at", "after_json", "fingerprint", "cached_from", "batch_id", "usage_json",
+)
+
+# Columns added after the first release, migrated in place on open.
+_ADDED_COLUMNS = {
+    "after_json": "TEXT",
+    "fingerprint": "TEXT",
+    "cached_from": "TEXT",
+    "cache_used_at": "REAL",
+    "pinned": "INTEGER DEFAULT 0",
+    "evicted_at": "REAL",
+    "batch_id": "TEXT",
+    "usage_json": "TEXT",
+}
+
+
+class JobStore:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # One long-lived connection shared under the lock: closing the last
+        # connection to a WAL database checkpoints and fsyncs, which made every
+        # job state transition cost tens of milliseconds.
+        self._db = connect_sqlite(str(self.db_path), "jobs", timeout=10, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._init_db()
+
+    def _init_db(self):
+        conn = self._db
+        with self._lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    exp_id TEXT,
+                    kind TEXT,
+                    status TEXT,
+                    priority INTEGER,
+                    inputs_json TEXT,
+                    dir TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    artifacts_json TEXT,
+                    log_offset INTEGER DEFAULT 0,
+                    error TEXT,
+                    updated_at REAL
+                )
+                """
+            )
+            cols = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            for name, decl in _ADDED_COLUMNS.items():
+                if name not in cols:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_fingerprint ON jobs(fingerprint)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id)")
+            conn.commit()
+
+    def save(self, record: Dict[str, Any]) -> None:
+        """Upsert a job record. Dict/list values are stored as JSON."""
+        self.save_many([record])
+
+    def save_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Upsert several job records in one transaction."""
+        now = time.time()
+        rows = []
+        for record in records:
+            row = {k: record.get(k) for k in _COLUMNS}
+            row["inputs_json"] = json.dumps(record.get("inputs") or {}, default=str)
+            row["artifacts_json"] = json.dumps(record.get("artifacts") or [], default=str)
+            row["after_json"] = json.dumps(record.get("after") or [])
+            row["usage_json"] = json.dumps(record["usage"]) if record.get("usage") else None
+            row["updated_at"] = now
+            rows.append(tuple(row[c] for c in _COLUMNS))
+        cols = ", ".join(_COLUMNS)
+        marks = ", ".join("?" for _ in _COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS if c != "id")
+        with self._lock:
+            self._db.executemany(
+                f"INSERT INTO jobs ({cols}) VALUES ({marks}) ON CONFLICT(id) DO UPDATE SET {updates}",
+                rows,
+            )
+            self._db.commit()
+
+    def _decode(self, r: sqlite3.Row) -> Dict[str, Any]:
+        row = dict(r)
+        try:
+            row["inputs"] = json.loads(row.pop("inputs_json") or "{}")
+        except Exception:
+            row["inputs"] = {}
+        try:
+            row["artifacts"] = json.loads(row.pop("artifacts_json") or "[]")
+        except Exception:
+            row["artifacts"] = []
+        try:
+            row["after"] = json.loads(row.pop("after_json") or "[]")
+        except Exception:
+            row["after"] = []
+        try:
+            row["usage"] = json.loads(row.pop("usage_json") or "null")
+        except Exception:
+            row["usage"] = None
+        return row
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            r = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(r) if r else None
+
+    def query(self, statuses: Optional[Iterable[str]] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        with self._lock:
+            if statuses:
+                sts = list(statuses)
+                marks = ", ".join("?" for _ in sts)
+                rows = self._db.execute(
+                    f"SELECT * FROM jobs WHERE status IN ({marks}) ORDER BY created_at DESC LIMIT ?",
+                    (*sts, limit),
+                ).fetchall()
+            else:
+                rows = self._db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    def batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Jobs of a batch in submission order."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM jobs WHERE batch_id = ? ORDER BY rowid", (batch_id,)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running when the process last stopped."""
+        return self.query(ACTIVE_STATES, limit=10_000)
+
+    def find_cached(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Newest completed job with this result fingerprint, if any."""
+        with self._lock:
+            r = self._db.execute(
+                "SELECT * FROM jobs WHERE fingerprint = ? AND status = 'completed' ORDER BY finished_at DESC LIMIT 1",
+                (fingerprint,),
+            ).fetchone()
+        return self._decode(r) if r else None
+
+    def touch_cached(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET cache_used_at = ? WHERE id = ?", (time.time(), job_id))
+            self._db.commit()
+
+    def forget_cached(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET fingerprint = NULL WHERE id = ?", (job_id,))
+            self._db.commit()
+
+    def evict_cached(self, max_entries: int, max_age_sec: float) -> int:
+        """Drop fingerprints unused for `max_age_sec`, then all but the `max_entries` most recently used."""
+        used = "COALESCE(cache_used_at, finished_at, created_at)"
+        with self._lock:
+            n = self._db.execute(
+                f"UPDATE jobs SET fingerprint = NULL WHERE fingerprint IS NOT NULL AND {used} < ?",
+                (time.time() - max_age_sec,),
+            ).rowcount
+            n += self._db.execute(
+                f"""UPDATE jobs SET fingerprint = NULL WHERE id IN (
+                        SELECT id FROM jobs WHERE fingerprint IS NOT NULL
+                        ORDER BY {used} DESC LIMIT -1 OFFSET ?)""",
+                (max(0, max_entries),),
+            ).rowcount
+            self._db.commit()
+        return n
+
+    def set_pinned(self, job_id: str, pinned: bool) -> bool:
+        """Pinned jobs are never removed by run-directory GC."""
+        with self._lock:
+            n = self._db.execute("UPDATE jobs SET pinned = ? WHERE id = ?", (1 if pinned else 0, job_id)).rowcount
+            self._db.commit()
+        return n > 0
+
+    def mark_evicted(self, job_id: str) -> None:
+        """Job directory was deleted: keep the record, drop what pointed into it."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET evicted_at = ?, fingerprint = NULL, artifacts_json = '[]' WHERE id = ?",
+                (time.time(), job_id),
+            )
+            self._db.commit()
+
+    def gc_index(self) -> Dict[str, Dict[str, Any]]:
+        """id -> status, pinned and last-used time for every job (used by RunsGC)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, status, pinned, MAX(COALESCE(cache_used_at, 0), COALESCE(finished_at, 0), "
+                "COALESCE(created_at, 0)) AS last_used FROM jobs"
+            ).fetchall()
+        return {r["id"]: dict(r) for r in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,220 @@
+"""
+Minimal Prometheus text-format metrics (counters, gauges, histograms).
+
+Kept dependency-free on purpose: the server only needs to expose a scrape
+endpoint, so a small thread-safe registry is enough. `REGISTRY.render()`
+produces the exposition format (version 0.0.4) served at `/metrics`.
+
+Also provides `connect_sqlite()`, a drop-in for `sqlite3.connect` whose
+connections time every statement into `trk_sqlite_query_seconds`.
+"""
+from __future__ import annotations
+import sqlite3, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by `fn` returning {label tuple: value}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], Dict[LabelKey, float]]] = None):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        if self.fn is not None:
+            try:
+                values = dict(self.fn())
+            except Exception:
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return self.header() + [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+                    break
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in sorted(self._series.items())]
+        lines = self.header()
+        for key, s in items:
+            acc = 0.0
+            for i, b in enumerate(self.buckets):
+                acc += s[i]
+                le = 'le="%s"' % _fmt(b)
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {_fmt(acc)}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_fmt(s[-2])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {_fmt(s[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, doc, labelnames))
+
+    def gauge(self, name: str, doc: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], Dict[LabelKey, float]]] = None) -> Gauge:
+        return self._register(Gauge(name, doc, labelnames, fn))
+
+    def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, doc, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SQLITE_QUERY_SECONDS = REGISTRY.histogram(
+    "trk_sqlite_query_seconds", "SQLite statement execution time.", ("db", "op"))
+
+
+def _op(sql: str) -> str:
+    word = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ""
+    return word if word in ("select", "insert", "update", "delete", "create", "pragma") else "other"
+
+
+class _TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):  # type: ignore[override]
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            SQLITE_QUERY_SECONDS.observe(time.perf_counter() - t0, db=getattr(self.connection, "metrics_db", ""), op=_op(sql))
+
+    def executemany(self, sql, seq_of_parameters):  # type: ignore[override]
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            SQLITE_QUERY_SECONDS.observe(time.perf_counter() - t0, db=getattr(self.connection, "metrics_db", ""), op=_op(sql))
+
+
+class _TimedConnection(sqlite3.Connection):
+    metrics_db = ""
+
+    def cursor(self, factory=_TimedCursor):  # type: ignore[override]
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):  # type: ignore[override]
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):  # type: ignore[override]
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect_sqlite(path: str, db: str, **kwargs: Any) -> sqlite3.Connection:
+    """`sqlite3.connect` whose statements are recorded under label `db`."""
+    conn = sqlite3.connect(path, factory=_TimedConnection, **kwargs)
+    conn.metrics_db = db  # type: ignore[attr-defined]
+    return conn
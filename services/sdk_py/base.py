@@ -1,20 +1,81 @@
 from __future__ import annotations
 from pathlib import Path
-import json, shutil
+import json, os, shutil, signal, subprocess, sys, time
+from .handoff import describe, freeze
+from .manifest import append_manifest, artifact_entry
+from .usage import USAGE_LOG, USAGE_LOG_ENV, append_usage, start_readers, wait_process
+class JobCancelled(Exception):
+    """Raised inside an experiment when its job has been cancelled."""
+def _kill_tree(proc: subprocess.Popen):
+    # Children run in their own process group/session so grandchildren (ffmpeg, demucs) die too.
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        proc.kill()
+def _cmd_str(cmd, limit: int = 300) -> str:
+    s = cmd if isinstance(cmd, str) else " ".join(str(c) for c in cmd)
+    return s if len(s) <= limit else s[:limit] + "..."
 class RunContext:
     def __init__(self, job_dir: Path, inputs: dict, logger=print, cancel_fn=lambda: False):
         self.dir = Path(job_dir); self.inputs = inputs; self.log = logger; self._cancel = cancel_fn
+        self.values: dict = {}  # in-process outputs, see emit_value()
     def input(self, key, default=None): return self.inputs.get(key, default)
+    def input_value(self, key, kind=None):
+        """An input handed over in memory by an upstream flow step; `kind` checks its type."""
+        value = self.inputs[key]
+        if kind is not None and not isinstance(value, kind):
+            raise TypeError(f"input {key}: expected {getattr(kind, '__name__', kind)}, got {describe(value)}")
+        return value
     def input_file(self, key): return Path(self.inputs[key])
     def cancelled(self): return bool(self._cancel())
+    def check_cancelled(self):
+        if self.cancelled(): raise JobCancelled("job cancelled")
+    def run_process(self, cmd, poll: float = 0.2, **kwargs) -> subprocess.CompletedProcess:
+        """subprocess.run() with captured text output that kills the whole process tree on cancel.
+
+        The child's CPU time, peak RSS and I/O bytes are appended to <job dir>/usage.jsonl.
+        """
+        self.check_cancelled()
+        kwargs.setdefault("stdout", subprocess.PIPE); kwargs.setdefault("stderr", subprocess.PIPE); kwargs.setdefault("text", True)
+        if sys.platform == "win32": kwargs.setdefault("creationflags", subprocess.CREATE_NEW_PROCESS_GROUP)
+        else: kwargs.setdefault("start_new_session", True)
+        # Tools that spawn their own children (audio-automation's run_cmd) report them here too.
+        kwargs["env"] = {**(kwargs.get("env") or os.environ), USAGE_LOG_ENV: str(self.dir / USAGE_LOG)}
+        started = time.time()
+        with subprocess.Popen(cmd, **kwargs) as proc:
+            join = start_readers(proc)
+            usage = wait_process(proc, poll, cancelled=self.cancelled, on_cancel=_kill_tree)
+            out, err = join()
+        self._record_usage({"cmd": _cmd_str(cmd), "pid": proc.pid, "returncode": proc.returncode,
+                            "startedAt": started, **usage})
+        if self.cancelled(): raise JobCancelled("job cancelled")
+        return subprocess.CompletedProcess(proc.args, proc.returncode, out, err)
     def emit_artifact(self, name:str, path):
         art = self.dir / "artifacts"; art.mkdir(parents=True, exist_ok=True)
         dst = art / (name + "_" + Path(path).name)
         try: dst.symlink_to(Path(path))
         except Exception: shutil.copy2(Path(path), dst)
-        return dst
+        self._record(name, dst); return dst
     def emit_json(self, name:str, data:dict):
-        p = self.dir / f"{name}.json"; p.write_text(json.dumps(data, indent=2), encoding="utf-8"); return p
+        p = self.dir / f"{name}.json"; p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        self._record(name, p); return p
+    def emit_value(self, name:str, value):
+        """Hand `value` (array, table, buffer) to downstream flow steps in memory, read-only.
+
+        Nothing is written to the job directory: values live only for the flow run.
+        """
+        self.values[name] = frozen = freeze(value)
+        return frozen
+    def _record(self, name: str, path: Path):
+        # Append to <job dir>/artifacts.jsonl so listings never walk the job directory.
+        try: append_manifest(self.dir, artifact_entry(self.dir, name, path))
+        except Exception as e: self.log(f"artifact manifest update failed for {name}: {e}")
+    def _record_usage(self, record: dict):
+        try: append_usage(self.dir / USAGE_LOG, record)
+        except Exception as e: self.log(f"usage record failed: {e}")
 class BaseExperiment:
     def validate(self, ctx:RunContext): return True
     def run(self, ctx:RunContext): raise NotImplementedError
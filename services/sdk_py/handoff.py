@@ -0,0 +1,44 @@
+"""
+In-process values handed from one flow step to the next.
+
+`RunContext.emit_value(name, value)` publishes an object (a NumPy array,
+an Arrow table, an `mmap`/`memoryview` buffer, any Python object) instead of
+writing it to the job directory. Flow nodes run as threads of one process, so
+the executor passes the object itself to downstream inputs that reference
+`${<node>.<name>}`: no serialization, no copy, no disk.
+
+Several consumers may run in parallel on the same object, so `freeze()` hands
+out read-only views of the types that support them (a view shares the
+underlying buffer). Values are not checkpointed or cached; results that must
+outlive the run still go through `emit_json` / `emit_artifact`.
+"""
+from __future__ import annotations
+from typing import Any
+
+
+def freeze(value: Any) -> Any:
+    """Read-only, zero-copy view of `value` where its type supports one."""
+    if isinstance(value, (bytearray, memoryview)) or type(value).__name__ == "mmap":
+        return memoryview(value).toreadonly()
+    flags = getattr(value, "flags", None)
+    if flags is not None and hasattr(value, "view") and hasattr(flags, "writeable"):  # numpy.ndarray
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    return value  # immutable already (bytes, pyarrow.Table) or not viewable
+
+
+def describe(value: Any) -> str:
+    """Short type/shape description for status output, e.g. `ndarray float32 (2, 48000)`."""
+    kind = type(value).__name__
+    shape, dtype = getattr(value, "shape", None), getattr(value, "dtype", None)
+    if shape is not None and dtype is not None:
+        return f"{kind} {dtype} {tuple(shape)}"
+    if hasattr(value, "num_rows") and hasattr(value, "num_columns"):  # pyarrow.Table / RecordBatch
+        return f"{kind} {value.num_rows}x{value.num_columns}"
+    if isinstance(value, memoryview):
+        return f"{kind} {value.format} {value.nbytes} bytes"
+    try:
+        return f"{kind} len={len(value)}"
+    except TypeError:
+        return kind
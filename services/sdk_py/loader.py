@@ -0,0 +1,83 @@
+"""
+Cached loading of experiment entry points (`experiments/<id>/py/main.py`).
+
+Executing an experiment module pays its full import cost, so loaded `EXP`
+classes are cached per file and only re-executed when the file's mtime/size
+changes (hot reload) or when `invalidate()` is called explicitly. The server
+and the flow runner share the module-level `EXPERIMENTS` loader.
+"""
+from __future__ import annotations
+import importlib.util, sys, threading, time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+class ExperimentLoader:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._cache: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+
+    def entry_path(self, exp_id: str) -> Path:
+        return self.root / exp_id / "py" / "main.py"
+
+    def _lock_for(self, py: Path) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(py, threading.Lock())
+
+    def load(self, exp_id: str) -> Any:
+        """Return the experiment's EXP class, re-executing main.py only if it changed."""
+        py = self.entry_path(exp_id)
+        try:
+            st = py.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Experiment {exp_id} not found")
+        sig = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(py)
+        if cached and cached[0] == sig:
+            self.hits += 1
+            return cached[1]
+        # Serialize loads per file so concurrent submissions exec the module once.
+        with self._lock_for(py):
+            cached = self._cache.get(py)
+            if cached and cached[0] == sig:
+                self.hits += 1
+                return cached[1]
+            t0 = time.perf_counter()
+            name = f"exp_{exp_id}"
+            spec = importlib.util.spec_from_file_location(name, py)
+            assert spec and spec.loader
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)  # type: ignore
+            sys.modules[name] = mod
+            cls = getattr(mod, "EXP")
+            self._cache[py] = (sig, cls)
+            self.loads += 1
+            self.load_seconds += time.perf_counter() - t0
+            return cls
+
+    def invalidate(self, exp_id: Optional[str] = None) -> int:
+        """Drop one cached experiment (or all); returns how many entries were removed."""
+        with self._guard:
+            if exp_id is None:
+                n = len(self._cache)
+                self._cache.clear()
+                return n
+            return 1 if self._cache.pop(self.entry_path(exp_id), None) else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": sorted(p.parent.parent.name for p in self._cache),
+            "hits": self.hits,
+            "loads": self.loads,
+            "loadSeconds": round(self.load_seconds, 4),
+        }
+
+
+EXPERIMENTS = ExperimentLoader(ROOT / "experiments")
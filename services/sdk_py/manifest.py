@@ -0,0 +1,99 @@
+"""
+Per-job artifact manifest (`<job dir>/artifacts.jsonl`).
+
+`RunContext.emit_artifact`/`emit_json` append one JSON line per artifact
+(name, relpath, size, sha256, mime) as they are produced, so listing a job's
+artifacts never has to walk its directory (stems, downloads and segment WAVs
+can number in the thousands). `ArtifactManifest` reads the file incrementally:
+each refresh only parses lines appended since the previous one.
+"""
+from __future__ import annotations
+import hashlib, json, mimetypes, os, threading, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = "artifacts.jsonl"
+
+mimetypes.add_type("audio/midi", ".mid")
+mimetypes.add_type("text/vtt", ".vtt")
+
+
+def file_sha256(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def artifact_entry(job_dir: Path, name: str, path: Path) -> Dict[str, Any]:
+    path = Path(path)
+    try:
+        rel = path.relative_to(job_dir).as_posix()
+    except ValueError:
+        rel = path.name
+    return {
+        "name": name,
+        "file": path.name,
+        "relpath": rel,
+        "size": path.stat().st_size,
+        "sha256": file_sha256(path),
+        "mime": mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        "createdAt": time.time(),
+    }
+
+
+def append_manifest(job_dir: Path, entry: Dict[str, Any]) -> None:
+    # One short O_APPEND write per line keeps concurrent writers (threads or
+    # pool processes) from interleaving partial records.
+    line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+    fd = os.open(str(Path(job_dir) / MANIFEST_NAME), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+class ArtifactManifest:
+    """Incrementally parsed view of a job's manifest; later entries for a relpath win."""
+
+    def __init__(self, job_dir: Path):
+        self.path = Path(job_dir) / MANIFEST_NAME
+        self._pos = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                return self._rows
+            if size > self._pos:
+                with self.path.open("rb") as fh:
+                    fh.seek(self._pos)
+                    data = fh.read(size - self._pos)
+                # Only consume complete lines; a partial tail is picked up next time.
+                end = data.rfind(b"\n") + 1
+                for raw in data[:end].splitlines():
+                    try:
+                        row = json.loads(raw)
+                    except Exception:
+                        continue
+                    rel = row.get("relpath")
+                    if rel in self._index:
+                        self._rows[self._index[rel]] = row
+                    else:
+                        self._index[rel] = len(self._rows)
+                        self._rows.append(row)
+                self._pos += end
+            return self._rows
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self.refresh()
+        start = max(0, offset)
+        return rows[start:] if limit is None else rows[start:start + max(0, limit)]
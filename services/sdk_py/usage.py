@@ -0,0 +1,208 @@
+"""
+Per-job resource accounting: CPU user/sys time, peak RSS and bytes read/written.
+
+Two sources feed a job's usage:
+
+* `ThreadMeter` measures the thread running the experiment (RUSAGE_THREAD and
+  `/proc/thread-self/io` deltas on Linux, `time.thread_time()` elsewhere).
+* `wait_process()` reaps a child with `os.wait4()` so its rusage (which rolls
+  up every descendant it waited for, e.g. ffmpeg under orchestrate.py) is
+  attributed to the job that started it rather than to the whole server.
+  Where `os.waitid()` exists (Linux), `/proc/<pid>/io` is read while the child
+  is still a zombie.
+
+`RunContext.run_process` appends one JSON line per child to
+`<job dir>/usage.jsonl` and exports its path as `TRK_USAGE_LOG`, so tools
+further down the tree (audio-automation's `run_cmd`) can add their own
+children as `nested` records. `summarize()` folds the thread figures and the
+log into the dict stored with the job.
+"""
+from __future__ import annotations
+import json, os, subprocess, sys, threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+USAGE_LOG = "usage.jsonl"
+USAGE_LOG_ENV = "TRK_USAGE_LOG"
+# ru_maxrss is KiB on Linux, bytes on macOS.
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None) if resource else None
+
+
+def proc_io(pid: Any = "thread-self") -> Optional[Tuple[int, int]]:
+    """(read_bytes, write_bytes) of storage I/O from /proc, or None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/io", "r", encoding="ascii") as fh:
+            fields = dict(line.split(":", 1) for line in fh if ":" in line)
+        return int(fields["read_bytes"]), int(fields["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _rusage_dict(ru: Any, io: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+    if io is None:
+        io = (ru.ru_inblock * 512, ru.ru_oublock * 512)
+    return {
+        "cpuUserSec": round(ru.ru_utime, 3),
+        "cpuSysSec": round(ru.ru_stime, 3),
+        "maxRssBytes": int(ru.ru_maxrss) * _RSS_UNIT,
+        "readBytes": io[0],
+        "writeBytes": io[1],
+    }
+
+
+class ThreadMeter:
+    """CPU and I/O used by the calling thread between `start()` and `stop()`."""
+
+    def __init__(self):
+        self._t0 = 0.0
+        self._ru0: Any = None
+        self._cpu0 = 0.0
+        self._io0: Optional[Tuple[int, int]] = None
+
+    def _sample(self):
+        ru = resource.getrusage(_RUSAGE_THREAD) if _RUSAGE_THREAD is not None else None
+        return ru, time.thread_time(), proc_io()
+
+    def start(self) -> "ThreadMeter":
+        self._t0 = time.perf_counter()
+        self._ru0, self._cpu0, self._io0 = self._sample()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        ru, cpu, io = self._sample()
+        out: Dict[str, Any] = {"wallSec": round(time.perf_counter() - self._t0, 3)}
+        if ru is not None and self._ru0 is not None:
+            out["cpuUserSec"] = round(ru.ru_utime - self._ru0.ru_utime, 3)
+            out["cpuSysSec"] = round(ru.ru_stime - self._ru0.ru_stime, 3)
+        else:
+            out["cpuUserSec"] = round(cpu - self._cpu0, 3)
+            out["cpuSysSec"] = 0.0
+        if io is not None and self._io0 is not None:
+            out["readBytes"] = io[0] - self._io0[0]
+            out["writeBytes"] = io[1] - self._io0[1]
+        if resource is not None:
+            # Per-thread peak RSS does not exist; this is the hosting process' peak.
+            out["processMaxRssBytes"] = int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * _RSS_UNIT
+        return out
+
+
+def start_readers(proc: subprocess.Popen) -> Callable[[], Tuple[Any, Any]]:
+    """Drain the child's stdout/stderr on threads; the returned callable joins them and gives (out, err)."""
+    results: Dict[str, Any] = {}
+    threads: List[threading.Thread] = []
+    for name in ("stdout", "stderr"):
+        stream = getattr(proc, name)
+        if stream is None:
+            continue
+
+        def _read(name: str = name, stream: Any = stream) -> None:
+            try:
+                results[name] = stream.read()
+            finally:
+                stream.close()
+
+        t = threading.Thread(target=_read, name=f"pipe-{proc.pid}-{name}", daemon=True)
+        t.start()
+        threads.append(t)
+
+    def join() -> Tuple[Any, Any]:
+        for t in threads:
+            t.join()
+        return results.get("stdout"), results.get("stderr")
+
+    return join
+
+
+def wait_process(proc: subprocess.Popen, poll: float = 0.2,
+                 cancelled: Optional[Callable[[], bool]] = None,
+                 on_cancel: Optional[Callable[[subprocess.Popen], Any]] = None) -> Dict[str, Any]:
+    """Wait for `proc` and return its resource usage; sets `proc.returncode`.
+
+    The caller must drain the child's pipes itself (e.g. reader threads); this
+    only waits. `on_cancel(proc)` is called once when `cancelled()` turns true.
+    """
+    t0 = time.perf_counter()
+    if not hasattr(os, "wait4"):
+        while True:
+            try:
+                proc.wait(timeout=poll)
+                break
+            except subprocess.TimeoutExpired:
+                if cancelled and on_cancel and cancelled():
+                    on_cancel(proc)
+                    cancelled = None
+        return {"wallSec": round(time.perf_counter() - t0, 3)}
+    delay = min(0.005, poll)
+
+    def idle() -> None:
+        nonlocal cancelled, delay
+        if cancelled and on_cancel and cancelled():
+            on_cancel(proc)
+            cancelled = None
+        # Back off to `poll` so short commands are not held up by the polling interval.
+        time.sleep(delay)
+        delay = min(delay * 2, poll)
+
+    if hasattr(os, "waitid"):
+        while os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT | os.WNOHANG) is None:
+            idle()
+        io = proc_io(proc.pid)  # zombie: counters are final and include reaped descendants
+        _pid, status, ru = os.wait4(proc.pid, 0)
+    else:
+        # macOS has wait4 but no waitid (and no /proc): reap as soon as the child
+        # exits; I/O then comes from the block counters in the rusage.
+        io = None
+        while True:
+            pid, status, ru = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            idle()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return {"wallSec": round(time.perf_counter() - t0, 3), **_rusage_dict(ru, io)}
+
+
+def append_usage(path: Path, record: Dict[str, Any]) -> None:
+    line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_usage(path: Path) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    try:
+        with Path(path).open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return rows
+
+
+def summarize(own: Optional[Dict[str, Any]], children: List[Dict[str, Any]],
+              max_children: int = 50) -> Dict[str, Any]:
+    """Job totals: own thread plus direct children (nested records are already inside those)."""
+    own = own or {}
+    direct = [c for c in children if not c.get("nested")]
+    parts = [own] + direct
+    return {
+        "cpuUserSec": round(sum(p.get("cpuUserSec") or 0 for p in parts), 3),
+        "cpuSysSec": round(sum(p.get("cpuSysSec") or 0 for p in parts), 3),
+        "maxRssBytes": max([c.get("maxRssBytes") or 0 for c in direct] or [0]),
+        "readBytes": sum(p.get("readBytes") or 0 for p in parts),
+        "writeBytes": sum(p.get("writeBytes") or 0 for p in parts),
+        "self": own,
+        "childCount": len(children),
+        "children": children[:max_children],
+    }
@@ -0,0 +1,124 @@
+"""Shared fixtures: a stand-in job object for the services/jobs helpers, and the real
+server (apps/server/main.py) pointed at a temporary runs/, job store and
+experiments directory for tests that drive its routes through TestClient."""
+import sys, threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import LogBus
+
+
+class FakeJob:
+    """The parts of apps.server.main.Job that dependency, batch and flow handling use."""
+
+    def __init__(self, id, inputs=None, kind='custom', job_dir=None):
+        self.id, self.inputs, self.kind, self.dir = id, inputs or {}, kind, job_dir
+        self.status, self.error, self.priority = 'queued', None, 5
+        self.logbus = LogBus(path=job_dir / 'job.log' if job_dir else None)
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def log(self, msg):
+        self.logbus.append(msg)
+
+    def cancelled(self):
+        return self.status == 'cancelled'
+
+    def timings(self):
+        return {}
+
+    def on_done(self, cb):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(cb)
+                return
+        cb(self)
+
+    def finish(self, status, error=None):
+        self.status, self.error = status, error
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        self.logbus.close()
+        for cb in callbacks:
+            cb(self)
+
+
+@pytest.fixture
+def make_job():
+    return FakeJob
+
+
+# Experiments installed for server tests. `slow` runs until cancelled (or 10 s),
+# then returns normally, as experiments polling ctx.cancelled() do.
+TEST_EXPERIMENTS = {
+    'echo': '''
+from services.sdk_py.base import BaseExperiment, RunContext
+class EXP(BaseExperiment):
+    def run(self, ctx: RunContext):
+        ctx.log("echo " + str(ctx.input("message")))
+        ctx.emit_json("echo", {"message": ctx.input("message")})
+''',
+    'slow': '''
+import time
+from services.sdk_py.base import BaseExperiment, RunContext
+class EXP(BaseExperiment):
+    def run(self, ctx: RunContext):
+        ctx.log("started")
+        deadline = time.time() + 10
+        while not ctx.cancelled() and time.time() < deadline:
+            time.sleep(0.02)
+        ctx.emit_json("partial", {"stopped": time.time() < deadline})
+''',
+    'broken': '''
+from services.sdk_py.base import BaseExperiment, RunContext
+class EXP(BaseExperiment):
+    def run(self, ctx: RunContext):
+        raise RuntimeError("broken on purpose")
+''',
+}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """apps.server.main with its runs/, job store, experiments and in-memory maps isolated."""
+    from apps.server import main
+    from apps.server.routes import flows
+    from services.jobs import JobStore
+    from services.sdk_py.loader import ExperimentLoader
+
+    exps = tmp_path / 'experiments'
+    for exp_id, source in TEST_EXPERIMENTS.items():
+        (exps / exp_id / 'py').mkdir(parents=True)
+        (exps / exp_id / 'py' / 'main.py').write_text(source, encoding='utf-8')
+    store = JobStore(tmp_path / 'jobs.db')
+    monkeypatch.setattr(main, 'EXPS', exps)
+    monkeypatch.setattr(main, 'EXPERIMENTS', ExperimentLoader(exps))
+    monkeypatch.setattr(main, 'RUNS', tmp_path / 'runs')
+    monkeypatch.setattr(flows, 'RUNS', tmp_path / 'runs')
+    monkeypatch.setattr(main, 'JOB_STORE', store)
+    monkeypatch.setattr(main, 'JOBS', {})
+    monkeypatch.setattr(main, 'BATCHES', {})
+    yield main
+    store.close()
+
+
+@pytest.fixture
+def api(server):
+    from fastapi.testclient import TestClient
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def wait_job(server):
+    """Block until a job of the real server finishes; returns it."""
+    def wait(job_id, timeout=10):
+        job = server._get_job(job_id)
+        assert job is not None and job._done.wait(timeout), f'job {job_id} did not finish'
+        return job
+    return wait
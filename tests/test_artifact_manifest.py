@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.sdk_py.base import RunContext
+from services.sdk_py.manifest import ArtifactManifest, MANIFEST_NAME
+
+
+def test_emit_appends_manifest_and_reader_is_incremental(tmp_path: Path):
+    src = tmp_path / 'song.mid'
+    src.write_bytes(b'MThd')
+    job = tmp_path / 'job'
+    job.mkdir()
+    ctx = RunContext(job, {})
+    ctx.emit_json('segments', {'segments': []})
+    man = ArtifactManifest(job)
+    rows = man.refresh()
+    assert [r['relpath'] for r in rows] == ['segments.json']
+    assert rows[0]['mime'] == 'application/json' and len(rows[0]['sha256']) == 64
+
+    ctx.emit_artifact('midi', src)
+    ctx.emit_json('segments', {'segments': [1]})
+    rows = man.refresh()
+    assert [r['relpath'] for r in rows] == ['segments.json', 'artifacts/midi_song.mid']
+    assert rows[0]['size'] == (job / 'segments.json').stat().st_size  # re-emit replaces
+    assert rows[1]['mime'] == 'audio/midi'
+    assert man.page(1, 5) == rows[1:]
+
+    # A torn trailing line is left for the next refresh.
+    with (job / MANIFEST_NAME).open('a', encoding='utf-8') as fh:
+        fh.write(json.dumps({'relpath': 'x.json'})[:5])
+    assert len(man.refresh()) == 2
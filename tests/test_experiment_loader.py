@@ -0,0 +1,44 @@
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.sdk_py.loader import ExperimentLoader
+
+
+def _write_exp(root: Path, body: str, mtime: int):
+    py = root / 'demo' / 'py' / 'main.py'
+    py.parent.mkdir(parents=True, exist_ok=True)
+    py.write_text(body, encoding='utf-8')
+    os.utime(py, (mtime, mtime))
+
+
+def test_loader_caches_and_hot_reloads(tmp_path: Path):
+    _write_exp(tmp_path, 'class EXP:\n    VERSION = 1\n', 1_000_000)
+    loader = ExperimentLoader(tmp_path)
+
+    first = loader.load('demo')
+    assert first.VERSION == 1
+    assert loader.load('demo') is first
+    assert (loader.loads, loader.hits) == (1, 1)
+
+    # Changing the file on disk triggers a re-exec on next load.
+    _write_exp(tmp_path, 'class EXP:\n    VERSION = 22\n', 2_000_000)
+    assert loader.load('demo').VERSION == 22
+    assert loader.loads == 2
+
+    assert loader.invalidate('demo') == 1
+    assert loader.load('demo').VERSION == 22
+    assert loader.loads == 3
+
+
+def test_loader_missing_experiment(tmp_path: Path):
+    loader = ExperimentLoader(tmp_path)
+    try:
+        loader.load('nope')
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError('expected FileNotFoundError')
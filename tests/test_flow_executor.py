@@ -0,0 +1,241 @@
+import json, sys, threading, time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.flow import FlowError, FlowExecutor, StepCache, parse_flow
+from services.sdk_py.base import RunContext
+
+
+def _sleep_node(seconds=0.3, fail=()):
+    """run_node stub: sleeps, then emits its inputs as a JSON artifact named 'result'."""
+    def run(node, inputs, node_dir, log, cancelled):
+        time.sleep(seconds)
+        if node.id in fail:
+            raise RuntimeError(f'{node.id} broke')
+        RunContext(node_dir, inputs).emit_json('result', {'node': node.id, 'inputs': inputs})
+    return run
+
+
+def test_parse_flow_builds_edges_from_references():
+    flow = parse_flow({'id': 'f', 'nodes': [
+        {'id': 'mix', 'ref': 'x', 'in': {'audio': '${rec.audio}', 'opts': ['${stems}']}},
+        {'id': 'rec', 'ref': 'x'},
+        {'id': 'stems', 'ref': 'x', 'in': {'audio': '${rec.audio}'}},
+        {'id': 'report', 'ref': 'x', 'after': ['mix']},
+    ]})
+    assert flow.nodes['mix'].deps == {'rec', 'stems'}
+    assert flow.order == ['rec', 'stems', 'mix', 'report']
+    assert flow.rank()['rec'] == 4
+
+
+def test_parse_flow_accepts_profile_steps():
+    flow = parse_flow({'version': 1, 'steps': [{'id': 'hello', 'op': 'hello', 'in': {'message': 'hi'}}]})
+    assert flow.nodes['hello'].ref == 'hello'
+
+
+@pytest.mark.parametrize('nodes, msg', [
+    ([{'id': 'a', 'ref': 'x', 'in': {'v': '${b.out}'}}, {'id': 'b', 'ref': 'x', 'after': ['a']}], 'cycle'),
+    ([{'id': 'a', 'ref': 'x', 'in': {'v': '${nope.out}'}}], 'unknown'),
+    ([{'id': 'a', 'ref': 'x'}, {'id': 'a', 'ref': 'y'}], 'duplicate'),
+])
+def test_parse_flow_rejects_bad_graphs(nodes, msg):
+    with pytest.raises(FlowError, match=msg):
+        parse_flow({'id': 'f', 'nodes': nodes})
+
+
+def test_independent_branches_run_in_parallel(tmp_path: Path):
+    # a -> (b, c, d) -> e: critical path is 3 nodes, not 5.
+    flow = parse_flow({'id': 'diamond', 'nodes': [
+        {'id': 'a', 'ref': 'x'},
+        {'id': 'b', 'ref': 'x', 'in': {'src': '${a.result}'}},
+        {'id': 'c', 'ref': 'x', 'in': {'src': '${a.result}'}},
+        {'id': 'd', 'ref': 'x', 'in': {'src': '${a}'}},
+        {'id': 'e', 'ref': 'x', 'in': {'parts': ['${b.result}', '${c.result}', 'd=${d.result}']}},
+    ]})
+    t0 = time.time()
+    summary = FlowExecutor(flow, tmp_path, run_node=_sleep_node(0.3), workers=4, log=lambda m: None).run()
+    elapsed = time.time() - t0
+    assert summary['status'] == 'completed'
+    assert elapsed < 1.3, elapsed
+    e = json.loads((tmp_path / 'e' / 'result.json').read_text())
+    assert e['inputs']['parts'][0] == str(tmp_path.resolve() / 'b' / 'result.json')
+    assert e['inputs']['parts'][2] == 'd=' + str(tmp_path.resolve() / 'd' / 'result.json')
+    b = json.loads((tmp_path / 'b' / 'result.json').read_text())
+    assert b['inputs']['src'] == str(tmp_path.resolve() / 'a' / 'result.json')
+    assert json.loads((tmp_path / 'flow.json').read_text())['status'] == 'completed'
+
+
+def test_failure_skips_downstream_but_not_other_branches(tmp_path: Path):
+    flow = parse_flow({'id': 'f', 'nodes': [
+        {'id': 'bad', 'ref': 'x'},
+        {'id': 'after_bad', 'ref': 'x', 'in': {'v': '${bad.result}'}},
+        {'id': 'tail', 'ref': 'x', 'after': ['after_bad']},
+        {'id': 'good', 'ref': 'x'},
+    ]})
+    summary = FlowExecutor(flow, tmp_path, run_node=_sleep_node(0.05, fail={'bad'}), workers=2, log=lambda m: None).run()
+    states = {n['id']: n['status'] for n in summary['nodes']}
+    assert states == {'bad': 'failed', 'after_bad': 'skipped', 'tail': 'skipped', 'good': 'completed'}
+    assert summary['status'] == 'failed'
+    assert 'bad broke' in summary['nodes'][0]['error']
+
+
+def test_cancel_stops_pending_nodes(tmp_path: Path):
+    flow = parse_flow({'id': 'f', 'nodes': [{'id': f'n{i}', 'ref': 'x'} for i in range(4)]})
+    ex = FlowExecutor(flow, tmp_path, run_node=_sleep_node(0.3), workers=1, log=lambda m: None)
+    threading.Timer(0.1, ex.cancel).start()
+    summary = ex.run()
+    states = [n['status'] for n in summary['nodes']]
+    assert states[0] == 'completed'
+    assert states[1:] == ['cancelled'] * 3
+    assert summary['status'] == 'cancelled'
+
+
+def _chain(c_message='v1'):
+    return {'id': 'chain', 'nodes': [
+        {'id': 'a', 'ref': 'x', 'in': {'n': 1}},
+        {'id': 'b', 'ref': 'x', 'in': {'src': '${a.result}'}},
+        {'id': 'c', 'ref': 'x', 'in': {'src': '${b.result}', 'message': c_message}},
+    ]}
+
+
+def test_step_cache_reuses_unchanged_upstream(tmp_path: Path):
+    ran = []
+
+    def run(node, inputs, node_dir, log, cancelled):
+        ran.append(node.id)
+        RunContext(node_dir, inputs).emit_json('result', {'node': node.id, 'inputs': inputs})
+
+    cache = StepCache(tmp_path / 'cache', exp_root=tmp_path / 'exps')
+    quiet = dict(run_node=run, workers=2, log=lambda m: None, cache=cache)
+    FlowExecutor(parse_flow(_chain()), tmp_path / 'run1', **quiet).run()
+    assert ran == ['a', 'b', 'c']
+
+    ran.clear()
+    summary = FlowExecutor(parse_flow(_chain()), tmp_path / 'run2', **quiet).run()
+    assert ran == []
+    assert all(n['cached'] for n in summary['nodes'])
+    assert json.loads((tmp_path / 'run2' / 'c' / 'result.json').read_text())['node'] == 'c'
+
+    # Editing the last node only re-runs that node.
+    ran.clear()
+    FlowExecutor(parse_flow(_chain('v2')), tmp_path / 'run3', **quiet).run()
+    assert ran == ['c']
+
+    # A changed upstream result invalidates everything downstream of it
+    # (here b's output embeds its input path, so it changes too).
+    ran.clear()
+    doc = _chain('v2')
+    doc['nodes'][0]['in']['n'] = 2
+    FlowExecutor(parse_flow(doc), tmp_path / 'run4', **quiet).run()
+    assert ran == ['a', 'b', 'c']
+
+
+def test_step_cache_respects_opt_out(tmp_path: Path):
+    ran = []
+
+    def run(node, inputs, node_dir, log, cancelled):
+        ran.append(node.id)
+
+    (tmp_path / 'exps' / 'volatile').mkdir(parents=True)
+    (tmp_path / 'exps' / 'volatile' / 'manifest.json').write_text('{"cache": false}')
+    doc = {'id': 'f', 'nodes': [{'id': 'a', 'ref': 'x', 'cache': False}, {'id': 'b', 'ref': 'volatile'},
+                                {'id': 'c', 'ref': 'x'}]}
+    cache = StepCache(tmp_path / 'cache', exp_root=tmp_path / 'exps')
+    for i in range(2):
+        FlowExecutor(parse_flow(doc), tmp_path / f'run{i}', run_node=run, log=lambda m: None, cache=cache).run()
+    assert sorted(ran) == ['a', 'a', 'b', 'b', 'c']
+
+
+def test_resume_continues_at_failed_node(tmp_path: Path):
+    ran = []
+    broken = {'c'}
+
+    def run(node, inputs, node_dir, log, cancelled):
+        ran.append(node.id)
+        if node.id in broken:
+            raise RuntimeError('boom')
+        RunContext(node_dir, inputs).emit_json('result', {'node': node.id})
+
+    doc = {'id': 'f', 'nodes': [
+        {'id': 'a', 'ref': 'x'},
+        {'id': 'b', 'ref': 'x', 'in': {'src': '${a.result}'}},
+        {'id': 'c', 'ref': 'x', 'in': {'src': '${b.result}'}},
+        {'id': 'd', 'ref': 'x', 'in': {'src': '${c.result}'}},
+    ]}
+    quiet = dict(run_node=run, log=lambda m: None)
+    assert FlowExecutor(parse_flow(doc), tmp_path, **quiet).run()['status'] == 'failed'
+    assert ran == ['a', 'b', 'c']
+    state = json.loads((tmp_path / 'flow.json').read_text())
+    assert state['doc'] == doc
+    assert [n['status'] for n in state['nodes']] == ['completed', 'completed', 'failed', 'skipped']
+
+    broken.clear()
+    ran.clear()
+    ex = FlowExecutor.resume(tmp_path, **quiet)
+    summary = ex.run()
+    assert ran == ['c', 'd']
+    assert summary['status'] == 'completed'
+    assert summary['resumed'] == ['a', 'b']
+    d = json.loads((tmp_path / 'd' / 'result.json').read_text())
+    assert d == {'node': 'd'}
+
+    # Resuming with an edited node re-runs it and everything downstream.
+    ran.clear()
+    doc['nodes'][1]['in']['extra'] = 1
+    FlowExecutor.resume(tmp_path, parse_flow(doc), **quiet).run()
+    assert ran == ['b', 'c', 'd']
+
+
+def test_resume_reruns_nodes_interrupted_mid_run(tmp_path: Path):
+    flow = parse_flow({'id': 'f', 'nodes': [{'id': 'a', 'ref': 'x'}, {'id': 'b', 'ref': 'x', 'after': ['a']}]})
+    ex = FlowExecutor(flow, tmp_path, run_node=lambda *a: None, log=lambda m: None)
+    ex.run()
+    # Simulate a crash while 'b' was running.
+    state = json.loads((tmp_path / 'flow.json').read_text())
+    state['nodes'][1]['status'] = 'running'
+    (tmp_path / 'flow.json').write_text(json.dumps(state))
+    ran = []
+    FlowExecutor.resume(tmp_path, run_node=lambda node, *a: ran.append(node.id), log=lambda m: None).run()
+    assert ran == ['b']
+
+
+def test_values_are_handed_over_in_memory(tmp_path: Path):
+    pcm = bytearray(b'\x01\x02' * 1024)
+    seen, ran = {}, []
+
+    def run(node, inputs, node_dir, log, cancelled):
+        ran.append(node.id)
+        ctx = RunContext(node_dir, inputs)
+        if node.id == 'decode':
+            ctx.emit_value('pcm', pcm)
+            return ctx.values
+        view = ctx.input_value('pcm', memoryview)
+        seen[node.id] = view
+        with pytest.raises(TypeError):
+            view[0] = 0  # consumers share the buffer read-only
+        ctx.emit_json('result', {'bytes': view.nbytes})
+
+    doc = {'id': 'f', 'nodes': [
+        {'id': 'decode', 'ref': 'x'},
+        {'id': 'peaks', 'ref': 'x', 'in': {'pcm': '${decode.pcm}'}},
+        {'id': 'tempo', 'ref': 'x', 'in': {'pcm': '${decode.pcm}', 'window': 4}},
+    ]}
+    cache = StepCache(tmp_path / 'cache', exp_root=tmp_path / 'exps')
+    ex = FlowExecutor(parse_flow(doc), tmp_path / 'run1', run_node=run, workers=2, log=lambda m: None, cache=cache)
+    summary = ex.run()
+    assert summary['status'] == 'completed'
+    assert all(v.obj is pcm for v in seen.values())  # no copy
+    assert summary['nodes'][0]['values'] == {'pcm': 'memoryview B 2048 bytes'}
+    assert ex.nodes['decode'].values == {}  # released once both consumers finished
+    assert not list((tmp_path / 'run1' / 'decode').glob('*.json'))
+    # Consumers of a value are not stored either: their cache key could never match again.
+    assert not [p for p in (tmp_path / 'cache').glob('*') if not p.name.startswith('.')]
+
+    # Values are not cached, so the producer and its consumers run again.
+    ran.clear()
+    FlowExecutor(parse_flow(doc), tmp_path / 'run2', run_node=run, log=lambda m: None, cache=cache).run()
+    assert sorted(ran) == ['decode', 'peaks', 'tempo']
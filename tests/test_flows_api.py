@@ -0,0 +1,72 @@
+import sys, time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.server.routes import flows
+from services.sdk_py.base import JobCancelled
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_job):
+    monkeypatch.setattr(flows, 'RUNS', tmp_path / 'runs')
+    jobs = {}
+
+    def start_custom_job(name, fn, inputs, priority=5, kind='custom', **kw):
+        job = make_job(f'j{len(jobs)}', inputs, kind, tmp_path / f'j{len(jobs)}')
+        job.dir.mkdir(parents=True)
+        jobs[job.id] = job
+        try:
+            fn(job)
+            job.finish('completed')
+        except JobCancelled:
+            job.finish('cancelled')
+        except Exception as e:
+            job.finish('failed', str(e))
+        return job.id
+
+    app = FastAPI()
+    app.include_router(flows.router)
+    app.state.start_custom_job = start_custom_job
+    app.state.get_job = jobs.get
+    return TestClient(app)
+
+
+def test_run_flow_reports_nodes_and_resumes(client, tmp_path):
+    broken = tmp_path / 'broken'
+    broken.write_text('1')
+    doc = {'id': 'demo', 'nodes': [
+        {'id': 'a', 'ref': 'hello', 'in': {'message': 'hi'}},
+        {'id': 'b', 'ref': 'missing-experiment', 'after': ['a']},
+    ]}
+    r = client.post('/api/flows/run', json={'flow': doc, 'cache': False}).json()
+    assert r['nodes'] == ['a', 'b']
+    st = client.get(f"/api/flows/{r['jobId']}").json()
+    assert st['status'] == 'failed'
+    assert [(n['id'], n['status']) for n in st['nodes']] == [('a', 'completed'), ('b', 'failed')]
+    assert 'runSec' in st['nodes'][0]
+    assert client.get(f"/api/flows/{r['jobId']}/nodes/a/logs").json()['lines'] == ['Hello from plugin']
+    log = Path(st['runDir']) / 'a' / 'node.log'
+    log.write_text(''.join(f'line {i}\n' for i in range(6000)), encoding='utf-8')
+    tail = client.get(f"/api/flows/{r['jobId']}/nodes/a/logs", params={'tail': 2}).json()['lines']
+    assert tail == ['line 5998', 'line 5999']
+    assert len(client.get(f"/api/flows/{r['jobId']}/nodes/a/logs", params={'tail': 9999}).json()['lines']) == 5000
+    assert client.get(f"/api/flows/{r['jobId']}/nodes/b/logs").json()['lines'] == []
+
+    r2 = client.post(f"/api/flows/{r['jobId']}/resume").json()
+    st2 = client.get(f"/api/flows/{r2['jobId']}").json()
+    assert st2['resumed'] == ['a']
+    assert st2['runDir'] == st['runDir']
+
+
+def test_run_flow_rejects_bad_documents(client):
+    bad = {'id': 'x', 'nodes': [{'id': 'a', 'ref': 'hello', 'in': {'v': '${nope.out}'}}]}
+    assert client.post('/api/flows/run', json={'flow': bad}).status_code == 400
+    assert client.post('/api/flows/run', json={'profile': '../README'}).status_code == 404
+    assert client.get('/api/flows/unknown').status_code == 404
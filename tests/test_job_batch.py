@@ -0,0 +1,93 @@
+import asyncio, json, threading
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import Batch
+
+
+def _batch(make_job, n, on_finished=None):
+    jobs = {f"j{i}": make_job(f"j{i}") for i in range(n)}
+    b = Batch("b1", "exp", list(jobs), jobs.get, on_finished=on_finished)
+    return b.attach(list(jobs.values())), jobs
+
+
+def _collect(b, offset=0):
+    async def run():
+        return [chunk async for chunk in b.sse(offset, heartbeat=None)]
+    return asyncio.run(run())
+
+
+def test_summary_counts_and_status(make_job):
+    b, jobs = _batch(make_job, 4)
+    jobs["j0"].finish("completed")
+    jobs["j1"].finish("failed", "boom")
+    jobs["j2"].status = "running"
+    s = b.summary(items=True)
+    assert s["total"] == 4 and s["finished"] == 2 and s["progress"] == 0.5
+    assert s["counts"] == {"completed": 1, "failed": 1, "running": 1, "queued": 1}
+    assert not s["done"]
+    assert [it["status"] for it in s["items"]] == ["completed", "failed", "running", "queued"]
+    jobs["j2"].finish("completed")
+    jobs["j3"].finish("cancelled")
+    s = b.summary()
+    assert s["done"] and s["progress"] == 1.0 and "items" not in s
+
+
+def test_stream_reports_items_in_completion_order_then_summary(make_job):
+    finished = []
+    b, jobs = _batch(make_job, 3, on_finished=finished.append)
+    jobs["j2"].finish("completed")
+    jobs["j0"].finish("failed", "boom")
+    assert not finished
+    jobs["j1"].finish("completed")
+    assert finished == [b]
+    chunks = _collect(b)
+    events = [json.loads(c.split("data: ", 1)[1]) for c in chunks[:-1]]
+    assert [e["index"] for e in events] == [2, 0, 1]
+    assert [e["finished"] for e in events] == [1, 2, 3]
+    assert events[1]["error"] == "boom"
+    assert chunks[0].startswith("id: 0\n")
+    assert chunks[-1].startswith("event: done\n")
+    assert json.loads(chunks[-1].split("data: ", 1)[1])["done"]
+    # Resuming after the first event skips it.
+    assert len(_collect(b, offset=1)) == 3
+
+
+def test_stream_follows_live_batch(make_job):
+    b, jobs = _batch(make_job, 2)
+    jobs["j0"].finish("completed")
+    t = threading.Timer(0.05, jobs["j1"].finish, ("completed",))
+    t.start()
+    chunks = _collect(b)
+    t.join()
+    assert len(chunks) == 3 and chunks[-1].startswith("event: done")
+
+
+def test_rebuilt_finished_batch_is_complete_at_once(make_job):
+    jobs = {"a": make_job("a"), "b": make_job("b")}
+    for j in jobs.values():
+        j.finish("completed")
+    finished = []
+    b = Batch("b1", "exp", list(jobs), jobs.get, on_finished=finished.append).attach(list(jobs.values()))
+    assert finished == [b] and b.events.closed
+    assert len(_collect(b)) == 3
+
+
+def test_cancel_counts_unfinished_jobs(make_job):
+    b, jobs = _batch(make_job, 3)
+    jobs["j0"].finish("completed")
+
+    def cancel(jid):
+        j = jobs[jid]
+        if j.status in ("completed", "failed", "cancelled"):
+            return False
+        j.finish("cancelled")
+        return True
+
+    assert b.cancel(cancel) == 2
+    s = b.summary()
+    assert s["counts"] == {"completed": 1, "cancelled": 2} and s["done"]
+    assert b.cancel(cancel) == 0
@@ -0,0 +1,81 @@
+import threading
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import JobScheduler, dependency_error, release_after
+
+
+def _enqueue(sched, job, deps, require_success=True):
+    ran = threading.Event()
+
+    def submit(j):
+        j.status = "queued"
+        sched.submit(j.id, lambda: (ran.set(), j.finish("completed")))
+
+    def fail(j, error):
+        j.finish("failed", error)
+
+    if any(not d._done.is_set() for d in deps):
+        job.status = "pending"
+    release_after(job, deps, submit, fail, require_success)
+    return ran
+
+
+def test_dependent_waits_for_dependency(make_job):
+    sched = JobScheduler(workers=2)
+    a, b = make_job("a"), make_job("b")
+    ran = _enqueue(sched, b, [a])
+    assert b.status == "pending"
+    assert not ran.wait(0.1)
+    a.finish("completed")
+    assert ran.wait(2)
+    assert b._done.wait(2) and b.status == "completed"
+    sched.shutdown()
+
+
+def test_dependent_fails_when_dependency_fails(make_job):
+    sched = JobScheduler(workers=2)
+    a, b, c = make_job("a"), make_job("b"), make_job("c")
+    ran = _enqueue(sched, c, [a, b])
+    a.finish("completed")
+    assert c.status == "pending"
+    b.finish("failed")
+    assert c._done.wait(2)
+    assert c.status == "failed" and c.error == "dependency b failed"
+    assert not ran.is_set()
+    sched.shutdown()
+
+
+def test_dependent_runs_without_require_success(make_job):
+    sched = JobScheduler(workers=2)
+    a, b = make_job("a"), make_job("b")
+    ran = _enqueue(sched, b, [a], require_success=False)
+    a.finish("failed")
+    assert ran.wait(2)
+    assert b._done.wait(2) and b.status == "completed"
+    sched.shutdown()
+
+
+def test_finished_dependencies_release_immediately(make_job):
+    sched = JobScheduler(workers=1)
+    a, b = make_job("a"), make_job("b")
+    a.finish("cancelled")
+    ran = _enqueue(sched, b, [a])
+    assert b.status == "failed" and b.error == "dependency a cancelled"
+    assert not ran.is_set()
+    assert dependency_error([a], require_success=False) is None
+    sched.shutdown()
+
+
+def test_cancelled_dependent_is_left_alone(make_job):
+    sched = JobScheduler(workers=1)
+    a, b = make_job("a"), make_job("b")
+    ran = _enqueue(sched, b, [a])
+    b.status = "cancelled"
+    a.finish("completed")
+    assert not ran.wait(0.1)
+    assert b.status == "cancelled"
+    sched.shutdown()
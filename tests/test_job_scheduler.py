@@ -0,0 +1,154 @@
+import threading, time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import JobScheduler, PRIORITY_INTERACTIVE, PRIORITY_BATCH, parse_priority, ResourceBudget, ResourceClass
+
+
+def test_priority_order_and_bounded_workers():
+    sched = JobScheduler(workers=1)
+    gate = threading.Event()
+    order = []
+    done = threading.Event()
+
+    # Occupy the single worker so the rest queue up behind it.
+    sched.submit('blocker', gate.wait)
+    time.sleep(0.05)
+    sched.submit('batch', lambda: order.append('batch'), PRIORITY_BATCH)
+    sched.submit('interactive', lambda: order.append('interactive'), PRIORITY_INTERACTIVE)
+    sched.submit('last', done.set, PRIORITY_BATCH)
+
+    st = sched.stats()
+    assert st['workers'] == 1
+    assert st['running'] == 1
+    assert st['queued'] == 3
+    assert sched.position('interactive') == 1
+
+    gate.set()
+    assert done.wait(2)
+    assert order == ['interactive', 'batch']
+    assert sched.position('interactive') is None
+    sched.shutdown()
+
+
+def test_parse_priority():
+    assert parse_priority('interactive') == PRIORITY_INTERACTIVE
+    assert parse_priority('BATCH') == PRIORITY_BATCH
+    assert parse_priority('3') == 3
+    assert parse_priority(None, default=7) == 7
+
+
+def test_resource_class_serializes_heavy_but_not_light():
+    sched = JobScheduler(workers=3, budget=ResourceBudget(cores=8, memory_mb=0))
+    heavy = ResourceClass.from_manifest({'resources': {'class': 'heavy', 'maxConcurrent': 1}})
+    light = ResourceClass.from_manifest({'resources': 'light'})
+    gate = threading.Event()
+    light_done = threading.Event()
+    ran = []
+
+    sched.submit('h1', gate.wait, key='audio-engine', resources=heavy)
+    sched.submit('h2', lambda: ran.append('h2'), key='audio-engine', resources=heavy)
+    sched.submit('l1', light_done.set, key='hello', resources=light)
+
+    # The light job overtakes the second heavy one, which waits for the first.
+    assert light_done.wait(2)
+    assert ran == []
+    assert sched.stats()['budget']['running'] == {'audio-engine': 1}
+
+    gate.set()
+    deadline = time.time() + 2
+    while not ran and time.time() < deadline:
+        time.sleep(0.01)
+    assert ran == ['h2']
+    sched.shutdown()
+
+
+def test_resource_class_from_manifest_defaults():
+    assert ResourceClass.from_manifest({}).name == 'standard'
+    assert ResourceClass.from_manifest({'resources': 'bogus'}).name == 'standard'
+    rc = ResourceClass.from_manifest({'resources': {'class': 'heavy', 'memoryMB': 1024}})
+    assert (rc.name, rc.max_concurrent, rc.memory_mb) == ('heavy', 1, 1024)
+
+
+def test_cancel_drops_queued_job():
+    sched = JobScheduler(workers=1)
+    gate = threading.Event()
+    ran = []
+    sched.submit('blocker', gate.wait)
+    time.sleep(0.05)
+    sched.submit('victim', lambda: ran.append('victim'))
+    assert sched.cancel('victim') is True
+    assert sched.cancel('blocker') is False  # already running
+    assert sched.stats()['queued'] == 0
+    gate.set()
+    time.sleep(0.1)
+    assert ran == []
+    sched.shutdown()
+
+
+def test_submit_many_enqueues_all_before_workers_pick():
+    sched = JobScheduler(workers=2)
+    order = []
+    done = threading.Event()
+    items = [(f'j{i}', (lambda i=i: order.append(i)), PRIORITY_BATCH, 'exp', None) for i in range(10)]
+    items.append(('last', done.set, PRIORITY_BATCH + 1, 'exp', None))
+    sched.submit_many(items)
+    assert done.wait(2)
+    assert sorted(order) == list(range(10))
+    assert sched.stats()['submitted'] == 11
+    sched.shutdown()
+
+
+def _light_then_heavy(reserve_after):
+    # One light job holds a core, so the 4-core heavy job does not fit a 4-core budget.
+    sched = JobScheduler(workers=3, budget=ResourceBudget(cores=4, memory_mb=0), reserve_after=reserve_after)
+    light = ResourceClass('light', 0, 1.0, 0)
+    heavy = ResourceClass('heavy', 0, 4.0, 0)
+    gate = threading.Event()
+    order = []
+    sched.submit('l1', gate.wait, key='hello', resources=light)
+    time.sleep(0.05)
+    sched.submit('h', lambda: order.append('h'), key='audio-engine', resources=heavy)
+    time.sleep(0.15)
+    sched.submit('l2', lambda: order.append('l2'), key='hello', resources=light)
+    time.sleep(0.1)
+    return sched, gate, order
+
+
+def test_light_jobs_overtake_a_heavy_job_before_it_ages():
+    sched, gate, order = _light_then_heavy(reserve_after=0)
+    assert order == ['l2']
+    gate.set()
+    sched.shutdown()
+
+
+def test_aged_heavy_job_reserves_capacity():
+    sched, gate, order = _light_then_heavy(reserve_after=0.1)
+    # l2 would fit, but the heavy job has waited long enough to hold the cores.
+    assert order == []
+    assert sched.stats()['queued'] == 2
+    gate.set()
+    deadline = time.time() + 2
+    while len(order) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert order == ['h', 'l2']
+    sched.shutdown()
+
+
+def test_job_at_its_own_limit_reserves_nothing():
+    sched = JobScheduler(workers=3, budget=ResourceBudget(cores=8, memory_mb=0), reserve_after=0.01)
+    heavy = ResourceClass.from_manifest({'resources': {'class': 'heavy', 'maxConcurrent': 1}})
+    light = ResourceClass.from_manifest({'resources': 'light'})
+    gate = threading.Event()
+    light_done = threading.Event()
+    sched.submit('h1', gate.wait, key='audio-engine', resources=heavy)
+    sched.submit('h2', lambda: None, key='audio-engine', resources=heavy)
+    time.sleep(0.05)
+    # h2 waits on audio-engine's maxConcurrent, not on host capacity; light work keeps flowing.
+    sched.submit('l1', light_done.set, key='hello', resources=light)
+    assert light_done.wait(2)
+    gate.set()
+    sched.shutdown()
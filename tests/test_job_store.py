@@ -0,0 +1,45 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import JobStore
+
+
+def test_job_store_roundtrip_and_active(tmp_path: Path):
+    store = JobStore(tmp_path / 'jobs.db')
+    store.save({'id': 'a1', 'exp_id': 'hello', 'kind': 'experiment', 'status': 'running',
+                'inputs': {'message': 'hi'}, 'after': ['b2'], 'created_at': 1.0, 'log_offset': 3})
+    store.save({'id': 'b2', 'exp_id': 'hello', 'kind': 'experiment', 'status': 'completed',
+                'artifacts': ['artifacts/x.json'], 'created_at': 2.0,
+                'usage': {'cpuUserSec': 1.5, 'children': [{'pid': 7}]}})
+
+    row = store.get('a1')
+    assert row['inputs'] == {'message': 'hi'}
+    assert row['log_offset'] == 3
+    assert row['after'] == ['b2']
+    assert [r['id'] for r in store.active()] == ['a1']
+
+    # Upsert keeps one row per job and a fresh store sees the same data.
+    store.save({**row, 'status': 'failed', 'error': 'boom'})
+    reopened = JobStore(tmp_path / 'jobs.db')
+    assert reopened.get('a1')['status'] == 'failed'
+    assert reopened.active() == []
+    assert reopened.get('b2')['artifacts'] == ['artifacts/x.json']
+    assert reopened.get('b2')['usage'] == {'cpuUserSec': 1.5, 'children': [{'pid': 7}]}
+    assert reopened.get('a1')['usage'] is None
+
+
+def test_rehydrated_job_keeps_interactive_priority(server):
+    # PRIORITY_INTERACTIVE is 0: Job.from_record must not read it back as "unset".
+    job = server.Job('i1', 'echo', {}, priority=server.PRIORITY_INTERACTIVE)
+    job.persist()
+    server.JOBS.clear()
+    rehydrated = server._get_job('i1')
+    assert rehydrated is not job
+    assert rehydrated.priority == server.PRIORITY_INTERACTIVE == 0
+    # Records written before priorities existed fall back to normal.
+    server.JOB_STORE.save({'id': 'n1', 'exp_id': 'echo', 'kind': 'experiment', 'status': 'failed'})
+    assert server.JOB_STORE.get('n1')['priority'] is None
+    assert server._get_job('n1').priority == server.PRIORITY_NORMAL
@@ -0,0 +1,75 @@
+import asyncio, threading, time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import LogBus, tail_file
+
+
+def test_logbus_broadcasts_to_all_followers_and_resumes():
+    bus = LogBus(capacity=100)
+    bus.append('a')
+
+    def writer():
+        time.sleep(0.05)
+        bus.append('b')
+        bus.append('c')
+        bus.close()
+
+    async def collect(start):
+        return [(off, line) async for off, line in bus.follow(start)]
+
+    async def main():
+        threading.Thread(target=writer).start()
+        return await asyncio.gather(collect(0), collect(0), collect(2))
+
+    first, second, resumed = asyncio.run(main())
+    assert first == second == [(0, 'a'), (1, 'b'), (2, 'c')]
+    assert resumed == [(2, 'c')]
+
+
+def test_logbus_ring_buffer_keeps_absolute_offsets():
+    bus = LogBus(capacity=2)
+    for ch in 'abcd':
+        bus.append(ch)
+    rows, nxt = bus.read(0)
+    assert rows == [(2, 'c'), (3, 'd')]
+    assert (bus.first_offset, nxt) == (2, 4)
+    assert bus.read(3, limit=5) == ([(3, 'd')], 4)
+
+
+def test_logbus_spills_to_disk_and_serves_ranges(tmp_path: Path):
+    fp = tmp_path / 'job.log'
+    bus = LogBus(capacity=10, path=fp)
+    bus.append('multi\nline')
+    for i in range(2, 3000):
+        bus.append(f'line {i}')
+    assert len(bus.tail()) == 10
+    assert bus.first_offset == 0
+
+    rows, nxt = bus.read(0, limit=3)
+    assert rows == [(0, 'multi'), (1, 'line'), (2, 'line 2')]
+    assert nxt == 3
+    rows, _ = bus.read(2500, limit=2)
+    assert rows == [(2500, 'line 2500'), (2501, 'line 2501')]
+    rows, nxt = bus.read(2985, limit=100)
+    assert rows[-1] == (2999, 'line 2999') and nxt == 3000
+    bus.close()
+
+    # A fresh bus over the same file (e.g. after restart) rebuilds offsets.
+    again = LogBus(capacity=5, path=fp)
+    assert again.next_offset == 3000
+    assert again.tail(1) == ['line 2999']
+    assert again.read(1024, limit=1)[0] == [(1024, 'line 1024')]
+
+
+def test_tail_file_reads_backwards_across_blocks(tmp_path: Path):
+    path = tmp_path / 'node.log'
+    path.write_text(''.join(f'line {i} é\n' for i in range(1000)), encoding='utf-8')
+    assert tail_file(path, 3, block=7) == ['line 997 é', 'line 998 é', 'line 999 é']
+    assert tail_file(path, 5000) == [f'line {i} é' for i in range(1000)]
+    assert tail_file(path, 0) == []
+    path.write_text('a\nb\nno newline', encoding='utf-8')
+    assert tail_file(path, 2, block=4) == ['b', 'no newline']
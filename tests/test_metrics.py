@@ -0,0 +1,36 @@
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.metrics import Registry, connect_sqlite, REGISTRY
+
+
+def test_histogram_counter_gauge_exposition():
+    reg = Registry()
+    h = reg.histogram('t_seconds', 'latency', ('route',), buckets=(0.1, 1))
+    h.observe(0.05, route='/a')
+    h.observe(0.5, route='/a')
+    h.observe(5, route='/a')
+    reg.counter('t_total', 'count').inc(2)
+    reg.gauge('t_depth', 'depth', ('exp',), fn=lambda: {('x',): 3})
+    out = reg.render().splitlines()
+    assert 't_seconds_bucket{route="/a",le="0.1"} 1' in out
+    assert 't_seconds_bucket{route="/a",le="1"} 2' in out
+    assert 't_seconds_bucket{route="/a",le="+Inf"} 3' in out
+    assert 't_seconds_count{route="/a"} 3' in out
+    assert 't_total 2' in out
+    assert 't_depth{exp="x"} 3' in out
+    assert '# TYPE t_seconds histogram' in out
+
+
+def test_connect_sqlite_times_statements():
+    conn = connect_sqlite(':memory:', 'unit')
+    conn.execute('CREATE TABLE t (a)')
+    cur = conn.cursor()
+    cur.executemany('INSERT INTO t VALUES (?)', [(1,), (2,)])
+    assert cur.execute('SELECT count(*) FROM t').fetchone()[0] == 2
+    text = REGISTRY.render()
+    for op in ('create', 'insert', 'select'):
+        assert f'trk_sqlite_query_seconds_count{{db="unit",op="{op}"}} 1' in text
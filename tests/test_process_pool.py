@@ -0,0 +1,111 @@
+import os, threading, time
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import ProcessPool, execution_mode
+
+EXP_SRC = '''
+import os
+from services.sdk_py.base import BaseExperiment
+class EXP(BaseExperiment):
+    def run(self, ctx):
+        ctx.log(f"pid={os.getpid()}")
+        ctx.emit_json("out", {"n": ctx.input("n")})
+'''
+
+
+def test_process_pool_runs_experiment_out_of_process(tmp_path: Path):
+    exp_dir = tmp_path / 'exps' / 'cpu' / 'py'
+    exp_dir.mkdir(parents=True)
+    (exp_dir / 'main.py').write_text(EXP_SRC, encoding='utf-8')
+    job_dir = tmp_path / 'job'
+    job_dir.mkdir()
+
+    pool = ProcessPool(processes=1, exp_root=tmp_path / 'exps')
+    logs, arts = [], []
+    try:
+        pool.run('cpu', job_dir, {'n': 3}, log=logs.append, on_artifact=arts.append)
+    finally:
+        pool.shutdown()
+
+    assert logs and logs[0].startswith('pid=') and logs[0] != f'pid={os.getpid()}'
+    assert arts == [str(job_dir / 'out.json')]
+    assert (job_dir / 'out.json').read_text(encoding='utf-8').count('"n": 3') == 1
+
+
+def test_execution_mode_defaults_to_thread():
+    assert execution_mode({}) == 'thread'
+    assert execution_mode({'execution': 'PROCESS'}) == 'process'
+    assert execution_mode({'execution': 'gpu'}) == 'thread'
+
+
+CRASH_SRC = '''
+import os, time
+from pathlib import Path
+from services.sdk_py.base import BaseExperiment
+class EXP(BaseExperiment):
+    def run(self, ctx):
+        marker = Path(ctx.input("marker"))
+        if ctx.input("crash") and not marker.exists():
+            marker.write_text("1")
+            time.sleep(0.2)
+            os._exit(1)  # like an OOM kill
+        if not ctx.input("crash"):
+            time.sleep(1.0)
+        ctx.emit_json("out", {"name": ctx.input("name")})
+'''
+
+
+def _crash_pool(tmp_path: Path, processes: int) -> ProcessPool:
+    exp_dir = tmp_path / 'exps' / 'crashy' / 'py'
+    exp_dir.mkdir(parents=True)
+    (exp_dir / 'main.py').write_text(CRASH_SRC, encoding='utf-8')
+    return ProcessPool(processes=processes, exp_root=tmp_path / 'exps')
+
+
+def test_process_pool_reruns_jobs_caught_in_a_crash(tmp_path: Path):
+    pool = _crash_pool(tmp_path, processes=2)
+    results, logs = {}, []
+
+    def run(name, crash):
+        job_dir = tmp_path / name
+        job_dir.mkdir()
+        try:
+            pool.run('crashy', job_dir, {'name': name, 'crash': crash, 'marker': str(tmp_path / 'marker')},
+                     log=logs.append)
+            results[name] = (job_dir / 'out.json').exists()
+        except RuntimeError as e:
+            results[name] = str(e)
+
+    threads = [threading.Thread(target=run, args=('innocent', False)),
+               threading.Thread(target=run, args=('crasher', True))]
+    try:
+        threads[0].start()
+        time.sleep(0.5)  # the innocent job is running when the other one kills its worker
+        threads[1].start()
+        for t in threads:
+            t.join(60)
+    finally:
+        pool.shutdown()
+    assert results == {'innocent': True, 'crasher': True}
+    assert any('crashed' in line for line in logs)
+
+
+def test_process_pool_without_retry_fails_the_job(tmp_path: Path):
+    pool = _crash_pool(tmp_path, processes=1)
+    job_dir = tmp_path / 'job'
+    job_dir.mkdir()
+    inputs = {'name': 'x', 'crash': True, 'marker': str(tmp_path / 'marker')}
+    try:
+        with pytest.raises(RuntimeError, match='crashed'):
+            pool.run('crashy', job_dir, inputs, log=lambda m: None, retry=False)
+        # The pool is usable again afterwards.
+        pool.run('crashy', job_dir, inputs, log=lambda m: None)
+    finally:
+        pool.shutdown()
+    assert (job_dir / 'out.json').exists()
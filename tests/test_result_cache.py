@@ -0,0 +1,80 @@
+import time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import JobStore, code_version, fingerprint
+
+
+def test_fingerprint_tracks_file_contents_not_paths(tmp_path: Path):
+    a = tmp_path / 'a.wav'
+    b = tmp_path / 'b.wav'
+    a.write_bytes(b'same')
+    b.write_bytes(b'same')
+    fa = fingerprint('audio-engine', 'v1', {'audio': str(a)})
+    assert fa == fingerprint('audio-engine', 'v1', {'audio': b.resolve().as_uri()})
+    assert fa != fingerprint('audio-engine', 'v2', {'audio': str(a)})
+    b.write_bytes(b'changed')
+    assert fa != fingerprint('audio-engine', 'v1', {'audio': str(b)})
+
+
+def test_code_version_follows_sources(tmp_path: Path):
+    (tmp_path / 'py').mkdir()
+    main = tmp_path / 'py' / 'main.py'
+    main.write_text('x = 1\n', encoding='utf-8')
+    v1 = code_version(tmp_path, {'version': '0.1.0'})
+    assert v1 != code_version(tmp_path, {'version': '0.2.0'})
+    main.write_text('x = 2\n', encoding='utf-8')
+    assert v1 != code_version(tmp_path, {'version': '0.1.0'})
+
+
+def test_store_cache_lookup_and_eviction(tmp_path: Path):
+    store = JobStore(tmp_path / 'jobs.db')
+    now = time.time()
+    store.save({'id': 'old', 'status': 'completed', 'fingerprint': 'f1', 'finished_at': now - 100})
+    store.save({'id': 'new', 'status': 'completed', 'fingerprint': 'f1', 'finished_at': now - 10})
+    store.save({'id': 'run', 'status': 'running', 'fingerprint': 'f2', 'created_at': now - 5})
+    assert store.find_cached('f1')['id'] == 'new'
+    assert store.find_cached('f2') is None
+
+    store.touch_cached('old')
+    assert store.evict_cached(max_entries=2, max_age_sec=3600) == 1
+    assert store.get('new')['fingerprint'] is None
+    assert store.find_cached('f1')['id'] == 'old'
+
+
+def test_code_version_follows_manifest_sources(tmp_path: Path):
+    (tmp_path / 'py').mkdir()
+    (tmp_path / 'py' / 'main.py').write_text('x = 1\n', encoding='utf-8')
+    (tmp_path / 'engine' / 'src').mkdir(parents=True)
+    step = tmp_path / 'engine' / 'src' / 'step.py'
+    step.write_text('y = 1\n', encoding='utf-8')
+    config = tmp_path / 'engine' / 'config.yaml'
+    config.write_text('rate: 44100\n', encoding='utf-8')
+    manifest = {'version': '0.1.0', 'sources': ['py/**/*.py', 'engine/src/**/*.py', 'engine/config.yaml']}
+    v1 = code_version(tmp_path, manifest)
+    step.write_text('y = 2\n', encoding='utf-8')
+    v2 = code_version(tmp_path, manifest)
+    assert v2 != v1
+    config.write_text('rate: 48000\n', encoding='utf-8')
+    assert code_version(tmp_path, manifest) != v2
+    # Without the declared sources only py/ counts.
+    assert code_version(tmp_path, {'version': '0.1.0'}) == code_version(tmp_path, {'version': '0.1.0', 'sources': None})
+
+
+def test_file_digest_memo_is_bounded(tmp_path: Path, monkeypatch):
+    from services.jobs import cache
+    monkeypatch.setattr(cache, 'DIGEST_MEMO_MAX', 3)
+    monkeypatch.setattr(cache, '_DIGESTS', cache.OrderedDict())
+    files = []
+    for i in range(5):
+        f = tmp_path / f'{i}.wav'
+        f.write_bytes(bytes([i]))
+        files.append(f)
+        cache.file_digest(f)
+    assert len(cache._DIGESTS) == 3
+    assert [Path(k[0]).name for k in cache._DIGESTS] == ['2.wav', '3.wav', '4.wav']
+    cache.file_digest(files[2])
+    assert Path(next(reversed(cache._DIGESTS))[0]).name == '2.wav'
@@ -0,0 +1,57 @@
+import os, sys, threading, time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.sdk_py.base import JobCancelled, RunContext
+from services.sdk_py.usage import USAGE_LOG, read_usage, summarize
+
+
+def test_run_process_captures_output(tmp_path: Path):
+    ctx = RunContext(tmp_path, {})
+    proc = ctx.run_process([sys.executable, '-c', 'print("hi")'])
+    assert proc.returncode == 0
+    assert proc.stdout.strip() == 'hi'
+
+
+def test_run_process_kills_child_on_cancel(tmp_path: Path):
+    flag = threading.Event()
+    ctx = RunContext(tmp_path, {}, cancel_fn=flag.is_set)
+    threading.Timer(0.3, flag.set).start()
+    t0 = time.time()
+    with pytest.raises(JobCancelled):
+        ctx.run_process([sys.executable, '-c', 'import time; time.sleep(30)'], poll=0.05)
+    assert time.time() - t0 < 5
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='rusage needs wait4')
+def test_run_process_records_child_usage(tmp_path: Path):
+    ctx = RunContext(tmp_path, {})
+    code = 'import os; x = bytearray(32 * 1024 * 1024); print(os.environ["TRK_USAGE_LOG"])'
+    proc = ctx.run_process([sys.executable, '-c', code])
+    assert proc.stdout.strip() == str(tmp_path / USAGE_LOG)
+    (rec,) = read_usage(tmp_path / USAGE_LOG)
+    assert rec['returncode'] == 0 and not rec.get('nested')
+    assert rec['maxRssBytes'] >= 32 * 1024 * 1024
+    # Nested records (audio-automation's run_cmd) are listed but not double-counted.
+    nested = dict(rec, nested=True)
+    total = summarize({'cpuUserSec': 0.5, 'cpuSysSec': 0.0}, [rec, nested])
+    assert total['childCount'] == 2
+    assert total['cpuUserSec'] == round(0.5 + rec['cpuUserSec'], 3)
+    assert total['maxRssBytes'] == rec['maxRssBytes']
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='rusage needs wait4')
+def test_wait_process_without_waitid(monkeypatch):
+    # macOS: wait4 but no waitid; usage still comes from the child's rusage.
+    monkeypatch.delattr(os, 'waitid', raising=False)
+    import subprocess
+    from services.sdk_py.usage import wait_process
+    proc = subprocess.Popen([sys.executable, '-c', 'import sys; x = bytearray(32 * 1024 * 1024); sys.exit(2)'])
+    usage = wait_process(proc, poll=0.05)
+    assert proc.returncode == 2
+    assert usage['maxRssBytes'] >= 32 * 1024 * 1024
+    assert usage['readBytes'] >= 0 and usage['writeBytes'] >= 0
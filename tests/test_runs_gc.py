@@ -0,0 +1,44 @@
+import os, time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services.jobs import JobStore, RunsGC, shard_dir
+
+
+def _job(root: Path, store: JobStore, job_id: str, age_days: float, size: int, status: str = 'completed') -> Path:
+    when = time.time() - age_days * 86400
+    d = shard_dir(root, job_id, when)
+    d.mkdir(parents=True)
+    (d / 'out.bin').write_bytes(b'x' * size)
+    os.utime(d, (when, when))
+    store.save({'id': job_id, 'status': status, 'dir': str(d), 'created_at': when, 'finished_at': when})
+    return d
+
+
+def test_gc_age_then_lru_budget_respects_pins_and_active(tmp_path: Path):
+    root = tmp_path / 'runs'
+    store = JobStore(tmp_path / 'jobs.db')
+    ancient = _job(root, store, 'aa0001', 40, 10)
+    old = _job(root, store, 'bb0002', 5, 1000)
+    pinned = _job(root, store, 'cc0003', 4, 1000)
+    newer = _job(root, store, 'dd0004', 1, 1000)
+    running = _job(root, store, 'ee0005', 50, 1000, status='running')
+    store.set_pinned('cc0003', True)
+    upload = root / '_uploads' / 'a.wav'
+    upload.parent.mkdir(parents=True)
+    upload.write_bytes(b'y' * 10)
+
+    gc = RunsGC(root, store, budget_bytes=3500, max_age_sec=30 * 86400, recordings_max_age_sec=0)
+    dry = gc.collect(dry_run=True)
+    assert ancient.exists() and dry['removed']
+
+    rep = gc.collect()
+    assert not ancient.exists()  # past max age
+    assert not old.exists()  # least recently used once over budget
+    assert pinned.exists() and newer.exists() and running.exists() and upload.exists()
+    assert rep['totalBytes'] <= 3500
+    assert store.get('bb0002')['evicted_at'] is not None
+    assert not ancient.parent.exists()  # empty shard pruned
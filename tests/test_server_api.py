@@ -0,0 +1,109 @@
+"""The job endpoints of apps/server/main.py, driven through TestClient (see conftest.py)."""
+import json, threading, time
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _start(api, exp_id, body=None, **params):
+    r = api.post(f'/api/experiments/{exp_id}/jobs', json=body or {}, params=params)
+    assert r.status_code == 200, r.text
+    return r.json()['jobId']
+
+
+def test_after_holds_job_until_dependency_completes(server, api, wait_job):
+    gate = threading.Event()
+    first = server.start_custom_job('gate', lambda job: gate.wait(5), {})
+    second = _start(api, 'echo', {'message': 'hi'}, after=first, cache=False)
+    st = api.get(f'/api/jobs/{second}/status').json()
+    assert st['status'] == 'pending' and st['waitingOn'] == [first]
+    gate.set()
+    assert wait_job(second).status == 'completed'
+    assert api.get(f'/api/jobs/{second}/status').json()['after'] == [first]
+
+
+def test_after_fails_job_when_dependency_fails(server, api, wait_job):
+    first = _start(api, 'broken', cache=False)
+    second = _start(api, 'echo', {'message': 'hi'}, after=first, cache=False)
+    assert wait_job(first).status == 'failed'
+    job = wait_job(second)
+    assert job.status == 'failed' and job.error == f'dependency {first} failed'
+
+
+def test_after_rejects_unknown_dependency(server, api):
+    r = api.post('/api/experiments/echo/jobs', json={}, params={'after': 'nope'})
+    assert r.status_code == 400
+    assert server.JOBS == {}
+
+
+def test_batch_endpoints(server, api, wait_job):
+    r = api.post('/api/experiments/echo/jobs:batch', params={'cache': False},
+                 json={'items': [{'message': f'm{i}'} for i in range(3)]}).json()
+    assert r['total'] == 3 and r['queued'] == 3
+    for jid in r['jobIds']:
+        wait_job(jid)
+    with api.stream('GET', f"/api/batches/{r['batchId']}/stream") as s:
+        data = [json.loads(line[6:]) for line in s.iter_lines() if line.startswith('data: ')]
+    assert sorted(e['index'] for e in data[:-1]) == [0, 1, 2]
+    assert data[-1]['done'] and data[-1]['counts'] == {'completed': 3}
+    # Finished batches are dropped from memory and rebuilt from the job store.
+    assert r['batchId'] not in server.BATCHES
+    st = api.get(f"/api/batches/{r['batchId']}", params={'items': True}).json()
+    assert st['finished'] == 3 and [it['jobId'] for it in st['items']] == r['jobIds']
+    assert api.get('/api/batches/unknown').status_code == 404
+
+
+def test_batch_cancel(server, api, wait_job):
+    r = api.post('/api/experiments/slow/jobs:batch', params={'cache': False},
+                 json=[{'n': i} for i in range(2)]).json()
+    assert api.post(f"/api/batches/{r['batchId']}/cancel").json()['cancelled'] == 2
+    assert {wait_job(jid).status for jid in r['jobIds']} == {'cancelled'}
+    assert api.get(f"/api/batches/{r['batchId']}").json()['counts'] == {'cancelled': 2}
+
+
+def test_cancel_running_job(server, api, wait_job):
+    job_id = _start(api, 'slow', cache=False)
+    deadline = time.time() + 5
+    while server._get_job(job_id).status != 'running' and time.time() < deadline:
+        time.sleep(0.02)
+    assert api.post(f'/api/jobs/{job_id}/cancel').json()['cancelled'] is True
+    assert wait_job(job_id).status == 'cancelled'
+    assert api.post(f'/api/jobs/{job_id}/cancel').json()['cancelled'] is False
+
+
+def test_recover_requeues_interrupted_experiment_jobs(server, wait_job):
+    job = server.Job('interrupted', 'echo', {'message': 'again'})
+    job.status = 'running'
+    job.persist()
+    custom = server.Job('lost', 'fn', {}, kind='custom')
+    custom.status = 'queued'
+    custom.persist()
+    assert server.recover_jobs() == {'requeued': 1, 'failed': 1}
+    assert wait_job('interrupted').status == 'completed'
+    lost = wait_job('lost')
+    assert lost.status == 'failed' and lost.error == 'interrupted by server restart'
+
+
+def test_flow_runs_as_a_server_job(server, api, wait_job):
+    doc = {'id': 'demo', 'nodes': [{'id': 'a', 'ref': 'hello', 'in': {'message': 'hi'}}]}
+    r = api.post('/api/flows/run', json={'flow': doc, 'cache': False}).json()
+    assert wait_job(r['jobId']).status == 'completed'
+    st = api.get(f"/api/flows/{r['jobId']}").json()
+    assert [(n['id'], n['status']) for n in st['nodes']] == [('a', 'completed')]
+
+
+def test_cancelled_job_is_not_served_from_the_result_cache(server, api, wait_job):
+    # `slow` returns normally once it sees ctx.cancelled(); its partial output is not a result.
+    job_id = _start(api, 'slow', {'n': 1})
+    deadline = time.time() + 5
+    while server._get_job(job_id).status != 'running' and time.time() < deadline:
+        time.sleep(0.02)
+    assert server._get_job(job_id).fingerprint
+    api.post(f'/api/jobs/{job_id}/cancel')
+    assert wait_job(job_id).status == 'cancelled'
+    r = api.post('/api/experiments/slow/jobs', json={'n': 1}).json()
+    assert not r.get('cached')
+    api.post(f"/api/jobs/{r['jobId']}/cancel")
+    wait_job(r['jobId'])